@@ -0,0 +1,133 @@
+# scripts/answer_key.py
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# --- Versión de la clave compilada ---
+# Incrementar cuando cambie la forma de calcular o guardar la clave,
+# para invalidar las cachés existentes.
+ANSWER_KEY_VERSION = 2
+
+# --- Parámetros de las preguntas (por defecto; cada examen puede fijar los suyos) ---
+LOOKUP_ID = "PJL-11752230"  # ID buscado en la pregunta 12
+SENTIMENT_VALUE = "Very Positive"  # Sentimiento contado en la pregunta 7
+DEFAULT_PARAMETERS = {"id_buscado": LOOKUP_ID, "sentimiento_contado": SENTIMENT_VALUE}
+
+
+def file_sha256(path):
+    """Calcula el hash SHA-256 del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _find_sheet(wb, sheet_name, filename):
+    """Devuelve la hoja cuyo nombre (sin espacios) coincide con sheet_name."""
+    for ws in wb.worksheets:
+        if ws.title.strip() == sheet_name:
+            return ws
+    raise ValueError(f"Hoja '{sheet_name}' no encontrada en '{os.path.basename(filename)}'. "
+                     f"Hojas disponibles: {', '.join(wb.sheetnames)}")
+
+
+def _compute_answers(template_file, column_mapping, header_row, sheet_name, parameters=None):
+    """Calcula con pandas las respuestas esperadas a partir de la base de datos original."""
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    letters = list(column_mapping.values())
+    df = pd.read_excel(template_file, sheet_name=sheet_name, header=header_row - 1,
+                       usecols=f"{letters[0]}:{letters[-1]}")
+    # La plantilla conserva los encabezados originales (p.ej. "Seguimiento"),
+    # así que se renombran por posición con los nombres de COLUMN_MAPPING.
+    df.columns = list(column_mapping.keys())
+    df = df[df["ID"].notna()]
+
+    scores = df["Puntuación"]
+    max_score = scores.max()
+    lookup = df.loc[df["ID"] == parameters["id_buscado"], "Nombre del Cliente"]
+
+    return {
+        "total_ids": int(df["ID"].count()),
+        "total_llamadas": int(len(df)),
+        "llamadas_sentimiento": int((df["Sentimiento"] == parameters["sentimiento_contado"]).sum()),
+        "duracion_promedio": int(round(df["Duración Llamada (Minutos)"].mean())),
+        "puntaje_maximo": int(max_score),
+        "llamadas_puntaje_maximo": int((scores == max_score).sum()),
+        "nombre_cliente": str(lookup.iloc[0]) if not lookup.empty else None,
+    }
+
+
+def _key_config(column_mapping, header_row, sheet_name, parameters):
+    """Configuración de la que depende la clave (además de los archivos), para validar la caché."""
+    return {"columnas": dict(column_mapping), "fila_encabezados": header_row, "hoja": sheet_name,
+            "parametros": {**DEFAULT_PARAMETERS, **(parameters or {})}}
+
+
+def build_answer_key(expected_file, template_file, column_mapping, header_row, sheet_name, sources=None,
+                     parameters=None):
+    """Compila la clave de respuestas a partir de los archivos de referencia."""
+    if sources is None:
+        sources = {
+            "expected": file_sha256(expected_file),
+            "template": file_sha256(template_file),
+        }
+
+    wb_expected = load_workbook(expected_file)
+    try:
+        ws_expected = _find_sheet(wb_expected, sheet_name, expected_file)
+        column_widths = {}
+        header_names = {}
+        for col_letter in column_mapping.values():
+            column_widths[col_letter] = ws_expected.column_dimensions[col_letter].width
+            value = ws_expected[f'{col_letter}{header_row}'].value
+            header_names[col_letter] = str(value).strip() if value is not None else None
+    finally:
+        wb_expected.close()
+
+    return {
+        "version": ANSWER_KEY_VERSION,
+        "sources": sources,
+        "config": _key_config(column_mapping, header_row, sheet_name, parameters),
+        "column_widths": column_widths,
+        "header_names": header_names,
+        "answers": _compute_answers(template_file, column_mapping, header_row, sheet_name, parameters),
+    }
+
+
+def load_answer_key(expected_file, template_file, column_mapping, header_row, sheet_name, cache_file,
+                    parameters=None):
+    """
+    Devuelve la clave de respuestas, reutilizando la caché en disco si sigue vigente.
+
+    La caché se invalida si cambia ANSWER_KEY_VERSION, el contenido de cualquiera
+    de los archivos de referencia o la configuración del examen (columnas, fila de
+    encabezados, hoja y parámetros de las preguntas).
+    """
+    sources = {
+        "expected": file_sha256(expected_file),
+        "template": file_sha256(template_file),
+    }
+
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, encoding='utf-8') as f:
+                cached = json.load(f)
+            if (cached.get("version") == ANSWER_KEY_VERSION and cached.get("sources") == sources
+                    and cached.get("config") == _key_config(column_mapping, header_row, sheet_name, parameters)):
+                return cached
+        except (OSError, ValueError):
+            pass  # Caché ilegible: se vuelve a compilar
+
+    answer_key = build_answer_key(expected_file, template_file, column_mapping, header_row, sheet_name,
+                                  sources, parameters)
+    try:
+        with open(cache_file, 'w', encoding='utf-8') as f:
+            json.dump(answer_key, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"Aviso: no se pudo guardar la caché de la clave de respuestas: {e}")
+    return answer_key
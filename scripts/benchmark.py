@@ -0,0 +1,177 @@
+# scripts/benchmark.py
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from evaluate_submissions import (COLUMN_MAPPING, HEADER_ROW, READ_RANGES, RULES, SUBMISSIONS_DIR,
+                                  evaluate_submission, generate_report, get_answer_key, results,
+                                  submission_to_dataframe, timings)
+from rubric import needs_charts
+from synthetic_submissions import generate_submissions
+from xlsx_reader import read_submission
+
+
+def _parse_twice(path):
+    """Carga original: openpyxl y pandas leen el archivo por separado."""
+    wb = load_workbook(path)
+    letters = list(COLUMN_MAPPING.values())
+    df = pd.read_excel(path, sheet_name=wb.sheetnames[0], header=HEADER_ROW - 1,
+                       usecols=f"{letters[0]}:{letters[-1]}")
+    df.columns = df.columns.str.strip()
+    wb.close()
+    return df
+
+
+def _parse_once(path):
+    """Carga actual: lectura en streaming de los rangos de la rúbrica y DataFrame a partir de ella."""
+    user_data = read_submission(path, READ_RANGES, charts=needs_charts(RULES))
+    return submission_to_dataframe(user_data)
+
+
+def _time_call(func, path, repeat):
+    """Devuelve los tiempos (en segundos) de `repeat` ejecuciones de func(path)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def benchmark_parsing(paths, repeat=5):
+    """Compara el tiempo de carga por archivo entre la lectura original y la actual."""
+    print(f"{'Archivo':<40} {'Antes (ms)':>12} {'Después (ms)':>14} {'Mejora':>8}")
+    total_before = total_after = 0.0
+    for path in paths:
+        before = statistics.median(_time_call(_parse_twice, path, repeat))
+        after = statistics.median(_time_call(_parse_once, path, repeat))
+        total_before += before
+        total_after += after
+        print(f"{os.path.basename(path)[:40]:<40} {before * 1000:>12.1f} {after * 1000:>14.1f} "
+              f"{before / after:>7.2f}x")
+    if len(paths) > 1:
+        print(f"{'Total':<40} {total_before * 1000:>12.1f} {total_after * 1000:>14.1f} "
+              f"{total_before / total_after:>7.2f}x")
+
+
+def _percentile(values, percent):
+    """Percentil por interpolación lineal (sirve también con una sola medición)."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB, o None si no se puede medir."""
+    if resource is None:
+        return None
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def benchmark_suite(paths, repeat=1):
+    """
+    Mide la evaluación completa de los envíos y la generación del informe.
+
+    Informa envíos por segundo, latencias p50/p95 por envío (de principio a fin y
+    por fase, según la instrumentación del evaluador), el tiempo de generate_report
+    y el pico de memoria del proceso.
+    """
+    get_answer_key()
+    latencies = []
+    phase_times = {}
+    all_records = []
+    total_start = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            start = time.perf_counter()
+            records = evaluate_submission(path)
+            latencies.append(time.perf_counter() - start)
+            all_records.extend(records)
+            for entry in timings:
+                if entry["tipo"] == "fase":
+                    phase_times.setdefault(entry["nombre"], []).append(entry["segundos"])
+            phase_times.setdefault("reglas", []).append(
+                sum(entry["segundos"] for entry in timings if entry["tipo"] == "pregunta"))
+            del results[:]
+            del timings[:]
+    elapsed = time.perf_counter() - total_start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        generate_report(all_records, results_file=os.path.join(tmp_dir, "evaluation_results.xlsx"))
+        report_time = time.perf_counter() - start
+
+    print(f"\nEnvíos evaluados: {len(latencies)} en {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:.1f} envíos/s)")
+    print(f"{'Fase':<22} {'p50 (ms)':>10} {'p95 (ms)':>10} {'Total (ms)':>12}")
+    rows = [("evaluate_submission", latencies)] + list(phase_times.items())
+    for name, values in rows:
+        print(f"{name:<22} {_percentile(values, 50) * 1000:>10.1f} {_percentile(values, 95) * 1000:>10.1f} "
+              f"{sum(values) * 1000:>12.1f}")
+    print(f"{'generate_report':<22} {'':>10} {'':>10} {report_time * 1000:>12.1f}  "
+          f"({len(all_records)} filas)")
+    peak = peak_rss_mb()
+    print(f"Pico de memoria (RSS): {f'{peak:.1f} MB' if peak is not None else 'no disponible'}")
+
+
+def _submission_paths(paths):
+    """Devuelve las rutas indicadas o, si no hay ninguna, los envíos de SUBMISSIONS_DIR."""
+    if paths:
+        return paths
+    return [os.path.join(SUBMISSIONS_DIR, f) for f in sorted(os.listdir(SUBMISSIONS_DIR))
+            if f.endswith('.xlsx') or f.endswith('.xlsm')]
+
+
+def main():
+    """Ejecuta las mediciones de rendimiento del evaluador."""
+    parser = argparse.ArgumentParser(description="Mediciones de rendimiento del evaluador.")
+    parser.add_argument('archivos', nargs='*', help="Archivos a medir (por defecto, los de user_submissions)")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Repeticiones por archivo (se usa la mediana)")
+    parser.add_argument('--suite', action='store_true',
+                        help="Medir la evaluación completa y el informe en lugar de solo la carga")
+    parser.add_argument('--sinteticos', type=int, metavar='N',
+                        help="Generar N envíos sintéticos a partir de la plantilla y medir la suite con ellos")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de los envíos sintéticos")
+    parser.add_argument('--destino', help="Carpeta donde conservar los envíos sintéticos (por defecto, temporal)")
+    args = parser.parse_args()
+
+    if args.sinteticos:
+        out_dir = args.destino or tempfile.mkdtemp(prefix="envios_sinteticos_")
+        try:
+            start = time.perf_counter()
+            paths = generate_submissions(out_dir, args.sinteticos, args.semilla)
+            print(f"{len(paths)} envíos sintéticos generados en {time.perf_counter() - start:.1f} s")
+            benchmark_suite(paths)
+        finally:
+            if not args.destino:
+                shutil.rmtree(out_dir, ignore_errors=True)
+        return
+
+    paths = _submission_paths(args.archivos)
+    if not paths:
+        print("No hay archivos para medir.")
+        return
+    if args.suite:
+        benchmark_suite(paths, args.repeticiones)
+    else:
+        benchmark_parsing(paths, args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,40 @@
-import shutil
+import argparse
+import csv
 import os
+import re
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+FICLONE = 0x40049409  # ioctl de Linux para clonar un archivo (reflink) en Btrfs/XFS
+NAME_COLUMNS = ("nombre", "name", "estudiante", "alumno")
+
+CORE_NS = {
+    "cp": "http://schemas.openxmlformats.org/package/2006/metadata/core-properties",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "dcterms": "http://purl.org/dc/terms/",
+    "dcmitype": "http://purl.org/dc/dcmitype/",
+    "xsi": "http://www.w3.org/2001/XMLSchema-instance",
+}
+CUSTOM_NS = "http://schemas.openxmlformats.org/officeDocument/2006/custom-properties"
+VT_NS = "http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes"
+CUSTOM_FMTID = "{D5CDD505-2E9C-101B-9397-08002B2CF9AE}"
+CUSTOM_PART = "docProps/custom.xml"
+CORE_PART = "docProps/core.xml"
+CUSTOM_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/custom-properties"
+CUSTOM_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.custom-properties+xml"
+
+for _prefix, _uri in CORE_NS.items():
+    ET.register_namespace(_prefix, _uri)
+
 
 def create_user_submission_file(output_filename="user_evaluacion.xlsx", source_path="../data/base_datos_original.xlsx", output_dir="../user_submissions/"):
     """
@@ -19,10 +54,279 @@ def create_user_submission_file(output_filename="user_evaluacion.xlsx", source_p
     except Exception as e:
         print(f"Ocurrió un error al crear el archivo para el usuario: {e}")
 
+
+# --- Generación por lotes a partir de una lista de estudiantes ---
+
+def read_roster(roster_path):
+    """
+    Lee la lista de estudiantes (CSV o XLSX con encabezados) como lista de diccionarios.
+
+    El nombre se toma de la columna "nombre" (o name/estudiante/alumno) o, si no
+    existe, de la primera columna; las demás columnas se guardan como metadatos.
+    """
+    if roster_path.endswith('.xlsx') or roster_path.endswith('.xlsm'):
+        from openpyxl import load_workbook
+        wb = load_workbook(roster_path, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, [])]
+        records = [dict(zip(header, row)) for row in rows]
+        wb.close()
+    else:
+        with open(roster_path, newline='', encoding='utf-8-sig') as f:
+            sample = f.read(4096)
+            f.seek(0)
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t") if sample else csv.excel
+            reader = csv.DictReader(f, dialect=dialect)
+            header = [name.strip() for name in reader.fieldnames or []]
+            records = [{key.strip(): value for key, value in row.items() if key} for row in reader]
+
+    if not header:
+        return []
+    lowered = {name.lower(): name for name in header}
+    name_column = next((lowered[c] for c in NAME_COLUMNS if c in lowered), header[0])
+
+    students = []
+    for record in records:
+        name = record.get(name_column)
+        if name is None or not str(name).strip():
+            continue
+        metadata = {key: str(value).strip() for key, value in record.items()
+                    if key and key != name_column and value is not None and str(value).strip()}
+        students.append({"nombre": str(name).strip(), "metadatos": metadata})
+    return students
+
+
+def _safe_filename(name):
+    """Quita los caracteres no válidos en nombres de archivo (se conservan espacios y acentos)."""
+    return re.sub(r'[\\/:*?"<>|]', '_', name).strip(' .')
+
+
+def _assign_filenames(students):
+    """Nombre de archivo de cada estudiante ([nombre]_evaluacion.xlsx); los repetidos se numeran."""
+    used = {}
+    for student in students:
+        base = _safe_filename(student["nombre"]) or "usuario"
+        count = used.get(base.lower(), 0) + 1
+        used[base.lower()] = count
+        suffix = f" ({count})" if count > 1 else ""
+        student["archivo"] = f"{base}{suffix}_evaluacion.xlsx"
+    return students
+
+
+def clone_file(source_path, destination_path, mode="auto"):
+    """
+    Crea destination_path con el contenido de source_path y devuelve el método usado.
+
+    "auto" intenta un reflink (copia en escritura: no duplica bytes en Btrfs/XFS/APFS)
+    y si no es posible copia el archivo. "hardlink" solo se usa si se pide
+    explícitamente: el archivo queda compartido con la plantilla y, si el programa que
+    lo abre lo modifica en el sitio, también modificaría la plantilla y a los demás.
+    """
+    if mode == "hardlink":
+        os.link(source_path, destination_path)
+        return "hardlink"
+    if mode in ("auto", "reflink") and fcntl is not None:
+        try:
+            with open(source_path, 'rb') as src, open(destination_path, 'wb') as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except OSError:
+            if mode == "reflink":
+                os.remove(destination_path)
+                raise
+    elif mode == "reflink":
+        raise OSError("Este sistema no permite reflinks")
+    shutil.copyfile(source_path, destination_path)
+    return "copia"
+
+
+def copy_zip_without(source_path, destination_path, excluded):
+    """
+    Copia el zip source_path en destination_path sin los miembros de excluded.
+
+    Los demás miembros conservan su ZipInfo (nombre, fecha, método de compresión) y
+    su orden.
+    """
+    with zipfile.ZipFile(source_path) as src, zipfile.ZipFile(destination_path, 'w') as dst:
+        for info in src.infolist():
+            if info.filename not in excluded:
+                dst.writestr(info, src.read(info))
+
+
+def append_zip_members(path, members):
+    """Añade al final del zip path los miembros indicados (nombre -> bytes), comprimidos."""
+    with zipfile.ZipFile(path, 'a', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, data)
+
+
+def _stamp_core(core_xml, student):
+    """Pone el nombre del estudiante como título de core.xml."""
+    root = ET.fromstring(core_xml)
+    title = root.find("dc:title", CORE_NS)
+    if title is None:
+        title = ET.SubElement(root, f"{{{CORE_NS['dc']}}}title")
+    title.text = f"Evaluación de Excel - {student['nombre']}"
+    return ET.tostring(root, xml_declaration=True, encoding="UTF-8")
+
+
+def _stamp_custom(custom_xml, student):
+    """Añade (o reemplaza) las propiedades personalizadas Estudiante y las de los metadatos."""
+    values = {"Estudiante": student["nombre"], **student["metadatos"]}
+    # Se conservan las propiedades de la plantilla que no se reemplazan
+    kept = []
+    if custom_xml:
+        for prop in ET.fromstring(custom_xml):
+            if prop.get("name") not in values and len(prop):
+                kept.append((prop.get("name"), prop[0].tag.split("}")[-1], prop[0].text or ""))
+
+    xml = [f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+           f'<Properties xmlns="{CUSTOM_NS}" xmlns:vt="{VT_NS}">']
+    items = kept + [(name, "lpwstr", value) for name, value in values.items()]
+    for pid, (name, vtype, value) in enumerate(items, 2):
+        xml.append(f'<property fmtid="{CUSTOM_FMTID}" pid="{pid}" name="{escape(name, {chr(34): "&quot;"})}">'
+                   f'<vt:{vtype}>{escape(value)}</vt:{vtype}></property>')
+    xml.append('</Properties>')
+    return "".join(xml).encode("utf-8")
+
+
+class TemplateParts:
+    """
+    Miembros de la plantilla que se personalizan, leídos una sola vez para todo el lote.
+
+    También se crea (una sola vez) base_path: la plantilla sin esos miembros, en
+    base_dir para que clone_file pueda hacer un reflink hacia la carpeta de destino.
+    Cada archivo es un clon de la base al que solo se le añaden las partes
+    personalizadas, sin recomprimir el resto. close() borra la base.
+    """
+
+    def __init__(self, source_path, base_dir):
+        with zipfile.ZipFile(source_path) as zf:
+            names = set(zf.namelist())
+            self.core = zf.read(CORE_PART) if CORE_PART in names else None
+            self.custom = zf.read(CUSTOM_PART) if CUSTOM_PART in names else None
+            # Si la plantilla no tiene propiedades personalizadas hay que declararlas
+            self.rels = self.content_types = None
+            if self.custom is None:
+                self.rels = zf.read("_rels/.rels")
+                self.content_types = zf.read("[Content_Types].xml")
+        fd, self.base_path = tempfile.mkstemp(prefix=".plantilla_", suffix=".xlsx", dir=base_dir)
+        os.close(fd)
+        excluded = {CORE_PART, CUSTOM_PART}
+        if self.custom is None:
+            excluded |= {"_rels/.rels", "[Content_Types].xml"}
+        copy_zip_without(source_path, self.base_path, excluded)
+
+    def close(self):
+        if os.path.exists(self.base_path):
+            os.remove(self.base_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def create(self, student, destination_path, link_mode="auto"):
+        """Crea el archivo del estudiante: clon de la base más sus partes personalizadas."""
+        # Un hardlink compartiría la base y el append la modificaría para todos
+        clone_file(self.base_path, destination_path, "copia" if link_mode == "hardlink" else link_mode)
+        append_zip_members(destination_path, self.replacements(student))
+
+    def replacements(self, student):
+        parts = {CUSTOM_PART: _stamp_custom(self.custom, student)}
+        if self.core is not None:
+            parts[CORE_PART] = _stamp_core(self.core, student)
+        if self.custom is None:
+            parts["_rels/.rels"] = self.rels.replace(
+                b"</Relationships>",
+                f'<Relationship Id="rIdCustom" Type="{CUSTOM_REL_TYPE}" Target="{CUSTOM_PART}"/>'
+                f'</Relationships>'.encode())
+            parts["[Content_Types].xml"] = self.content_types.replace(
+                b"</Types>",
+                f'<Override PartName="/{CUSTOM_PART}" ContentType="{CUSTOM_CONTENT_TYPE}"/></Types>'.encode())
+        return parts
+
+
+def create_submission_files(roster_path, source_path="../data/base_datos_original.xlsx",
+                            output_dir="../user_submissions/", workers=8, link_mode="auto",
+                            stamp=True, overwrite=False):
+    """
+    Crea los archivos de todos los estudiantes de la lista en paralelo (hilos).
+
+    Con stamp=True cada archivo lleva el nombre del estudiante (y las demás columnas de
+    la lista) en sus propiedades del documento: se clona una base de la plantilla sin
+    esos miembros y solo se añaden los personalizados (ver TemplateParts).
+    Con stamp=False los archivos son idénticos a la plantilla y se crean con clone_file.
+    Los archivos existentes no se tocan salvo con overwrite=True (los estudiantes
+    pueden haber empezado a editarlos). Devuelve {método: cantidad}.
+    """
+    students = _assign_filenames(read_roster(roster_path))
+    if not students:
+        print(f"No se encontraron estudiantes en '{roster_path}'.")
+        return {}
+    os.makedirs(output_dir, exist_ok=True)
+    template = TemplateParts(source_path, output_dir) if stamp else None
+
+    def create(student):
+        destination_path = os.path.join(output_dir, student["archivo"])
+        if os.path.exists(destination_path):
+            if not overwrite:
+                return "existente"
+            os.remove(destination_path)
+        try:
+            if stamp:
+                template.create(student, destination_path, link_mode)
+                return "metadatos"
+            return clone_file(source_path, destination_path, link_mode)
+        except Exception as e:
+            print(f"Error al crear el archivo de '{student['nombre']}': {e}")
+            return "error"
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            outcomes = list(pool.map(create, students))
+    finally:
+        if template is not None:
+            template.close()
+
+    counts = {}
+    for outcome in outcomes:
+        counts[outcome] = counts.get(outcome, 0) + 1
+    created = len(outcomes) - counts.get("existente", 0) - counts.get("error", 0)
+    print(f"{created} archivo(s) creados en '{output_dir}' a partir de {len(students)} estudiante(s) "
+          f"({', '.join(f'{k}: {v}' for k, v in sorted(counts.items()))}).")
+    return counts
+
+
+def parse_args(argv=None):
+    """Interpreta los argumentos de línea de comandos (sin argumentos se pregunta el nombre)."""
+    parser = argparse.ArgumentParser(description="Crea los archivos de evaluación de los usuarios.")
+    parser.add_argument('--lista', help="Lista de estudiantes (CSV o XLSX) para crear todos los archivos")
+    parser.add_argument('--plantilla', default="../data/base_datos_original.xlsx", help="Archivo base")
+    parser.add_argument('--destino', default="../user_submissions/", help="Carpeta de destino")
+    parser.add_argument('--hilos', type=int, default=8, help="Hilos para crear los archivos (por defecto 8)")
+    parser.add_argument('--sin-metadatos', action='store_true',
+                        help="No personalizar las propiedades del documento (los archivos se clonan)")
+    parser.add_argument('--modo', choices=["auto", "reflink", "copia", "hardlink"], default="auto",
+                        help="Cómo clonar los archivos: auto (reflink o copia), reflink, copia "
+                             "o hardlink (solo con --sin-metadatos; comparte el archivo con la plantilla, "
+                             "usar solo si se sabe que no se editará en el sitio)")
+    parser.add_argument('--sobrescribir', action='store_true', help="Reemplazar los archivos existentes")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    # Puedes cambiar el nombre del archivo de salida para cada usuario
-    user_name = input("Introduce el nombre del usuario para el archivo (ej: Juan_Perez): ")
-    if user_name:
-        create_user_submission_file(f"{user_name}_evaluacion.xlsx")
+    args = parse_args()
+    if args.lista:
+        create_submission_files(args.lista, args.plantilla, args.destino, args.hilos, args.modo,
+                                stamp=not args.sin_metadatos, overwrite=args.sobrescribir)
     else:
-        create_user_submission_file() # Usa el nombre por defecto
\ No newline at end of file
+        # Puedes cambiar el nombre del archivo de salida para cada usuario
+        user_name = input("Introduce el nombre del usuario para el archivo (ej: Juan_Perez): ")
+        if user_name:
+            create_user_submission_file(f"{user_name}_evaluacion.xlsx", args.plantilla, args.destino)
+        else:
+            create_user_submission_file(source_path=args.plantilla, output_dir=args.destino) # Usa el nombre por defecto
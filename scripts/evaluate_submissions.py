@@ -1,15 +1,38 @@
 # scripts/evaluate_submissions.py
 
+import argparse
+import functools
+import hashlib
+import io
 import os
+import pstats
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook, Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Alignment, Font, PatternFill
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, range_boundaries
 
-# --- Configuración de rutas ---
-import os
+from answer_key import file_sha256, load_answer_key
+from exam_config import DEFAULT_EXAM as DEFAULT_EXAM_ID, EXAMS_DIR, ExamConfigError, load_exam, resolve_exams
+from isolated_runner import (DEFAULT_MAX_MEMORY_MB, DEFAULT_RECYCLE_AFTER, DEFAULT_TIMEOUT, IsolatedPool,
+                             TaskFailure)
+from prefetch import DEFAULT_DEPTH, DEFAULT_IO_THREADS, Prefetcher, read_file
+from profiling import (PERFORMANCE_SHEET, TIMINGS_COLUMNS, measure, profile_path, start_profiling,
+                       summarize_timings, timings_path, write_timings)
+from report_writer import ReportWriter
+from resource_guard import DEFAULT_LIMITS, SubmissionRejected, inspect_submission
+from result_cache import ResultCache
+from results_export import EXPORT_FORMATS, export_results
+from rubric import (RULES, RubricContext, RuleError, format_rows, needs_charts, numeric_values, required_ranges,
+                    rule, run_rules)
+from sharding import PartialResultsWriter, parse_shard, partial_path, select_shard
+from similarity import (DEFAULT_THRESHOLD, SIMILARITY_COLUMNS, SIMILARITY_FORMATS, SIMILARITY_SHEET, SimilarityIndex,
+                        submission_features)
+from submission_facts import FACTS_VERSION, SubmissionFacts, dump_facts, load_facts
+from xlsx_reader import read_submission
+from zip_submissions import ZipSubmissions
 
 # --- Configuración de rutas ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,557 +40,636 @@ ROOT_DIR = os.path.dirname(SCRIPT_DIR)
 DATA_DIR = os.path.join(ROOT_DIR, 'data')
 SUBMISSIONS_DIR = os.path.join(ROOT_DIR, 'user_submissions')
 
+# Definiciones de examen (ver exam_config); el examen por defecto es data/examenes/base.json
+DEFAULT_EXAM = load_exam(os.path.join(EXAMS_DIR, f"{DEFAULT_EXAM_ID}.json"))
+
 # Archivos de referencia
-TEMPLATE_FILE = os.path.join(DATA_DIR, 'base_datos_original.xlsx')
-EXPECTED_FILE = os.path.join(DATA_DIR, 'respuestas_esperadas.xlsx')
+TEMPLATE_FILE = DEFAULT_EXAM.template_file
+EXPECTED_FILE = DEFAULT_EXAM.expected_file
 RESULTS_FILE = 'evaluation_results.xlsx'
+RESULTS_CACHE = os.path.splitext(RESULTS_FILE)[0] + '.cache.sqlite'
+ANSWER_KEY_CACHE = os.path.join(DATA_DIR, '.answer_key_cache.json')
 
 # --- Variables globales para el informe ---
 results = []
+timings = []  # Mediciones de tiempo y memoria por fase y pregunta (ver profiling.measure)
+_answer_keys = {}  # Claves de respuestas compiladas por id de examen, se cargan una vez por ejecución
+_profiler = None  # Perfilador cProfile de un proceso de trabajo (solo con --profile)
+_limits = DEFAULT_LIMITS  # Límites de tamaño de los envíos (ver resource_guard)
+# Tiempo máximo, memoria y reciclaje de los procesos aislados (None: evaluar en este proceso)
+_isolation = {"timeout": DEFAULT_TIMEOUT, "max_memory_mb": DEFAULT_MAX_MEMORY_MB,
+              "recycle_after": DEFAULT_RECYCLE_AFTER}
+# Exámenes contra los que se evalúa cada envío; con varios, solo los que le corresponden
+# según sus encabezados (ver --examen)
+_exams = [DEFAULT_EXAM]
+_read_ranges_cache = {}  # Rangos a leer por combinación de exámenes (ver _read_ranges)
 
 # --- Configuración de las preguntas ---
-# Las preguntas se evalúan directamente en el código, no necesitamos una lista separada
-
-# --- Configuración de columnas ---
-COLUMN_MAPPING = {
-    "ID": "C",
-    "Nombre del Cliente": "D",
-    "Sentimiento": "E",  # Originalmente "Seguimiento", ahora "Sentimiento"
-    "Puntuación": "F",
-    "Fecha": "G",
-    "Motivo": "H",
-    "Ciudad": "I",
-    "Canal": "J",
-    "Duración Llamada (Minutos)": "K"
-}
-
-# --- Configuración de filas ---
-HEADER_ROW = 5  # La fila donde están los encabezados
-DATA_START_ROW = 6  # La fila donde empiezan los datos
-
-# --- Configuración de hojas ---
-SHEET_NAME = 'Datos'  # Nombre de la hoja con los datos
+# Las preguntas son reglas de la rúbrica (ver la sección "Preguntas de evaluación")
+# Incrementar al modificar cualquier pregunta, para invalidar los resultados en caché
+RUBRIC_VERSION = 7
+
+# --- Configuración del examen por defecto ---
+# Las posiciones vienen de la definición del examen; estas constantes se conservan
+# para los scripts que generan o miden envíos del examen por defecto
+COLUMN_MAPPING = DEFAULT_EXAM.columns
+HEADER_ROW = DEFAULT_EXAM.header_row  # La fila donde están los encabezados
+DATA_START_ROW = DEFAULT_EXAM.data_start_row  # La fila donde empiezan los datos
+SHEET_NAME = DEFAULT_EXAM.sheet_name  # Nombre de la hoja con los datos
 ANSWERS_SHEET = 'Respuestas'  # Nombre de la hoja donde el usuario escribe sus respuestas
+TABLE_END_ROW = DEFAULT_EXAM.table_end_row  # Última fila de la tabla (incluye la fila del promedio)
+TABLE_RANGE = DEFAULT_EXAM.table_range
 
+# Columnas y respuestas que consultan las preguntas: toda definición de examen debe incluirlas
+REQUIRED_COLUMNS = ("ID", "Nombre del Cliente", "Sentimiento", "Puntuación", "Fecha", "Canal",
+                    "Duración Llamada (Minutos)")
+REQUIRED_ANSWERS = {"total_ids": 1, "total_llamadas": 5, "llamadas_sentimiento": 7, "duracion_promedio": 8,
+                    "puntaje_maximo": 10, "llamadas_puntaje_maximo": 11, "nombre_cliente": 12}  # -> pregunta
 
-def add_result(question_num, topic, question_text, status, observations=""):
-    """Añade un resultado a la lista global."""
-    results.append({
+
+def _result_row(question_num, topic, question_text, status, observations=""):
+    return {
         "No.": question_num,
         "Tema": topic,
         "Pregunta": question_text,
         "Estado": status,
         "Observaciones": observations
-    })
+    }
 
 
-def evaluate_submission(submission_path):
-    """Evalúa un archivo de envío de usuario."""
-    user_filename = os.path.basename(submission_path)
-    add_result("", "", f"--- Evaluando: {user_filename} ---", "")
+def add_result(question_num, topic, question_text, status, observations=""):
+    """Añade un resultado a la lista global."""
+    results.append(_result_row(question_num, topic, question_text, status, observations))
+
+
+class Evaluation:
+    """
+    Filas, mediciones y hechos leídos de la evaluación de un envío.
+
+    Cada evaluación tiene la suya, de modo que se pueden evaluar varios envíos a la
+    vez desde distintos hilos (ver evaluation_api) sin compartir las listas globales.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.timings = []
+        self.facts = None  # SubmissionFacts de lo leído, o None si no se llegó a leer
+
+    def add_result(self, question_num, topic, question_text, status, observations=""):
+        self.records.append(_result_row(question_num, topic, question_text, status, observations))
+
+
+def get_answer_key(exam=None):
+    """Devuelve la clave de respuestas compilada de un examen (por defecto, base), cargándola solo la primera vez."""
+    exam = exam or DEFAULT_EXAM
+    if exam.id not in _answer_keys:
+        # La caché de las demás variantes se guarda junto a su definición
+        exam_dir = os.path.dirname(exam.source) if exam.source else EXAMS_DIR
+        cache_file = (ANSWER_KEY_CACHE if exam.id == DEFAULT_EXAM.id
+                      else os.path.join(exam_dir, f'.answer_key_cache.{exam.id}.json'))
+        answer_key = load_answer_key(exam.expected_file, exam.template_file, exam.columns, exam.header_row,
+                                     exam.sheet_name, cache_file, exam.parameters)
+        if exam.answers:  # Respuestas fijadas en la definición del examen
+            answer_key = {**answer_key, "answers": {**answer_key["answers"], **exam.answers}}
+        _answer_keys[exam.id] = answer_key
+    return _answer_keys[exam.id]
+
+
+def check_exam(exam):
+    """Comprueba que la definición de un examen tenga lo que consultan las preguntas; lanza ExamConfigError."""
+    missing = [name for name in REQUIRED_COLUMNS if name not in exam.columns]
+    if missing:
+        raise ExamConfigError(f"El examen '{exam.id}' no define las columnas {', '.join(missing)}")
+    missing = [key for key, number in REQUIRED_ANSWERS.items()
+               if exam.includes(number) and key not in exam.answer_cells]
+    if missing:
+        raise ExamConfigError(f"El examen '{exam.id}' no define las celdas de respuesta {', '.join(missing)}")
+
+
+def submission_to_dataframe(user_data, exam=None):
+    """
+    Construye el DataFrame de la tabla a partir de las celdas ya leídas del envío.
+
+    Equivale a pd.read_excel(..., header=HEADER_ROW - 1, usecols=<rango de COLUMN_MAPPING>)
+    limitado a la tabla del examen, pero sin volver a descomprimir ni analizar el archivo.
+    Como se leen fórmulas (no valores calculados), las celdas con fórmula contienen su texto.
+    """
+    rows = user_data.values((exam or DEFAULT_EXAM).table_range)
+
+    # Eliminar las filas vacías del final, igual que hace pandas
+    data = rows[1:]
+    while data and all(value is None for value in data[-1]):
+        data.pop()
+
+    columns = []
+    for idx, value in enumerate(rows[0]):
+        columns.append(str(value).strip() if value is not None else f"Unnamed: {idx}")
+    return pd.DataFrame(data, columns=columns)
+
+
+# --- Preguntas de evaluación (reglas de la rúbrica) ---
+# Cada regla declara las celdas, rangos y gráficos que consulta; el motor los lee
+# una sola vez por envío y ejecuta todas las reglas sobre esos datos.
+
+DURATION = "Duración Llamada (Minutos)"
+
+
+def _answer_cells(*keys):
+    """Celdas de respuesta de un examen, para declarar lo que lee una regla."""
+    return lambda exam: [exam.answer_cells[key] for key in keys]
+
+
+def _column_range(column_name):
+    """Celdas de datos de una columna en un examen, para declarar lo que lee una regla."""
+    return lambda exam: [exam.column_range(column_name)]
+
+
+def _header_cell(exam, column_name):
+    return f"{exam.letter(column_name)}{exam.header_row}"
+
+
+def _average_cell(exam):
+    """Celda de la fórmula del promedio: columna de duración en la fila final (K36)."""
+    return f"{exam.letter(DURATION)}{exam.table_end_row}"
 
+
+def centered_ranges(exam):
+    """Rango que debe estar centrado: C5:K36 excluyendo C36:I36 (en el examen base)."""
+    return [exam.data_range,
+            f"{exam.letter('Canal')}{exam.table_end_row}:{exam.letter(DURATION)}{exam.table_end_row}"]
+
+
+# Predicados de estilo: se evalúan una vez por id de estilo y libro (ver StyleTable.matches)
+def is_centered(style):
+    return style.horizontal == 'center' and style.vertical == 'center'
+
+
+def is_date_format(style):
+    return style.number_format == 'dd/mm/yyyy'
+
+
+def is_red_font(style):
+    return style.font_color == 'FFFF0000'
+
+
+def _numeric_answer(ctx, answer, cast):
+    """
+    Lee una respuesta numérica de su celda en el examen (si es una fórmula, su valor
+    calculado); lanza RuleError si no existe o no es un número.
+    """
+    user_answer = ctx.computed(ctx.exam.answer_cells[answer])
+    if user_answer is None:
+        raise RuleError("Respuesta no encontrada")
     try:
-        # Verificar que el archivo existe
-        if not os.path.exists(submission_path):
-            add_result("", "", f"Error al procesar {user_filename}", "Error", "Archivo no encontrado")
-            return
+        return cast(user_answer)
+    except ValueError:
+        raise RuleError(f"Respuesta no es un número: {user_answer}")
 
-        # Cargar el archivo del usuario
-        wb_user = load_workbook(submission_path)
-        ws_user = wb_user.active  # Usar la hoja activa
 
-        # Cargar el archivo de respuestas esperadas
-        wb_expected = load_workbook(EXPECTED_FILE)
-        ws_expected = wb_expected.active  # Usar la hoja activa
+@rule(1, "Cálculo", "¿Cuantos ID tiene la base de datos?", cells=_answer_cells("total_ids"))
+def question_1(ctx):
+    user_answer = _numeric_answer(ctx, "total_ids", int)
+    expected = ctx.expected["total_ids"]
+    if user_answer == expected:
+        return "Correcto", f"Obtenido: {user_answer}"
+    return "Incorrecto", f"Esperado: {expected}, Obtenido: {user_answer}"
 
-        # Verificar que las columnas están en las posiciones correctas
-        for col_name, col_letter in COLUMN_MAPPING.items():
-            cell_user = ws_user[f'{col_letter}{HEADER_ROW}'].value
-            cell_expected = ws_expected[f'{col_letter}{HEADER_ROW}'].value
-            
-            if str(cell_user).strip() != col_name:
-                add_result("", "", f"Error al procesar {user_filename}", "Error", 
-                          f"Columna '{col_name}' no encontrada en la posición correcta")
-                return
 
-        # Verificar y limpiar los nombres de las columnas
-        # Obtener los nombres de las columnas desde la hoja
-        column_names = []
-        for col_letter in COLUMN_MAPPING.values():
-            cell_value = ws_user[f'{col_letter}{HEADER_ROW}'].value
-            if cell_value:
-                # Limpiar espacios y caracteres especiales
-                clean_value = str(cell_value).strip()
-                column_names.append(clean_value)
-            else:
-                column_names.append(None)
-
-        # Verificar que todas las columnas requeridas existen
-        missing_columns = []
-        for col_name, col_letter in COLUMN_MAPPING.items():
-            cell_value = column_names[list(COLUMN_MAPPING.values()).index(col_letter)]
-            if cell_value != col_name:
-                missing_columns.append(col_name)
-                
-        if missing_columns:
-            # Mostrar los nombres reales de las columnas para depuración
-            actual_cols = {k: v for k, v in zip(COLUMN_MAPPING.keys(), column_names)}
-            add_result("", "", f"Error al procesar {user_filename}", "Error", 
-                      f"Columnas faltantes o con nombres incorrectos: {', '.join(missing_columns)}.\n"
-                      f"Columnas encontradas: {actual_cols}")
-            return
+@rule(2, "Edición y formato", "Cambia el nombre de la columna 'Seguimiento' por 'Sentimiento'",
+      cells=lambda exam: [_header_cell(exam, "Sentimiento")])
+def question_2(ctx):
+    expected_col_name = ctx.answer_key["header_names"][ctx.exam.letter("Sentimiento")]
+    actual_col_name = ctx.value(_header_cell(ctx.exam, "Sentimiento"))
+    if actual_col_name == expected_col_name:
+        return "Correcto", ""
+    return "Incorrecto", f"Nombre de columna en usuario: '{actual_col_name}', Esperado: '{expected_col_name}'"
 
-        # Cargar el archivo esperado como referencia
-        wb_expected = load_workbook(EXPECTED_FILE)
-        
-        # Verificar que la hoja 'Datos' existe en el archivo de respuestas esperadas
-        sheet_names_expected = [name.strip() for name in wb_expected.sheetnames]
-        if SHEET_NAME not in sheet_names_expected:
-            add_result("", "", f"Error al procesar {user_filename}", "Error", 
-                      f"Hoja '{SHEET_NAME}' no encontrada en el archivo de respuestas esperadas. Hojas disponibles: {', '.join(wb_expected.sheetnames)}")
-            return
-            
-        # Encontrar la hoja correcta en el archivo de respuestas esperadas
-        ws_expected = next(ws for ws in wb_expected.worksheets if ws.title.strip() == SHEET_NAME)
 
-        # Cargar los datos usando pandas
-        try:
-            # Obtener el nombre exacto de la hoja para pandas
-            sheet_name_user = wb_user.sheetnames[0]  # Usar la primera hoja encontrada
-            sheet_name_expected = wb_expected.sheetnames[0]  # Usar la primera hoja encontrada
-
-            # Generar el rango de columnas
-            first_col_letter = COLUMN_MAPPING["ID"]
-            last_col_letter = COLUMN_MAPPING["Duración Llamada (Minutos)"]
-            column_range = f"{first_col_letter}:{last_col_letter}"
-
-            # Cargar DataFrames usando el nombre exacto de la hoja
-            df_user = pd.read_excel(submission_path, sheet_name=sheet_name_user, 
-                                   header=HEADER_ROW - 1, usecols=column_range)
-            
-            # Limpiar los nombres de las columnas
-            df_user.columns = df_user.columns.str.strip()
-            
-            df_expected = pd.read_excel(EXPECTED_FILE, sheet_name=sheet_name_expected, 
-                                      header=HEADER_ROW - 1, usecols=column_range)
-        except Exception as e:
-            add_result("", "", f"Error al procesar {user_filename}", "Error", 
-                      f"Error al cargar los datos: {str(e)}")
-            return
+@rule(3, "Edición y formato", "Centrar el contenido de todas las celdas", ranges=centered_ranges, styles=True,
+      error_prefix="Error al verificar el centrado")
+def question_3(ctx):
+    for cell_range in centered_ranges(ctx.exam):
+        # Verificar el centrado horizontal y vertical comparando ids de estilo
+        if not ctx.style_mask(ctx.style_ids(cell_range), is_centered).all():
+            return "Incorrecto", "Alguna celda de la tabla no está centrada correctamente."
+    return "Correcto", "Todas las celdas de la tabla están centradas."
 
-        # Verificar que los DataFrames tienen las columnas esperadas
-        expected_columns = list(COLUMN_MAPPING.keys())
-        missing_df_columns = [col for col in expected_columns if col not in df_user.columns]
-        
-        if missing_df_columns:
-            missing_cols_str = ", ".join(missing_df_columns)
-            add_result("", "", f"Error al procesar {user_filename}", "Error", 
-                      f"Columnas faltantes en DataFrame: {missing_cols_str}")
-            return
 
-        # --- PREGUNTAS DE EVALUACIÓN --
-        #PREGUNTA #1
-        try:
-            # Buscar la respuesta en M6
-            answer_cell = "M6"  # Celda específica para la pregunta 1
-            user_answer = ws_user[answer_cell].value
-            
-            if user_answer is None:
-                add_result(1, "Edición y formato", "Cuantos ID tiene la base de datos", "Error", "Respuesta no encontrada")
-            else:
-                # Convertir a número si es necesario
-                try:
-                    user_answer = int(user_answer)
-                    expected = 30
-                    
-                    if user_answer == expected:
-                        add_result(1, "Cálculo", "¿Cuantos ID tiene la base de datos?", "Correcto",
-                                   f"Obtenido: {user_answer}")
-                    else:
-                        add_result(1, "Cálculo", "¿Cuantos ID tiene la base de datos?", "Incorrecto",
-                                  f"Esperado: 30, Obtenido: {user_answer}")
-                except ValueError:
-                    add_result(1, "Cálculo", "¿Cuantos ID tiene la base de datos?", "Error", 
-                              f"Respuesta no es un número: {user_answer}")
-        except Exception as e:
-            add_result(1, "Cálculo", "¿Cuantos ID tiene la base de datos?", "Error",
-                      f"Error al evaluar respuesta: {str(e)}")
-
-        # Pregunta 2: Cambia el nombre de la columna "Seguimiento" por "Sentimiento"
-        
-        expected_col_name = "Sentimiento"
-        actual_col_name = ws_user[f'{COLUMN_MAPPING["Sentimiento"]}{HEADER_ROW}'].value
-        if actual_col_name == expected_col_name:
-            add_result(2, "Edición y formato", "Cambia el nombre de la columna 'Seguimiento' por 'Sentimiento'",
-                       "Correcto")
-        else:
-            add_result(2, "Edición y formato", "Cambia el nombre de la columna 'Seguimiento' por 'Sentimiento'",
-                       "Incorrecto",
-                       f"Nombre de columna en usuario: '{actual_col_name}', Esperado: '{expected_col_name}'")
+@rule(4, "Edición y formato", "Ajusta el ancho de las columnas")
+def question_4(ctx):
+    # Comparamos el ancho de las columnas relevantes (C a K)
+    width_adjusted = True
+    for col_letter in ctx.exam.columns.values():
+        user_col_width = ctx.data.column_width(col_letter)
+        expected_col_width = ctx.answer_key["column_widths"][col_letter]
+
+        # Si el usuario no ha tocado el ancho no hay ancho propio (por defecto 8.43).
+        # Si es menor que un mínimo razonable, es incorrecto.
+        if user_col_width is None or user_col_width < 8:  # Un ancho mínimo para que sea legible
+            width_adjusted = False
+            break
+        # Además, comparamos con el ancho del archivo esperado, que se considera 'óptimo'
+        if expected_col_width is not None and user_col_width < expected_col_width * 0.9:  # 10% de tolerancia
+            width_adjusted = False
+            break
+
+    if width_adjusted:
+        return "Correcto", "Comparado con anchos de columnas esperados (con tolerancia) en el rango de la tabla."
+    return "Incorrecto", "El ancho de algunas columnas no parece ajustado correctamente en el rango de la tabla."
+
 
-        # Pregunta 3: Centra el contenido de todas las celdas verticalmente
-        # Verificar el rango C5:K36 (excluyendo C36:I36)
+@rule(5, "Fórmulas", "Calcula el número total de llamadas registradas", cells=_answer_cells("total_llamadas"))
+def question_5(ctx):
+    user_answer = _numeric_answer(ctx, "total_llamadas", float)
+    expected = float(ctx.expected["total_llamadas"])  # Convertir a float para comparación consistente
+    if user_answer == expected:
+        return "Correcto", ""
+    return "Incorrecto", f"Esperado: {ctx.expected['total_llamadas']}, Obtenido: {user_answer}"
+
+
+@rule(6, "Fórmulas", "Utiliza la función 'Dar formato como tabla'",
+      error_prefix="Error al verificar el formato de tabla")
+def question_6(ctx):
+    table_range_str = ctx.exam.data_range  # Rango específico (C5:K35)
+    table_found = any(table_ref == table_range_str for table_ref in ctx.data.tables.values())
+
+    # Si no hay tabla, verificar si hay filtros aplicados (para LibreOffice Calc)
+    filter_ref = ctx.data.auto_filter_ref
+    filter_applied = bool(filter_ref) and any(filter_ref.startswith(col_letter)
+                                              for col_letter in ctx.exam.columns.values())
+
+    if table_found or filter_applied:
+        return "Correcto", f"Formato de tabla o filtros aplicados correctamente en el rango {table_range_str}"
+    return "Incorrecto", f"No se encontró formato de tabla ni filtros aplicados en el rango {table_range_str}"
+
+
+@rule(7, "Fórmulas", "Cuántas llamadas tuvieron un Sentimiento '{sentimiento_contado}'",
+      cells=_answer_cells("llamadas_sentimiento"))
+def question_7(ctx):
+    user_answer = _numeric_answer(ctx, "llamadas_sentimiento", int)
+    expected = ctx.expected["llamadas_sentimiento"]
+    if user_answer == expected:
+        return "Correcto", f"Esperado: {expected}, Obtenido: {user_answer}"
+    return "Incorrecto", f"Esperado: {expected}, Obtenido: {user_answer}"
+
+
+@rule(8, "Fórmulas", "Calcula la duración promedio de las llamadas",
+      cells=lambda exam: [_average_cell(exam), exam.answer_cells["duracion_promedio"]],
+      ranges=_column_range(DURATION))
+def question_8(ctx):
+    # Verificar la fórmula en K36: se acepta PROMEDIO/AVERAGE(K6:K35) o cualquier fórmula que,
+    # referenciando celdas, dé el promedio de la columna de duración
+    average_cell = _average_cell(ctx.exam)
+    duration_range = ctx.exam.column_range(DURATION)
+    formula = ctx.value(average_cell)
+    formula_correct = bool(formula) and str(formula).upper() in (f"=PROMEDIO({duration_range})",
+                                                                 f"=AVERAGE({duration_range})")
+    if not formula_correct and ctx.cell(average_cell).data_type == 'f' and ctx.formulas.references(formula):
+        result = ctx.computed(average_cell)
+        average = ctx.evaluate(f"=AVERAGE({duration_range})")
+        formula_correct = (isinstance(result, (int, float)) and not isinstance(result, bool)
+                           and isinstance(average, (int, float)) and bool(np.isclose(result, average)))
+
+    user_answer = _numeric_answer(ctx, "duracion_promedio", int)
+    expected_answer = ctx.expected["duracion_promedio"]  # Valor redondeado al entero más cercano
+    if formula_correct and user_answer == expected_answer:
+        return "Correcto", "Fórmula y respuesta correctas"
+    if not formula_correct:
+        return "Incorrecto", f"Fórmula incorrecta: {formula}"
+    return "Incorrecto", f"Respuesta incorrecta: {user_answer}, esperado: {expected_answer}"
+
+
+@rule(9, "Fórmulas", "Ajusta el formato fecha a 'dd/mm/yyyy'", ranges=_column_range("Fecha"), styles=True,
+      error_prefix="Error al verificar el formato de fecha")
+def question_9(ctx):
+    date_range = ctx.exam.column_range("Fecha")
+    column = ctx.column_arrays(date_range)
+    date_format = ctx.style_mask(column.style_ids, is_date_format)
+    wrong = (column.data_types != 'd') | ~date_format
+    if wrong.any():
+        return "Incorrecto", ("El formato de fecha no es 'dd/mm/yyyy' o el tipo de dato no es fecha "
+                              f"en alguna celda del rango {date_range} (filas: {format_rows(column.rows[wrong])})")
+    return "Correcto", f"Formato de fecha correcto en todas las celdas del rango {date_range}"
+
+
+@rule(10, "Fórmulas", "Ordena la tabla por 'Puntuación' de mayor a menor y puntaje máximo",
+      cells=_answer_cells("puntaje_maximo"), ranges=_column_range("Puntuación"))
+def question_10(ctx):
+    # Verificar que los valores estén ordenados de mayor a menor: cada par de celdas
+    # consecutivas con valor debe ir en orden no creciente (las vacías no se comparan)
+    column = ctx.column_arrays(ctx.exam.column_range("Puntuación"))
+    scores, non_numeric = numeric_values(column.values)
+    if non_numeric.any():
+        raise RuleError(f"Valores no numéricos en la columna Puntuación (filas: {format_rows(column.rows[non_numeric])})")
+    out_of_order = scores[:-1] < scores[1:]  # NaN (celda vacía) nunca cuenta como desorden
+    order_correct = not out_of_order.any()
+
+    user_answer = _numeric_answer(ctx, "puntaje_maximo", int)
+    expected_answer = ctx.expected["puntaje_maximo"]  # Valor máximo esperado
+    if order_correct and user_answer == expected_answer:
+        return "Correcto", "Ordenación y respuesta correctas"
+    if not order_correct:
+        return "Incorrecto", ("Los valores no están ordenados de mayor a menor "
+                              f"(filas fuera de orden: {format_rows(column.rows[1:][out_of_order])})")
+    return "Incorrecto", f"Respuesta incorrecta: {user_answer}, esperado: {expected_answer}"
+
+
+@rule(11, "Fórmulas", "Cuantas llamadas hay con ese puntaje Máximo", cells=_answer_cells("llamadas_puntaje_maximo"))
+def question_11(ctx):
+    user_answer = _numeric_answer(ctx, "llamadas_puntaje_maximo", int)
+    expected_answer = ctx.expected["llamadas_puntaje_maximo"]
+    if user_answer == expected_answer:
+        return "Correcto", ""
+    return "Incorrecto", f"Respuesta incorrecta: {user_answer}, esperado: {expected_answer}"
+
+
+@rule(12, "Fórmulas",
+      "Si el 'ID' de un cliente es {id_buscado}. Dime cual es el nombre y apellido al que corresponde",
+      cells=_answer_cells("nombre_cliente"))
+def question_12(ctx):
+    user_answer = ctx.computed(ctx.exam.answer_cells["nombre_cliente"])
+    if user_answer is None:
+        raise RuleError("Respuesta no encontrada")
+    # Comparación insensible a mayúsculas/minúsculas
+    expected_name = ctx.expected["nombre_cliente"]
+    if str(user_answer).lower() == str(expected_name).lower():
+        return "Correcto", ""
+    return "Incorrecto", f"Respuesta incorrecta: {user_answer}, esperado: '{expected_name}'"
+
+
+@rule(13, "Fórmulas", "Resalta en Rojo las celdas de la columna 'Puntuación' que sean inferiores a 5 (<5)",
+      ranges=_column_range("Puntuación"), styles=True, error_prefix="Error al evaluar formato condicional")
+def question_13(ctx):
+    column = ctx.column_arrays(ctx.exam.column_range("Puntuación"))
+    scores, non_numeric = numeric_values(column.values)
+    if non_numeric.any():
+        raise RuleError(f"Valores no numéricos en la columna Puntuación (filas: {format_rows(column.rows[non_numeric])})")
+    low = scores < 5  # NaN (celda vacía) no cuenta
+    red = ctx.style_mask(column.style_ids, is_red_font)
+    not_red = low & ~red
+
+    if low.any() and not not_red.any():
+        return "Correcto", "Formato condicional correcto en todas las celdas menores a 5"
+    message = "No todas las celdas menores a 5 están en rojo o hay celdas con formato incorrecto"
+    if not_red.any():
+        message += f" (filas sin rojo: {format_rows(column.rows[not_red])})"
+    return "Incorrecto", message
+
+
+BAR_CHART_TYPES = ('bar', 'col')  # Barras horizontales o verticales (barDir)
+RELATION_CHART_TYPES = ('scatter', 'bar', 'col', 'line')
+CHART_TYPE_NAMES = {'bar': "barras", 'col': "columnas", 'scatter': "dispersión", 'line': "líneas",
+                    'pie': "circular", 'area': "área"}
+
+
+def _series_column(ref, sheet_name, exam):
+    """
+    Letra de la columna de la tabla que referencia una serie ("'Datos'!$D$6:$D$35"), o None
+    si la referencia no existe, abarca varias columnas, apunta a otra hoja o sale de la tabla.
+    """
+    if not ref:
+        return None
+    columns = set()
+    for area in ref.strip("()").split(","):
+        sheet, _, address = area.rpartition("!")
+        if sheet and sheet.strip("'").replace("''", "'") != sheet_name:
+            return None
         try:
-            # Definir el rango específico
-            start_row = 5  # C5
-            end_row = 36   # K36
-            
-            # Verificar cada celda en el rango, excluyendo C36:I36
-            all_cells_centered = True
-            for row in range(start_row, end_row + 1):
-                for col_letter in COLUMN_MAPPING.values():
-                    # Saltar el rango C36:I36
-                    if row == 36 and col_letter in [chr(i) for i in range(ord('C'), ord('I') + 1)]:
-                        continue
-                        
-                    cell = ws_user[f"{col_letter}{row}"]
-                    # Verificar el centrado horizontal y vertical
-                    if cell.alignment.horizontal != 'center' or cell.alignment.vertical != 'center':
-                        all_cells_centered = False
-                        break
-                if not all_cells_centered:
-                    break
-
-            if all_cells_centered:
-                add_result(3, "Edición y formato", "Centrar el contenido de todas las celdas", "Correcto",
-                           "Todas las celdas de la tabla están centradas.")
-            else:
-                add_result(3, "Edición y formato", "Centrar el contenido de todas las celdas", "Incorrecto",
-                           "Alguna celda de la tabla no está centrada correctamente.")
-        except Exception as e:
-            add_result(3, "Edición y formato", "Centrar el contenido de todas las celdas", "Error",
-                       f"Error al verificar el centrado: {str(e)}")
-
-        # Pregunta 4: Ajusta el ancho de las columnas
-        # Comparamos el ancho de las columnas relevantes (C a K)
-        width_adjusted = True
-        for col_letter in COLUMN_MAPPING.values():
-            user_col_width = ws_user.column_dimensions[col_letter].width
-            expected_col_width = ws_expected.column_dimensions[col_letter].width
-
-            # Si el usuario no ha tocado el ancho, openpyxl puede devolver None
-            # y el ancho por defecto es 8.43. Si es menor que un mínimo razonable, es incorrecto.
-            if user_col_width is None or user_col_width < 8:  # Un ancho mínimo para que sea legible
-                width_adjusted = False
-                break
-            # Además, podemos comparar con el ancho del archivo esperado, si lo definimos como 'óptimo'
-            if expected_col_width is not None and user_col_width < expected_col_width * 0.9:  # 10% de tolerancia
-                width_adjusted = False
-                break
-
-        if width_adjusted:
-            add_result(4, "Edición y formato", "Ajusta el ancho de las columnas", "Correcto",
-                       "Comparado con anchos de columnas esperados (con tolerancia) en el rango de la tabla.")
+            min_col, min_row, max_col, max_row = range_boundaries(address.replace("$", ""))
+        except ValueError:
+            return None
+        if min_row is None or min_row < exam.header_row or max_row >= exam.table_end_row:
+            return None
+        columns.update(range(min_col, max_col + 1))
+    return get_column_letter(columns.pop()) if len(columns) == 1 else None
+
+
+def _plots(ctx, chart, category_col, value_col):
+    """Indica si alguna serie del gráfico usa category_col como categorías (o X) y value_col como valores (o Y)."""
+    sheet_name = ctx.data.active_sheet
+    return any(_series_column(series.categories, sheet_name, ctx.exam) == category_col
+               and _series_column(series.values, sheet_name, ctx.exam) == value_col for series in chart.series)
+
+
+def _describe_charts(charts):
+    """Resumen de los gráficos para las observaciones: tipo, título y referencias de cada serie."""
+    parts = []
+    for chart in charts:
+        series = "; ".join(f"{s.categories or 'sin categorías'} vs {s.values or 'sin valores'}"
+                           for s in chart.series) or "sin series"
+        title = f" '{chart.title}'" if chart.title else ""
+        parts.append(f"{CHART_TYPE_NAMES.get(chart.type, chart.type)}{title} ({series})")
+    return ", ".join(parts)
+
+
+@rule(14, "Gráficos", "Crea un gráfico de barras (Nombre del cliente vs Puntuación)", charts=True)
+def question_14(ctx):
+    names, scores = ctx.exam.letter("Nombre del Cliente"), ctx.exam.letter("Puntuación")
+    bar_charts = [chart_obj for chart_obj in ctx.charts if chart_obj.type in BAR_CHART_TYPES]
+    if not bar_charts:
+        return "Incorrecto", "No se encontró un gráfico de barras adecuado."
+    for chart_obj in bar_charts:
+        if _plots(ctx, chart_obj, names, scores):
+            title = f" '{chart_obj.title}'" if chart_obj.title else ""
+            return "Correcto", (f"Gráfico de barras{title} con Nombre del Cliente ({names}) como categorías "
+                                f"y Puntuación ({scores}) como valores.")
+    return "Incorrecto", ("Ningún gráfico de barras representa Nombre del Cliente vs Puntuación. "
+                          f"Encontrado: {_describe_charts(bar_charts)}")
+
+
+@rule(15, "Gráficos", "Crea un gráfico (Duración de la Llamada vs Puntuación)", charts=True)
+def question_15(ctx):
+    durations, scores = ctx.exam.letter(DURATION), ctx.exam.letter("Puntuación")
+    candidates = [chart_obj for chart_obj in ctx.charts if chart_obj.type in RELATION_CHART_TYPES]
+    if not candidates:
+        return "Incorrecto", "No se encontró un gráfico adecuado para la relación Duración/Puntuación."
+    for chart_obj in candidates:
+        # La relación se acepta en cualquiera de los dos ejes
+        if _plots(ctx, chart_obj, durations, scores) or _plots(ctx, chart_obj, scores, durations):
+            title = f" '{chart_obj.title}'" if chart_obj.title else ""
+            return "Correcto", (f"Gráfico{title} de Duración Llamada (Minutos) ({durations}) "
+                                f"vs Puntuación ({scores}).")
+    return "Incorrecto", ("Ningún gráfico representa Duración Llamada (Minutos) vs Puntuación. "
+                          f"Encontrado: {_describe_charts(candidates)}")
+
+
+def read_ranges(exams):
+    """
+    Rangos que se leen de cada envío para evaluarlo contra exams, en una sola pasada:
+    la tabla completa de cada examen (encabezados y DataFrame), su marca y lo que
+    declaran las reglas.
+    """
+    extra = [exam.table_range for exam in exams] + [exam.marker[0] for exam in exams if exam.marker]
+    return required_ranges(RULES, extra=extra, exams=exams)
+
+
+# Rangos que se leen de cada envío del examen por defecto
+READ_RANGES = read_ranges([DEFAULT_EXAM])
+
+
+def evaluate_submission(submission_path, content=None, facts=None):
+    """
+    Evalúa un archivo de envío de usuario y devuelve las filas de resultado que añadió.
+
+    Con content (bytes del archivo ya leídos) se analiza desde memoria sin abrir la ruta,
+    que solo da el nombre del envío. Con facts (SubmissionFacts guardados de una
+    evaluación anterior, ver submission_facts) no se lee nada: las preguntas se
+    evalúan sobre los hechos.
+    """
+    evaluation = _run_evaluation(submission_path, content, facts)
+    results.extend(evaluation.records)
+    timings.extend(evaluation.timings)
+    return evaluation.records
+
+
+def _run_evaluation(submission_path, content=None, facts=None):
+    """Evalúa un envío en una Evaluation propia (sin tocar las listas globales) y la devuelve."""
+    evaluation = Evaluation()
+    with measure(evaluation.timings, os.path.basename(submission_path), "envio", "total", track_memory=False):
+        _evaluate_submission(evaluation, submission_path, content, facts)
+    return evaluation
+
+
+def _check_headers(user_data, exam=None):
+    """Comprueba los encabezados de la tabla; devuelve el mensaje de error o None si son correctos."""
+    exam = exam or DEFAULT_EXAM
+    column_mapping, header_row = exam.columns, exam.header_row
+    # Verificar que las columnas están en las posiciones correctas
+    for col_name, col_letter in column_mapping.items():
+        cell_user = user_data.cell(f'{col_letter}{header_row}').value
+
+        if str(cell_user).strip() != col_name:
+            return f"Columna '{col_name}' no encontrada en la posición correcta"
+
+    # Verificar y limpiar los nombres de las columnas
+    # Obtener los nombres de las columnas desde la hoja
+    column_names = []
+    for col_letter in column_mapping.values():
+        cell_value = user_data.cell(f'{col_letter}{header_row}').value
+        if cell_value:
+            # Limpiar espacios y caracteres especiales
+            clean_value = str(cell_value).strip()
+            column_names.append(clean_value)
         else:
-            add_result(4, "Edición y formato", "Ajusta el ancho de las columnas", "Incorrecto",
-                       "El ancho de algunas columnas no parece ajustado correctamente en el rango de la tabla.")
+            column_names.append(None)
 
-        # Pregunta 5: Calcula el número total de llamadas registradas
-        try:
-            # Buscar la respuesta en M10
-            answer_cell = "M10"  # Celda específica para la pregunta 5
-            user_answer = ws_user[answer_cell].value
+    # Verificar que todas las columnas requeridas existen
+    missing_columns = []
+    for col_name, col_letter in column_mapping.items():
+        cell_value = column_names[list(column_mapping.values()).index(col_letter)]
+        if cell_value != col_name:
+            missing_columns.append(col_name)
             
-            if user_answer is None:
-                add_result(5, "Fórmulas", "Calcula el número total de llamadas registradas", "Error", "Respuesta no encontrada")
-            else:
-                # Convertir a número si es necesario
-                try:
-                    user_answer = float(user_answer)
-                    expected = 30.0  # Convertir a float para comparación consistente
-                    
-                    if user_answer == expected:
-                        add_result(5, "Fórmulas", "Calcula el número total de llamadas registradas", "Correcto")
-                    else:
-                        add_result(5, "Fórmulas", "Calcula el número total de llamadas registradas", "Incorrecto",
-                                  f"Esperado: 30, Obtenido: {user_answer}")
-                except ValueError:
-                    add_result(5, "Fórmulas", "Calcula el número total de llamadas registradas", "Error", 
-                              f"Respuesta no es un número: {user_answer}")
-        except Exception as e:
-            add_result(5, "Fórmulas", "Calcula el número total de llamadas registradas", "Error",
-                      f"Error al evaluar respuesta: {str(e)}")
+    if missing_columns:
+        # Mostrar los nombres reales de las columnas para depuración
+        actual_cols = {k: v for k, v in zip(column_mapping.keys(), column_names)}
+        return (f"Columnas faltantes o con nombres incorrectos: {', '.join(missing_columns)}.\n"
+                f"Columnas encontradas: {actual_cols}")
+    return None
 
-        # Pregunta 6: Utiliza la función "Dar formato como tabla"
-        try:
-            # Verificar si hay formato de tabla aplicado
-            table_found = False
-            table_range_str = "C5:K35"  # Rango específico
-            
-            # Buscar tabla que cubra el rango C5:K35
-            if ws_user.tables:
-                for table_name, table_obj in ws_user.tables.items():
-                    if table_obj.ref == table_range_str:
-                        table_found = True
-                        break
-            
-            # Si no hay tabla, verificar si hay filtros aplicados (para LibreOffice Calc)
-            if not table_found:
-                filter_applied = False
-                for col_letter in COLUMN_MAPPING.values():
-                    if ws_user.auto_filter.ref and ws_user.auto_filter.ref.startswith(col_letter):
-                        filter_applied = True
-                        break
-            
-            if table_found or filter_applied:
-                add_result(6, "Fórmulas", "Utiliza la función 'Dar formato como tabla'", "Correcto",
-                           "Formato de tabla o filtros aplicados correctamente en el rango C5:K35")
-            else:
-                add_result(6, "Fórmulas", "Utiliza la función 'Dar formato como tabla'", "Incorrecto",
-                           "No se encontró formato de tabla ni filtros aplicados en el rango C5:K35")
-        except Exception as e:
-            add_result(6, "Fórmulas", "Utiliza la función 'Dar formato como tabla'", "Error",
-                       f"Error al verificar el formato de tabla: {str(e)}")
 
-        # Pregunta 7: Cuántas llamadas tuvieron un Sentimiento "Very Positive"
-        try:
-            # Buscar la respuesta en M12
-            answer_cell = "M12"  # Celda específica para la pregunta 7
-            user_answer = ws_user[answer_cell].value
-            
-            if user_answer is None:
-                add_result(7, "Fórmulas", "Cuántas llamadas tuvieron un Sentimiento 'Very Positive'", "Error", "Respuesta no encontrada")
-            else:
-                # Convertir a número si es necesario
-                try:
-                    user_answer = int(user_answer)
-                    expected = 3  # Convertir a float para comparación consistente
-                    
-                    if user_answer == expected:
-                        add_result(7, "Fórmulas", "Cuántas llamadas tuvieron un Sentimiento 'Very Positive'", "Correcto",
-                                   f"Esperado: 3, Obtenido: {user_answer}")
-                    else:
-                        add_result(7, "Fórmulas", "Cuántas llamadas tuvieron un Sentimiento 'Very Positive'", "Incorrecto",
-                                   f"Esperado: 3, Obtenido: {user_answer}")
-                except ValueError:
-                    add_result(7, "Fórmulas", "Cuántas llamadas tuvieron un Sentimiento 'Very Positive'", "Error", 
-                              f"Respuesta no es un número: {user_answer}")
-        except Exception as e:
-            add_result(7, "Fórmulas", "Cuántas llamadas tuvieron un Sentimiento 'Very Positive'", "Error",
-                      f"Error al evaluar respuesta: {str(e)}")
+def _matches_exam(user_data, exam):
+    """Indica si un envío corresponde a un examen: encabezados en su sitio y, si la define, su marca."""
+    if _check_headers(user_data, exam) is not None:
+        return False
+    if exam.marker:
+        cell, expected = exam.marker
+        value = user_data.cell(cell).value
+        return value is not None and str(value).strip() == str(expected).strip()
+    return True
 
-        # Pregunta 8: Calcula la duración promedio de las llamadas
-        try:
-            # Verificar la fórmula en K36
-            formula_cell = "K36"
-            formula = ws_user[formula_cell].value
-            
-            # Verificar si la fórmula es correcta (acepta tanto PROMEDIO como AVERAGE)
-            formula_correct = False
-            
-            # Verificar si la fórmula es correcta (considerando mayúsculas/minúsculas)
-            if formula:
-                formula_upper = str(formula).upper()
-                if formula_upper == "=PROMEDIO(K6:K35)" or formula_upper == "=AVERAGE(K6:K35)":
-                    formula_correct = True
-            
-            # Verificar la respuesta en M13
-            answer_cell = "M13"
-            user_answer = ws_user[answer_cell].value
-            
-            if user_answer is None:
-                add_result(8, "Fórmulas", "Calcula la duración promedio de las llamadas", "Error", "Respuesta no encontrada")
-            else:
-                # Convertir a número si es necesario
-                try:
-                    user_answer = int(user_answer)  # Convertir a entero
-                    expected_answer = 27  # Valor redondeado al entero más cercano
-                    
-                    if formula_correct and user_answer == expected_answer:
-                        add_result(8, "Fórmulas", "Calcula la duración promedio de las llamadas", "Correcto",
-                                  "Fórmula y respuesta correctas")
-                    elif not formula_correct:
-                        add_result(8, "Fórmulas", "Calcula la duración promedio de las llamadas", "Incorrecto",
-                                  f"Fórmula incorrecta: {formula}")
-                    else:
-                        add_result(8, "Fórmulas", "Calcula la duración promedio de las llamadas", "Incorrecto",
-                                  f"Respuesta incorrecta: {user_answer}, esperado: 27")
-                except ValueError:
-                    add_result(8, "Fórmulas", "Calcula la duración promedio de las llamadas", "Error", 
-                              f"Respuesta no es un número: {user_answer}")
-        except Exception as e:
-            add_result(8, "Fórmulas", "Calcula la duración promedio de las llamadas", "Error",
-                      f"Error al evaluar respuesta: {str(e)}")
 
-        # Pregunta 9: Ajusta el formato fecha a "dd/mm/yyyy"
-        try:
-            # Verificar el formato de fecha en el rango G6:G35
-            date_format_correct = True
-            start_row = 6  # G6
-            end_row = 35   # G35
-            
-            # Verificar cada celda en el rango
-            for row in range(start_row, end_row + 1):
-                cell = ws_user[f'G{row}']
-                if cell.data_type != 'd' or cell.number_format != 'dd/mm/yyyy':
-                    date_format_correct = False
-                    break
-
-            if date_format_correct:
-                add_result(9, "Fórmulas", "Ajusta el formato fecha a 'dd/mm/yyyy'", "Correcto",
-                           "Formato de fecha correcto en todas las celdas del rango G6:G35")
-            else:
-                add_result(9, "Fórmulas", "Ajusta el formato fecha a 'dd/mm/yyyy'", "Incorrecto",
-                           "El formato de fecha no es 'dd/mm/yyyy' o el tipo de dato no es fecha en alguna celda del rango G6:G35")
-        except Exception as e:
-            add_result(9, "Fórmulas", "Ajusta el formato fecha a 'dd/mm/yyyy'", "Error",
-                      f"Error al verificar el formato de fecha: {str(e)}")
+def detect_exams(user_data, exams=None):
+    """
+    Exámenes de la lista (por defecto, los de la ejecución) que corresponden al envío.
 
-        # Pregunta 10: Ordena la tabla por 'Puntuación' de mayor a menor y dime ¿Cuál es el puntaje máximo?
-        try:
-            # Verificar ordenación en la columna F (Puntuación)
-            order_correct = True
-            score_col = "F"  # Columna de Puntuación
-            
-            # Verificar que los valores estén ordenados de mayor a menor
-            for row in range(6, 35):  # De F6 a F35
-                current_cell = ws_user[f'{score_col}{row}']
-                next_cell = ws_user[f'{score_col}{row + 1}']
-                
-                if current_cell.value is not None and next_cell.value is not None:
-                    if current_cell.value < next_cell.value:
-                        order_correct = False
-                        break
-            
-            # Verificar la respuesta en M15
-            answer_cell = "M15"
-            user_answer = ws_user[answer_cell].value
-            
-            if user_answer is None:
-                add_result(10, "Fórmulas", "Ordena la tabla por 'Puntuación' de mayor a menor y puntaje máximo",
-                           "Error", "Respuesta no encontrada")
-            else:
-                try:
-                    user_answer = int(user_answer)  # Convertir a entero
-                    expected_answer = 10  # Valor máximo esperado
-                    
-                    if order_correct and user_answer == expected_answer:
-                        add_result(10, "Fórmulas", "Ordena la tabla por 'Puntuación' de mayor a menor y puntaje máximo",
-                                  "Correcto", "Ordenación y respuesta correctas")
-                    elif not order_correct:
-                        add_result(10, "Fórmulas", "Ordena la tabla por 'Puntuación' de mayor a menor y puntaje máximo",
-                                  "Incorrecto", "Los valores no están ordenados de mayor a menor")
-                    else:
-                        add_result(10, "Fórmulas", "Ordena la tabla por 'Puntuación' de mayor a menor y puntaje máximo",
-                                  "Incorrecto", f"Respuesta incorrecta: {user_answer}, esperado: 10")
-                except ValueError:
-                    add_result(10, "Fórmulas", "Ordena la tabla por 'Puntuación' de mayor a menor y puntaje máximo",
-                              "Error", f"Respuesta no es un número: {user_answer}")
-        except Exception as e:
-            add_result(10, "Fórmulas", "Ordena la tabla por 'Puntuación' de mayor a menor y puntaje máximo",
-                      "Error", f"Error al evaluar respuesta: {str(e)}")
+    Devuelve (exámenes, error). Con un solo examen se evalúa contra él si los
+    encabezados son correctos, como siempre; con varios, contra todos aquellos
+    cuyos encabezados (y marca) coinciden.
+    """
+    exams = _exams if exams is None else exams
+    if len(exams) == 1:
+        header_error = _check_headers(user_data, exams[0])
+        return ([], header_error) if header_error else (list(exams), None)
+    matching = [exam for exam in exams if _matches_exam(user_data, exam)]
+    if not matching:
+        return [], ("Los encabezados no coinciden con ningún examen "
+                    f"({', '.join(exam.id for exam in exams)})")
+    return matching, None
 
-        # Pregunta 11: Cuantas llamadas hay con ese puntaje Máximo
-        try:
-            # Verificar la respuesta en M16
-            answer_cell = "M16"
-            user_answer = ws_user[answer_cell].value
-            
-            if user_answer is None:
-                add_result(11, "Fórmulas", "Cuantas llamadas hay con ese puntaje Máximo", "Error", "Respuesta no encontrada")
-            else:
-                try:
-                    user_answer = int(user_answer)  # Convertir a entero
-                    expected_answer = 2  # Valor esperado
-                    
-                    if user_answer == expected_answer:
-                        add_result(11, "Fórmulas", "Cuantas llamadas hay con ese puntaje Máximo", "Correcto")
-                    else:
-                        add_result(11, "Fórmulas", "Cuantas llamadas hay con ese puntaje Máximo", "Incorrecto",
-                                  f"Respuesta incorrecta: {user_answer}, esperado: 2")
-                except ValueError:
-                    add_result(11, "Fórmulas", "Cuantas llamadas hay con ese puntaje Máximo", "Error", 
-                              f"Respuesta no es un número: {user_answer}")
-        except Exception as e:
-            add_result(11, "Fórmulas", "Cuantas llamadas hay con ese puntaje Máximo", "Error",
-                      f"Error al evaluar respuesta: {str(e)}")
 
-        # Pregunta 12: Si el "ID" de un cliente es PJL-11752230. Dime cual es el nombre y apellido al que corresponde
-        try:
-            # Verificar la respuesta en M17
-            answer_cell = "M17"
-            user_answer = ws_user[answer_cell].value
-            
-            if user_answer is None:
-                add_result(12, "Fórmulas", "Si el 'ID' de un cliente es PJL-11752230. Dime cual es el nombre y apellido al que corresponde", "Error", "Respuesta no encontrada")
-            else:
-                # Convertir a minúsculas para comparación insensible a mayúsculas/minúsculas
-                user_answer_lower = str(user_answer).lower()
-                expected_name = "linda lopez"
-                
-                if user_answer_lower == expected_name:
-                    add_result(12, "Fórmulas", "Si el 'ID' de un cliente es PJL-11752230. Dime cual es el nombre y apellido al que corresponde", "Correcto")
-                else:
-                    add_result(12, "Fórmulas", "Si el 'ID' de un cliente es PJL-11752230. Dime cual es el nombre y apellido al que corresponde", "Incorrecto",
-                              f"Respuesta incorrecta: {user_answer}, esperado: 'Linda Lopez'")
-        except Exception as e:
-            add_result(12, "Fórmulas", "Si el 'ID' de un cliente es PJL-11752230. Dime cual es el nombre y apellido al que corresponde", "Error",
-                      f"Error al evaluar respuesta: {str(e)}")
+def _add_minimal_result(evaluation, user_filename, minimal):
+    """Avisa de que el envío se leyó en modo mínimo (sin estilos ni gráficos)."""
+    evaluation.add_result("", "", f"Lectura mínima de {user_filename}", "Error",
+                          f"Archivo demasiado grande para evaluarlo completo: {minimal}")
 
-        # Pregunta 13: Resalta en Rojo las celdas de la columna "Puntuación" que sean inferiores a 5 (<5)
-        try:
-            # Verificar formato condicional en el rango F6:F35
-            score_col = "F"  # Columna de Puntuación
-            format_range = f"{score_col}6:{score_col}35"
-            
-            # Verificar si hay formato condicional correcto
-            conditional_formatting_correct = False
-            
-            # Verificar cada celda en el rango
-            for row in range(6, 36):  # F6:F35
-                cell = ws_user[f'{score_col}{row}']
-                if cell.value is not None and cell.value < 5:
-                    # Verificar si la celda está en rojo
-                    if cell.font and cell.font.color and cell.font.color.rgb == 'FFFF0000':
-                        conditional_formatting_correct = True
-                    else:
-                        conditional_formatting_correct = False
-                        break
-            
-            if conditional_formatting_correct:
-                add_result(13, "Fórmulas", "Resalta en Rojo las celdas de la columna 'Puntuación' que sean inferiores a 5 (<5)",
-                           "Correcto", "Formato condicional correcto en todas las celdas menores a 5")
-            else:
-                add_result(13, "Fórmulas", "Resalta en Rojo las celdas de la columna 'Puntuación' que sean inferiores a 5 (<5)",
-                           "Incorrecto", "No todas las celdas menores a 5 están en rojo o hay celdas con formato incorrecto")
-        except Exception as e:
-            add_result(13, "Fórmulas", "Resalta en Rojo las celdas de la columna 'Puntuación' que sean inferiores a 5 (<5)",
-                      "Error", f"Error al evaluar formato condicional: {str(e)}")
-
-        # Pregunta 14: Crea un gráfico de barras para mostrar la relación entre "Nombre del cliente" y "Puntuación".
-        chart1_found = False
-        for sheet_name in wb_user.sheetnames:
-            ws_current = wb_user[sheet_name]
-            for chart_obj in ws_current._charts:
-                if chart_obj.type == 'bar':
-                    chart1_found = True
-                    break
-            if chart1_found: break
-        if chart1_found:
-            add_result(14, "Gráficos", "Crea un gráfico de barras (Nombre del cliente vs Puntuación)", "Correcto",
-                       "Gráfico de barras detectado (verificación superficial de tipo).")
-        else:
-            add_result(14, "Gráficos", "Crea un gráfico de barras (Nombre del cliente vs Puntuación)", "Incorrecto",
-                       "No se encontró un gráfico de barras adecuado.")
-
-        # Pregunta 15: Crea un gráfico que permita mostrar la relación entre la "Duración de la Llamada" y la "Puntuación".
-        chart2_found = False
-        for sheet_name in wb_user.sheetnames:
-            ws_current = wb_user[sheet_name]
-            for chart_obj in ws_current._charts:
-                if chart_obj.type in ['scatter', 'bar', 'line']:
-                    chart2_found = True
-                    break
-            if chart2_found: break
-        if chart2_found:
-            add_result(15, "Gráficos", "Crea un gráfico (Duración de la Llamada vs Puntuación)", "Correcto",
-                       "Gráfico de relación Duración/Puntuación detectado (verificación superficial de tipo).")
+
+def _evaluate_submission(evaluation, submission_path, content=None, facts=None):
+    """
+    Ejecuta las comprobaciones de un envío, añadiendo los resultados y mediciones a evaluation.
+
+    El archivo se lee una sola vez (con los rangos de todos los exámenes de la
+    ejecución) y se evalúa contra cada examen que le corresponde. Con varios
+    exámenes, cada uno aparece como una evaluación aparte: "--- Evaluando: archivo [id] ---".
+    Lo leído queda en evaluation.facts; con facts se evalúa sobre ellos sin leer el archivo.
+    """
+    add_result = evaluation.add_result
+    user_filename = os.path.basename(submission_path)
+    opening = len(evaluation.records)
+    add_result("", "", f"--- Evaluando: {user_filename} ---", "")
+
+    try:
+        if facts is not None:
+            # Hechos guardados: se evalúa sin abrir el archivo
+            user_data, minimal = facts
+            if minimal:
+                _add_minimal_result(evaluation, user_filename, minimal)
         else:
-            add_result(15, "Gráficos", "Crea un gráfico (Duración de la Llamada vs Puntuación)", "Incorrecto",
-                       "No se encontró un gráfico adecuado para la relación Duración/Puntuación.")
+            # Verificar que el archivo existe
+            if content is None and not os.path.exists(submission_path):
+                add_result("", "", f"Error al procesar {user_filename}", "Error", "Archivo no encontrado")
+                return
+
+            def source():
+                return submission_path if content is None else io.BytesIO(content)
 
-        wb_user.close()
-        wb_expected.close()
+            # Revisar el zip antes de leerlo: los archivos desmesurados se rechazan o se leen
+            # en modo mínimo (sin estilos ni gráficos) para no agotar memoria ni tiempo
+            with measure(evaluation.timings, user_filename, "fase", "inspeccion"):
+                try:
+                    inspection = inspect_submission(source(), _limits)
+                except SubmissionRejected as e:
+                    add_result("", "", f"Error al procesar {user_filename}", "Error", f"Archivo rechazado: {e}")
+                    return
+            minimal = "; ".join(inspection.reasons) or None
+            if minimal:
+                _add_minimal_result(evaluation, user_filename, minimal)
+
+            # Leer del archivo del usuario solo lo que consultan las preguntas de todos los
+            # exámenes (hoja activa, estilos, tablas y gráficos); el DataFrame se construye a
+            # partir de esta misma lectura
+            with measure(evaluation.timings, user_filename, "fase", "lectura"):
+                user_data = read_submission(source(), _read_ranges(),
+                                            charts=needs_charts(RULES) and not minimal, styles=not minimal)
+            evaluation.facts = SubmissionFacts(user_data, minimal)
+
+        with measure(evaluation.timings, user_filename, "fase", "encabezados"):
+            exams, header_error = detect_exams(user_data)
+        if header_error:
+            add_result("", "", f"Error al procesar {user_filename}", "Error", header_error)
+            return
+
+        for position, exam in enumerate(exams):
+            label = user_filename
+            if len(_exams) > 1:
+                # Una evaluación por examen; la primera reutiliza la fila de apertura
+                label = f"{user_filename} [{exam.id}]"
+                if position == 0:
+                    evaluation.records[opening] = _result_row("", "", f"--- Evaluando: {label} ---", "")
+                else:
+                    add_result("", "", "--- Fin de evaluación ---", "")
+                    add_result("", "", f"--- Evaluando: {label} ---", "")
+            _evaluate_exam(evaluation, user_data, exam, minimal, label)
 
     except FileNotFoundError:
         add_result("", "", f"Error: Archivo de usuario no encontrado: {user_filename}", "Error",
@@ -581,83 +683,611 @@ def evaluate_submission(submission_path):
     add_result("", "", "--- Fin de evaluación ---", "")
 
 
-def generate_report():
-    """Genera el archivo Excel con los resultados de la evaluación."""
-    df_results = pd.DataFrame(results)
-
-    # Crear un nuevo workbook y sheet para los resultados
-    wb_results = Workbook()
-    ws_report = wb_results.active
-    ws_report.title = "Resultados_Evaluacion"
-
-    # Escribir el DataFrame en la hoja
-    for r_idx, row in enumerate(dataframe_to_rows(df_results, index=False, header=True), 1):
-        ws_report.append(row)
-
-    # Aplicar formato a los encabezados
-    header_font = Font(bold=True)
-    header_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
-    for cell in ws_report[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-
-    # Ajustar ancho de columnas
-    for col in ws_report.columns:
-        max_length = 0
-        column = col[0].column_letter
-        for cell in col:
+def _evaluate_exam(evaluation, user_data, exam, minimal, label):
+    """Evalúa un envío ya leído contra las preguntas de un examen."""
+    add_result = evaluation.add_result
+    user_filename = label
+    # Clave de respuestas compilada (anchos, encabezados y respuestas esperadas)
+    answer_key = get_answer_key(exam)
+
+    # Construir el DataFrame desde las celdas ya leídas
+    with measure(evaluation.timings, user_filename, "fase", "dataframe"):
+        try:
+            df_user = submission_to_dataframe(user_data, exam)
+        except Exception as e:
+            add_result("", "", f"Error al procesar {user_filename}", "Error", 
+                      f"Error al cargar los datos: {str(e)}")
+            return
+
+    # Verificar que los DataFrames tienen las columnas esperadas
+    expected_columns = list(exam.columns.keys())
+    missing_df_columns = [col for col in expected_columns if col not in df_user.columns]
+    
+    if missing_df_columns:
+        missing_cols_str = ", ".join(missing_df_columns)
+        add_result("", "", f"Error al procesar {user_filename}", "Error", 
+                  f"Columnas faltantes en DataFrame: {missing_cols_str}")
+        return
+
+    # --- PREGUNTAS DE EVALUACIÓN ---
+    run_rules(RULES, RubricContext(user_data, answer_key, minimal, exam), add_result,
+              timer=lambda name: measure(evaluation.timings, user_filename, "pregunta", name))
+
+
+def _read_ranges():
+    """Rangos que se leen de cada envío con los exámenes de la ejecución."""
+    exams = tuple(_exams)
+    if exams not in _read_ranges_cache:
+        _read_ranges_cache[exams] = read_ranges(exams)
+    return _read_ranges_cache[exams]
+
+
+def generate_report(records=None, export_format=None, results_file=RESULTS_FILE):
+    """
+    Genera el archivo Excel con los resultados de la evaluación (por defecto, la lista global).
+
+    Con export_format ('csv', 'jsonl' o 'parquet') guarda además la tabla de resultados
+    por pregunta y el resumen de puntajes por envío en ese formato.
+    """
+    records = results if records is None else records
+    writer = ReportWriter(results_file)
+    writer.write_records(records)
+    writer.close()
+    print(f"\nInforme de evaluación generado en '{results_file}'")
+    if export_format:
+        export_records(records, export_format, results_file)
+
+
+def export_records(records, export_format, results_file=RESULTS_FILE):
+    """
+    Exporta las filas de resultado y el resumen por envío en export_format (ver results_export).
+
+    Un fallo al exportar se informa por pantalla sin interrumpir la ejecución: el
+    informe Excel ya está escrito.
+    """
+    try:
+        results_path, summary_path = export_results(records, results_file, export_format)
+    except Exception as e:
+        print(f"Error al exportar los resultados en formato {export_format}: {e}")
+        return
+    print(f"Resultados exportados en '{results_path}' y resumen por envío en '{summary_path}'")
+
+
+def init_worker(profile=False, limits=None, exams=None):
+    """
+    Inicializa un proceso de trabajo (initializer de IsolatedPool) cargando las claves de respuestas una sola vez.
+
+    profile, limits y exams trasladan al proceso la configuración de la línea de
+    comandos (--profile, límites por envío, --examen); sin ellos se usan los valores
+    por defecto.
+    """
+    global _profiler, _limits, _exams
+    if exams is not None:
+        _exams = exams
+    for exam in _exams:
+        get_answer_key(exam)
+    if limits is not None:
+        _limits = limits
+    if profile:
+        _profiler = start_profiling()
+        _profiler.disable()
+
+
+def _submission_path(submission):
+    """Ruta de un envío dado como ruta o como (ruta, bytes ya leídos)."""
+    return submission[0] if isinstance(submission, tuple) else submission
+
+
+def collect_records(submission, facts=None):
+    """
+    Evalúa un envío y devuelve (filas de resultado, mediciones) sin dejarlas en las listas globales.
+
+    submission es la ruta del archivo o (ruta, bytes) si ya se leyó (ver prefetch);
+    con facts se evalúa sobre los hechos guardados sin leerlo. No comparte estado
+    entre llamadas: se puede usar desde varios hilos a la vez.
+    """
+    evaluation = _evaluate(submission, facts)
+    return evaluation.records, evaluation.timings
+
+
+def _evaluate(submission, facts=None):
+    """
+    Evaluation de un envío dado como ruta o (ruta, bytes).
+
+    En un proceso de trabajo con --profile, la evaluación se acumula en su perfilador
+    y el volcado de cProfile se actualiza tras cada envío.
+    """
+    if _profiler is not None:
+        _profiler.enable()
+    try:
+        if isinstance(submission, tuple):
+            return _run_evaluation(*submission, facts=facts)
+        return _run_evaluation(submission, facts=facts)
+    finally:
+        if _profiler is not None:
+            _profiler.disable()
+            _profiler.dump_stats(profile_path(RESULTS_FILE, worker=True))
+
+
+def _collect_with_facts(submission):
+    """
+    Como collect_records, pero devuelve además los hechos extraídos del envío
+    (bytes de submission_facts.dump_facts), o None si no se llegó a leer.
+    """
+    evaluation = _evaluate(submission)
+    facts = None
+    if evaluation.facts is not None:
+        try:
+            facts = dump_facts(*evaluation.facts)
+        except (TypeError, ValueError):
+            pass  # Algún valor no serializable: el envío se volverá a leer la próxima vez
+    return evaluation.records, evaluation.timings, facts
+
+
+def _grade_from_facts(submission_path, blob):
+    """
+    Evalúa un envío sobre sus hechos guardados y devuelve (filas, mediciones), o None
+    si los hechos no se pueden leer (entonces hay que volver a leer el archivo).
+    """
+    entries = []
+    try:
+        with measure(entries, os.path.basename(submission_path), "fase", "hechos"):
+            facts = load_facts(blob)
+    except ValueError:
+        return None
+    records, collected = collect_records(submission_path, facts)
+    return records, entries + collected
+
+
+def failure_records(submission_path, failure):
+    """Filas y medición de un envío cuya evaluación no terminó (tiempo, memoria, caída o lectura fallida)."""
+    user_filename = os.path.basename(submission_path)
+    records = [
+        _result_row("", "", f"--- Evaluando: {user_filename} ---", ""),
+        _result_row("", "", f"Error al procesar {user_filename}", "Error", failure.message),
+        _result_row("", "", "--- Fin de evaluación ---", ""),
+    ]
+    entries = [{"envio": user_filename, "tipo": "fallo", "nombre": failure.kind,
+                "segundos": failure.seconds, "memoria_kb": None}]
+    return records, entries
+
+
+def is_failure(entries):
+    """Indica si las mediciones corresponden a una evaluación aislada fallida (no se guarda en caché)."""
+    return any(entry["tipo"] == "fallo" for entry in entries)
+
+
+def evaluate_all(submissions, workers=1, profile=False):
+    """
+    Evalúa los envíos y produce (filas de resultado, mediciones, hechos), uno por archivo y en el orden recibido.
+
+    submissions es un iterable de rutas o de (ruta, bytes) ya leídos; se consume a
+    medida que hay procesos libres. Por defecto cada envío se evalúa en un proceso
+    aislado (ver isolated_runner) con tiempo y memoria máximos: un cuelgue, un
+    MemoryError o una caída del proceso se informa como fila de Error y el resto de
+    envíos sigue evaluándose. Con workers > 1 hay varios procesos a la vez; los
+    resultados se entregan en el orden de entrada, de modo que el informe es
+    idéntico al de la ejecución secuencial. Sin aislamiento (--sin-aislar) se evalúa
+    en este mismo proceso, o en un ProcessPoolExecutor (que consume todo el iterable).
+
+    Los hechos son lo extraído del archivo (ver submission_facts), o None si no se
+    llegó a leer.
+    """
+    if _isolation is not None:
+        pool = IsolatedPool(_collect_with_facts, workers, initializer=init_worker,
+                            initargs=(profile, _limits, _exams),
+                            **_isolation)
+        for submission, outcome in pool.map(submissions):
+            submission_path = _submission_path(submission)
+            if isinstance(outcome, TaskFailure):
+                print(f"Fallo al evaluar {os.path.basename(submission_path)}: {outcome.message}")
+                yield failure_records(submission_path, outcome) + (None,)
+            else:
+                print(f"Procesado: {os.path.basename(submission_path)}")
+                yield outcome
+        return
+
+    if workers <= 1:
+        for submission in submissions:
+            print(f"Procesando: {os.path.basename(_submission_path(submission))}")
+            yield _collect_with_facts(submission)
+        return
+
+    submissions = list(submissions)
+    chunksize = max(1, len(submissions) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(profile, _limits, _exams)) as pool:
+        for submission, collected in zip(submissions,
+                                         pool.map(_collect_with_facts, submissions, chunksize=chunksize)):
+            print(f"Procesado: {os.path.basename(_submission_path(submission))}")
+            yield collected
+
+
+def rubric_version():
+    """Identifica la rúbrica vigente: versión de las preguntas más los exámenes y claves de respuestas usados."""
+    parts = [str(RUBRIC_VERSION)]
+    for exam in _exams:
+        answer_key = get_answer_key(exam)
+        sources = answer_key["sources"]
+        parts.append(f"{exam.id}={exam.fingerprint()}:{answer_key['version']}:{sources['expected']}:"
+                     f"{sources['template']}")
+    limits = ",".join(str(value) for value in _limits)
+    return ":".join(parts + [limits])
+
+
+def facts_version():
+    """
+    Identifica la extracción vigente: formato de los hechos, rangos y gráficos que se
+    leen y límites por envío. Cambia solo si una pregunta necesita datos nuevos.
+    """
+    limits = ",".join(str(value) for value in _limits)
+    return ":".join([str(FACTS_VERSION), ",".join(_read_ranges()), str(needs_charts(RULES)), limits])
+
+
+def evaluate_with_cache(submission_paths, workers=1, force=False, profile=False, cache_file=RESULTS_CACHE,
+                        prefetcher=None, facts_sink=None):
+    """
+    Evalúa los envíos reutilizando los resultados en caché de los archivos sin cambios.
+
+    Produce (ruta, filas, mediciones) en el orden de submission_paths a medida que cada
+    envío termina; los envíos en caché no tienen mediciones. Solo se analizan los
+    archivos nuevos o modificados (o todos, con force=True); sus resultados se guardan
+    en la caché para la siguiente ejecución.
+
+    Con prefetcher (un prefetch.Prefetcher sobre las mismas rutas, o sobre los nombres
+    de un zip de exportación) cada archivo se lee una sola vez, por adelantado y en
+    hilos de E/S: el hash se calcula sobre esos bytes y la evaluación los analiza
+    desde memoria. Un envío que no se pudo leer se informa como fila de Error.
+
+    Junto a los resultados se guardan los hechos extraídos de cada archivo (ver
+    submission_facts). Si cambió la rúbrica pero no el archivo ni lo que se lee de
+    él, el envío se evalúa en este proceso sobre sus hechos, sin volver a abrirlo.
+
+    facts_sink, si se indica, recibe (ruta, hechos en bytes) de cada envío leído
+    antes de que se produzcan sus resultados (p.ej. para la detección de
+    similitud); un envío en caché cuyos hechos no están vigentes se vuelve a leer.
+    """
+    version = rubric_version()
+    extraction = facts_version()
+    cache = ResultCache(cache_file)
+    plan = deque()  # (ruta, hash, (filas, mediciones) ya conocidas o None), en el orden de entrada
+    reused = regraded = 0
+
+    def to_grade():
+        nonlocal reused, regraded
+        source = prefetcher if prefetcher is not None else ((path, None) for path in submission_paths)
+        for path, content in source:
+            error = prefetcher.errors.get(path) if content is None and prefetcher is not None else None
+            if error is not None and not isinstance(error, FileNotFoundError):  # "Archivo no encontrado"
+                if isinstance(error, SubmissionRejected):  # Demasiado grande: no se llegó a leer
+                    failure = TaskFailure("lectura", f"Archivo rechazado: {error}", 0.0)
+                else:
+                    failure = TaskFailure("lectura", f"No se pudo leer el archivo: {error}", 0.0)
+                plan.append((path, None, failure_records(path, failure)))
+                continue
             try:
-                if cell.value is not None and len(str(cell.value)) > max_length:
-                    max_length = len(str(cell.value))
-            except:
-                pass
-        adjusted_width = (max_length + 2) * 1.2
-        if adjusted_width > 100: adjusted_width = 100
-        ws_report.column_dimensions[column].width = adjusted_width
-
-    # Formato condicional para el estado
-    red_fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
-    green_fill = PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid")
-
-    for row_idx in range(2, ws_report.max_row + 1):
-        status_cell = ws_report.cell(row=row_idx, column=4)
-        if status_cell.value == "Incorrecto":
-            for col_idx in range(1, ws_report.max_column + 1):
-                ws_report.cell(row=row_idx, column=col_idx).fill = red_fill
-        elif status_cell.value == "Correcto":
-            for col_idx in range(1, ws_report.max_column + 1):
-                ws_report.cell(row=row_idx, column=col_idx).fill = green_fill
-        elif status_cell.value and str(status_cell.value).startswith("---"):
-            for col_idx in range(1, ws_report.max_column + 1):
-                ws_report.cell(row=row_idx, column=col_idx).fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0",
-                                                                               fill_type="solid")
-                ws_report.cell(row=row_idx, column=col_idx).font = Font(bold=True)
-
-    wb_results.save(RESULTS_FILE)
+                content_hash = hashlib.sha256(content).hexdigest() if content is not None else file_sha256(path)
+            except OSError:
+                content_hash = None  # Ilegible: la evaluación lo informa y no se guarda en caché
+            filename = os.path.basename(path)
+            cached = None if force or content_hash is None else cache.get(filename, content_hash, version)
+            if cached is not None and facts_sink is not None:
+                blob = cache.get_facts(filename, content_hash, extraction)
+                if blob is None:
+                    cached = None
+                else:
+                    facts_sink(path, blob)
+            if cached is not None:
+                plan.append((path, content_hash, (cached, [])))
+                reused += 1
+                continue
+            blob = None if force or content_hash is None else cache.get_facts(filename, content_hash, extraction)
+            graded = None if blob is None else _grade_from_facts(path, blob)
+            if graded is not None:
+                cache.put(filename, content_hash, version, graded[0])
+                if facts_sink is not None:
+                    facts_sink(path, blob)
+                if prefetcher is not None:
+                    graded = (graded[0], graded[1] + prefetcher.entries(path, filename))
+                plan.append((path, content_hash, graded))
+                regraded += 1
+                continue
+            plan.append((path, content_hash, None))
+            yield path if content is None else (path, content)
+
+    def known_ahead():
+        while plan and plan[0][2] is not None:
+            path, _, (records, entries) = plan.popleft()
+            yield path, records, entries
+
+    try:
+        for records, entries, facts in evaluate_all(to_grade(), workers, profile):
+            yield from known_ahead()
+            path, content_hash, _ = plan.popleft()
+            # Un fallo por tiempo o memoria puede no repetirse
+            if content_hash is not None and not is_failure(entries):
+                cache.put(os.path.basename(path), content_hash, version, records)
+                if facts is not None:
+                    cache.put_facts(os.path.basename(path), content_hash, extraction, facts)
+            if facts is not None and facts_sink is not None:
+                facts_sink(path, facts)
+            if prefetcher is not None:
+                entries = entries + prefetcher.entries(path, os.path.basename(path))
+            yield path, records, entries
+        yield from known_ahead()
+        if reused:
+            print(f"{reused} archivo(s) sin cambios, se reutilizaron los resultados en caché.")
+        if regraded:
+            print(f"{regraded} archivo(s) sin cambios se volvieron a evaluar con la rúbrica actual "
+                  f"a partir de sus hechos guardados, sin abrirlos.")
+    finally:
+        cache.close()
+
+
+def parse_args(argv=None):
+    """Interpreta los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Evalúa los archivos Excel de los usuarios.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Número de procesos para evaluar en paralelo (por defecto 1)")
+    parser.add_argument('--force', action='store_true',
+                        help="Volver a leer y evaluar todos los archivos, ignorando la caché de resultados "
+                             "y los hechos guardados")
+    parser.add_argument('--export', choices=EXPORT_FORMATS,
+                        help="Exportar también los resultados por pregunta y el resumen por envío "
+                             "(parquet requiere pyarrow)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Medir también la memoria asignada por fase y pregunta y guardar "
+                             "las estadísticas de cProfile")
+    parser.add_argument('--zip', metavar='EXPORTACION.zip',
+                        help="Evaluar los envíos de un zip de exportación sin extraerlo al disco "
+                             "(en lugar de la carpeta user_submissions)")
+    parser.add_argument('--examen', action='append', metavar='ID|ARCHIVO.json|auto',
+                        help="Examen contra el que evaluar (por defecto 'base'); repetible. Con varios, o con "
+                             "'auto' (todos los de data/examenes), cada envío se lee una vez y se evalúa "
+                             "contra los exámenes cuyos encabezados coinciden")
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help="Evaluar solo el fragmento i de N (reparto por hash del nombre de archivo) y "
+                             "guardar un resultado parcial; merge_results.py combina los fragmentos")
+    limits = parser.add_argument_group("límites por envío",
+                                       "Los archivos que los superan se rechazan o se leen en modo mínimo")
+    limits.add_argument('--max-mb', type=float, default=DEFAULT_LIMITS.max_total_mb,
+                        help=f"Tamaño descomprimido máximo en MB (por defecto {DEFAULT_LIMITS.max_total_mb})")
+    limits.add_argument('--max-mb-parte', type=float, default=DEFAULT_LIMITS.max_member_mb,
+                        help="Tamaño descomprimido máximo en MB de cada parte del archivo "
+                             f"(por defecto {DEFAULT_LIMITS.max_member_mb})")
+    limits.add_argument('--max-ratio', type=float, default=DEFAULT_LIMITS.max_ratio,
+                        help=f"Relación de compresión máxima de una parte (por defecto {DEFAULT_LIMITS.max_ratio})")
+    limits.add_argument('--max-filas', type=int, default=DEFAULT_LIMITS.max_rows,
+                        help=f"Filas declaradas máximas de la hoja (por defecto {DEFAULT_LIMITS.max_rows})")
+    limits.add_argument('--max-columnas', type=int, default=DEFAULT_LIMITS.max_cols,
+                        help=f"Columnas declaradas máximas de la hoja (por defecto {DEFAULT_LIMITS.max_cols})")
+    limits.add_argument('--max-estilos', type=int, default=DEFAULT_LIMITS.max_styles,
+                        help=f"Estilos de celda máximos (por defecto {DEFAULT_LIMITS.max_styles})")
+    isolation = parser.add_argument_group("aislamiento",
+                                          "Cada envío se evalúa en un proceso vigilado; si falla, "
+                                          "se informa como Error y la ejecución continúa")
+    isolation.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                           help=f"Segundos máximos por envío (por defecto {DEFAULT_TIMEOUT:g})")
+    isolation.add_argument('--max-memoria', type=float, default=DEFAULT_MAX_MEMORY_MB,
+                           help="Memoria adicional máxima por proceso en MB, sobre la que ocupa al arrancar "
+                                f"(por defecto {DEFAULT_MAX_MEMORY_MB})")
+    isolation.add_argument('--reciclar', type=int, default=DEFAULT_RECYCLE_AFTER,
+                           help=f"Envíos por proceso antes de reemplazarlo (por defecto {DEFAULT_RECYCLE_AFTER})")
+    isolation.add_argument('--sin-aislar', action='store_true',
+                           help="Evaluar en el proceso principal (sin tiempo ni memoria máximos)")
+    similarity = parser.add_argument_group("similitud",
+                                           "Los envíos parecidos (posibles copias) se agrupan en la hoja "
+                                           f"'{SIMILARITY_SHEET}' del informe")
+    similarity.add_argument('--sin-similitud', action='store_true',
+                            help="No buscar envíos parecidos")
+    similarity.add_argument('--umbral-similitud', type=float, default=DEFAULT_THRESHOLD, metavar='0-1',
+                            help="Similitud mínima entre los rasgos poco comunes de dos envíos "
+                                 f"(por defecto {DEFAULT_THRESHOLD:g})")
+    pipeline = parser.add_argument_group("lectura anticipada",
+                                         "Los siguientes envíos se leen en hilos de E/S mientras se evalúa el actual")
+    pipeline.add_argument('--prefetch', type=int, default=DEFAULT_DEPTH, metavar='N',
+                          help=f"Envíos leídos por adelantado (por defecto {DEFAULT_DEPTH}; 0 la desactiva)")
+    pipeline.add_argument('--hilos-es', type=int, default=DEFAULT_IO_THREADS,
+                          help=f"Hilos de lectura (por defecto {DEFAULT_IO_THREADS})")
+    return parser.parse_args(argv)
+
+
+def configure_isolation(args):
+    """Aplica las opciones de aislamiento indicadas en la línea de comandos."""
+    global _isolation
+    _isolation = None if args.sin_aislar else {"timeout": args.timeout, "max_memory_mb": args.max_memoria,
+                                               "recycle_after": max(1, args.reciclar)}
+
+
+def configure_exams(args):
+    """Carga y valida los exámenes indicados en la línea de comandos; lanza ExamConfigError."""
+    global _exams
+    exams = resolve_exams(args.examen)
+    for exam in exams:
+        check_exam(exam)
+    _exams = exams
+
+
+def configure_limits(args):
+    """Aplica los límites por envío indicados en la línea de comandos."""
+    global _limits
+    _limits = DEFAULT_LIMITS._replace(max_total_mb=args.max_mb, max_member_mb=args.max_mb_parte,
+                                      max_ratio=args.max_ratio, max_rows=args.max_filas,
+                                      max_cols=args.max_columnas, max_styles=args.max_estilos)
+
+
+def similarity_features(facts):
+    """Rasgos de similitud de un envío (ver similarity) a partir de sus hechos en bytes, o None si son ilegibles."""
+    try:
+        return submission_features(load_facts(facts).user_data)
+    except ValueError:
+        return None
+
+
+def _grade_to_report(submission_paths, args, prefetcher=None):
+    """Evalúa los envíos escribiendo sus filas en el informe a medida que terminan; devuelve las mediciones."""
+    writer = ReportWriter(RESULTS_FILE)
+    exported = []
+    run_timings = []
+    similar = facts_sink = None
+    if not args.sin_similitud:
+        # Los rasgos salen de los datos ya leídos para evaluar: no se vuelve a abrir ningún archivo
+        similar = SimilarityIndex(args.umbral_similitud)
+
+        def facts_sink(path, facts):
+            features = similarity_features(facts)
+            if features is not None:
+                similar.add(os.path.basename(path), features)
+
+    for _, records, entries in evaluate_with_cache(submission_paths, args.workers, args.force, args.profile,
+                                                   prefetcher=prefetcher, facts_sink=facts_sink):
+        writer.write_records(records)
+        run_timings.extend(entries)
+        if args.export:
+            exported.extend(records)
+    if similar is not None:
+        with measure(run_timings, None, "informe", "similitud"):
+            _add_similarity_sheet(writer, similar)
+    if run_timings:
+        writer.add_sheet(PERFORMANCE_SHEET, TIMINGS_COLUMNS, summarize_timings(run_timings))
+    with measure(run_timings, None, "informe", "generate_report"):
+        writer.close()
     print(f"\nInforme de evaluación generado en '{RESULTS_FILE}'")
+    if args.export:
+        export_records(exported, args.export)
+    return run_timings
+
 
+def _add_similarity_sheet(writer, similar):
+    """Agrupa los envíos parecidos y los añade al informe como hoja "Similitud"."""
+    rows = similar.report_rows()
+    writer.add_sheet(SIMILARITY_SHEET, SIMILARITY_COLUMNS, rows, SIMILARITY_FORMATS)
+    groups = len({row["Grupo"] for row in rows if row.get("Grupo")})
+    if groups:
+        print(f"Similitud: {groups} grupo(s) de envíos parecidos; revisa la hoja '{SIMILARITY_SHEET}'.")
 
-def main():
+
+def _grade_shard(submission_paths, args, run_file, prefetcher=None):
+    """
+    Evalúa los envíos de un fragmento y guarda el resultado parcial; devuelve las mediciones.
+
+    Cada fragmento usa su propia caché de resultados (SQLite no admite escrituras
+    concurrentes fiables en una carpeta de red compartida); como el reparto es
+    determinista, repetir un fragmento reutiliza su caché. Los rasgos de similitud
+    de cada envío se guardan en el parcial para agrupar los parecidos de todos los
+    fragmentos al combinarlos.
+    """
+    index, count = args.shard
+    cache_file = os.path.splitext(run_file)[0] + '.cache.sqlite'
+    partial = PartialResultsWriter(run_file, index, count, rubric_version())
+    run_timings = []
+    features = {}
+    facts_sink = None
+    if not args.sin_similitud:
+        def facts_sink(path, facts):
+            features[os.path.basename(path)] = similarity_features(facts)
+
+    try:
+        for path, records, entries in evaluate_with_cache(submission_paths, args.workers, args.force,
+                                                          args.profile, cache_file, prefetcher, facts_sink):
+            filename = os.path.basename(path)
+            partial.write(filename, records, entries, features.pop(filename, None))
+            run_timings.extend(entries)
+    except BaseException:
+        partial.discard()
+        raise
+    partial.close()
+    print(f"\nResultado parcial del fragmento {index}/{count} guardado en '{run_file}'. "
+          f"Cuando terminen todos los fragmentos, ejecuta merge_results.py para generar el informe.")
+    return run_timings
+
+
+def main(argv=None):
     """Función principal para ejecutar la evaluación."""
-    print("Iniciando la evaluación de archivos de usuario...")
-    if not os.path.exists(SUBMISSIONS_DIR):
-        print(
-            f"Error: No se encontró la carpeta de envíos '{SUBMISSIONS_DIR}'. Crea esta carpeta y coloca los archivos de los usuarios aquí.")
+    args = parse_args(argv)
+    configure_limits(args)
+    configure_isolation(args)
+    try:
+        configure_exams(args)
+    except ExamConfigError as e:
+        print(f"Error: {e}")
         return
+    print("Iniciando la evaluación de archivos de usuario...")
+    if len(_exams) > 1:
+        print(f"Exámenes: {', '.join(f'{exam.id} ({exam.name})' for exam in _exams)}")
+    export = None
+    if args.zip:
+        try:
+            export = ZipSubmissions(args.zip, _limits)
+        except (OSError, zipfile.BadZipFile) as e:
+            print(f"Error: No se pudo abrir el zip de exportación '{args.zip}': {e}")
+            return
+        submission_files = export.names
+        if not submission_files:
+            print(f"No se encontraron archivos .xlsx o .xlsm en '{args.zip}'.")
+            return
+    else:
+        if not os.path.exists(SUBMISSIONS_DIR):
+            print(
+                f"Error: No se encontró la carpeta de envíos '{SUBMISSIONS_DIR}'. Crea esta carpeta y coloca los archivos de los usuarios aquí.")
+            return
 
-    submission_files = [f for f in os.listdir(SUBMISSIONS_DIR) if f.endswith('.xlsx') or f.endswith('.xlsm')]
+        submission_files = sorted(f for f in os.listdir(SUBMISSIONS_DIR) if f.endswith('.xlsx') or f.endswith('.xlsm'))
 
-    if not submission_files:
-        print(f"No se encontraron archivos .xlsx o .xlsm en '{SUBMISSIONS_DIR}'.")
+        if not submission_files:
+            print(f"No se encontraron archivos .xlsx o .xlsm en '{SUBMISSIONS_DIR}'.")
+            return
+
+    # Compilar (o recuperar de la caché) la clave de respuestas de cada examen una sola vez
+    try:
+        for exam in _exams:
+            get_answer_key(exam)
+    except Exception as e:
+        print(f"Error al cargar la clave de respuestas: {e}")
         return
 
-    for filename in submission_files:
-        submission_path = os.path.join(SUBMISSIONS_DIR, filename)
-        print(f"Procesando: {filename}")
-        evaluate_submission(submission_path)
+    if export is not None:
+        submission_paths = list(submission_files)  # Nombres de los miembros, no rutas en disco
+    else:
+        submission_paths = [os.path.join(SUBMISSIONS_DIR, filename) for filename in submission_files]
+    run_file = RESULTS_FILE
+    if args.shard:
+        index, count = args.shard
+        submission_paths = select_shard(submission_paths, index, count)
+        run_file = partial_path(RESULTS_FILE, index, count)
+        print(f"Fragmento {index}/{count}: {len(submission_paths)} de {len(submission_files)} envío(s).")
+    profiler = start_profiling() if args.profile else None
+    if export is not None:
+        # Los miembros del zip siempre se leen en memoria; --prefetch 0 los lee de uno en uno
+        prefetcher = Prefetcher(submission_paths, args.prefetch, args.hilos_es if args.prefetch > 0 else 1,
+                                read=export.read)
+    elif args.prefetch > 0:
+        prefetcher = Prefetcher(submission_paths, args.prefetch, args.hilos_es,
+                                read=functools.partial(read_file, limits=_limits))
+    else:
+        prefetcher = None
+
+    if args.shard:
+        run_timings = _grade_shard(submission_paths, args, run_file, prefetcher)
+    else:
+        run_timings = _grade_to_report(submission_paths, args, prefetcher)
 
-    generate_report()
+    pipeline = None
+    if prefetcher is not None and prefetcher.started is not None:
+        pipeline = prefetcher.summary()
+        print(f"Lectura anticipada: {pipeline['mb']:.1f} MB de {pipeline['archivos']} archivo(s) leídos en "
+              f"{pipeline['lectura']:.2f} s; la evaluación esperó a la E/S {pipeline['espera_es']:.2f} s "
+              f"de {pipeline['total']:.2f} s.")
+    write_timings(timings_path(run_file), run_timings, workers=args.workers, perfil=args.profile,
+                  envios=len(submission_paths), lectura_anticipada=pipeline)
+    print(f"Tiempos de evaluación guardados en '{timings_path(run_file)}'")
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profile_path(run_file))
+        print(f"Estadísticas de cProfile guardadas en '{profile_path(run_file)}'")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+    if export is not None:
+        export.close()
     print("Evaluación completada.")
 
 
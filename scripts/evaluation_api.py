@@ -0,0 +1,121 @@
+# scripts/evaluation_api.py
+
+"""
+API en memoria para evaluar envíos desde otros programas.
+
+    from evaluation_api import grade, grade_zip
+
+    result = grade(datos, "Juan_evaluacion.xlsx")  # bytes, archivo binario abierto o ruta
+    result.summary()    # {"preguntas": 15, "correctas": 12, "incorrectas": 3, "errores": 0}
+    result.questions    # [QuestionResult(number=1, topic=..., status="Correcto", ...), ...]
+
+    for result in grade_zip("exportacion.zip"):  # sin extraer el zip al disco
+        ...
+
+La evaluación se hace en el proceso que llama, con la misma rúbrica y los mismos
+límites que la ejecución por lotes, sin escribir archivos temporales ni dejar
+filas en las listas globales del informe. Cada llamada reúne sus filas en su
+propia Evaluation (ver evaluate_submissions), de modo que grade y grade_zip se
+pueden llamar a la vez desde varios hilos.
+"""
+
+import os
+from collections import namedtuple
+
+from evaluate_submissions import collect_records, failure_records
+from isolated_runner import TaskFailure
+from zip_submissions import ZipSubmissions
+
+DEFAULT_FILENAME = "envio.xlsx"
+
+# Una pregunta evaluada; status es "Correcto", "Incorrecto" o "Error"
+QuestionResult = namedtuple("QuestionResult", ["number", "topic", "question", "status", "observations"])
+
+
+def summarize_records(records):
+    """Cuenta de preguntas por estado a partir de las filas de un envío."""
+    statuses = [record["Estado"] for record in records if record["No."] != ""]
+    return {"preguntas": len(statuses), "correctas": statuses.count("Correcto"),
+            "incorrectas": statuses.count("Incorrecto"), "errores": statuses.count("Error")}
+
+
+class SubmissionResult:
+    """
+    Resultado de un envío: filas del informe (records), mediciones (timings) y vistas por pregunta.
+
+    errors son los errores que no corresponden a una pregunta (archivo rechazado,
+    encabezados incorrectos, lectura mínima...).
+    """
+
+    def __init__(self, filename, records, timings=()):
+        self.filename = filename
+        self.records = list(records)
+        self.timings = list(timings)
+
+    @property
+    def questions(self):
+        return [QuestionResult(record["No."], record["Tema"], record["Pregunta"], record["Estado"],
+                               record["Observaciones"])
+                for record in self.records if record["No."] != ""]
+
+    @property
+    def errors(self):
+        return [record["Observaciones"] for record in self.records
+                if record["No."] == "" and record["Estado"] == "Error"]
+
+    def summary(self):
+        return summarize_records(self.records)
+
+    def to_dict(self):
+        """Representación serializable en JSON (la misma que devuelve el servicio HTTP)."""
+        return {"archivo": self.filename, "filas": self.records, "resumen": self.summary(),
+                "errores_archivo": self.errors}
+
+    def __repr__(self):
+        summary = self.summary()
+        return (f"SubmissionResult({self.filename!r}, {summary['correctas']}/{summary['preguntas']} correctas, "
+                f"{len(self.errors)} error(es))")
+
+
+def _read_source(source, filename):
+    """Devuelve (nombre, bytes) de unos bytes, un archivo binario abierto o una ruta."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return filename or DEFAULT_FILENAME, bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return filename or os.path.basename(source), f.read()
+    content = source.read()
+    if not isinstance(content, bytes):
+        raise TypeError("El archivo debe abrirse en modo binario ('rb')")
+    return filename or os.path.basename(getattr(source, 'name', '') or DEFAULT_FILENAME), content
+
+
+def grade(source, filename=None):
+    """
+    Evalúa un envío dado como bytes, archivo binario abierto o ruta; devuelve un SubmissionResult.
+
+    filename es el nombre con el que aparece en las filas (por defecto, el del
+    archivo o envio.xlsx).
+    """
+    filename, content = _read_source(source, filename)
+    records, entries = collect_records((filename, content))
+    return SubmissionResult(filename, records, entries)
+
+
+def grade_zip(source):
+    """
+    Evalúa uno a uno los envíos de un zip de exportación (ruta o archivo binario abierto).
+
+    Produce un SubmissionResult por envío en el orden de los nombres (ver
+    zip_submissions); cada miembro se descomprime en memoria justo antes de evaluarlo.
+    """
+    with ZipSubmissions(source) as export:
+        for name in export.names:
+            try:
+                content = export.read(name)
+            except Exception as e:  # Miembro dañado o demasiado grande: se informa y se sigue
+                failure = TaskFailure("lectura", f"No se pudo leer el archivo: {e}", 0.0)
+                yield SubmissionResult(name, *failure_records(name, failure))
+                continue
+            records, entries = collect_records((name, content))
+            yield SubmissionResult(name, records, entries)
@@ -0,0 +1,193 @@
+# scripts/exam_config.py
+
+"""
+Definiciones de examen cargadas de archivos JSON (data/examenes/*.json).
+
+Cada variante de examen declara su hoja, la posición de la tabla (fila de
+encabezados, primera fila de datos y fila del promedio), la letra de cada
+columna, las celdas donde el alumno escribe cada respuesta, los parámetros de
+las preguntas (ID buscado, sentimiento contado) y sus archivos de referencia.
+Las respuestas esperadas se calculan de la plantilla de cada variante (ver
+answer_key); "respuestas" permite fijar alguna a mano. Ejemplo mínimo:
+
+    {
+      "id": "b", "nombre": "Variante B", "hoja": "Datos",
+      "archivo_plantilla": "../variante_b.xlsx", "archivo_esperado": "../variante_b_resuelta.xlsx",
+      "fila_encabezados": 5, "fila_inicio_datos": 6, "fila_fin_tabla": 36,
+      "columnas": {"ID": "C", "Nombre del Cliente": "D", ...},
+      "celdas_respuesta": {"total_ids": "N6", ...},
+      "parametros": {"id_buscado": "PJL-11752230", "sentimiento_contado": "Neutral"},  (opcional)
+      "preguntas": [1, 2, 3],                          (opcional: por defecto, todas)
+      "marca": {"celda": "B2", "valor": "Variante B"}  (opcional: para distinguir variantes
+                                                       con los mismos encabezados)
+    }
+
+Las rutas de los archivos de referencia son relativas a la carpeta del JSON.
+"""
+
+import glob
+import hashlib
+import json
+import os
+
+from openpyxl.utils import coordinate_to_tuple, get_column_letter
+from openpyxl.utils.cell import column_index_from_string
+
+from answer_key import DEFAULT_PARAMETERS
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+EXAMS_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'data', 'examenes')
+DEFAULT_EXAM = "base"
+
+REQUIRED_KEYS = ("id", "hoja", "archivo_plantilla", "archivo_esperado", "fila_encabezados", "fila_inicio_datos",
+                 "fila_fin_tabla", "columnas", "celdas_respuesta")
+
+
+class ExamConfigError(Exception):
+    """Definición de examen inexistente o no válida."""
+
+
+class ExamDefinition:
+    """Variante de examen: posiciones de la tabla y de las respuestas, parámetros y archivos de referencia."""
+
+    def __init__(self, config, source=None):
+        self.config = config
+        self.source = source
+        self.id = config["id"]
+        self.name = config.get("nombre", self.id)
+        self.sheet_name = config["hoja"]
+        base_dir = os.path.dirname(source) if source else EXAMS_DIR
+        self.template_file = os.path.normpath(os.path.join(base_dir, config["archivo_plantilla"]))
+        self.expected_file = os.path.normpath(os.path.join(base_dir, config["archivo_esperado"]))
+        self.header_row = config["fila_encabezados"]
+        self.data_start_row = config["fila_inicio_datos"]
+        self.table_end_row = config["fila_fin_tabla"]  # Fila del promedio, la última de la tabla
+        self.columns = dict(config["columnas"])
+        self.answer_cells = dict(config["celdas_respuesta"])
+        self.parameters = {**DEFAULT_PARAMETERS, **config.get("parametros", {})}
+        self.answers = dict(config.get("respuestas", {}))
+        self.questions = tuple(config["preguntas"]) if config.get("preguntas") else None
+        marker = config.get("marca")
+        self.marker = (marker["celda"], marker["valor"]) if marker else None
+
+    def __repr__(self):
+        return f"ExamDefinition({self.id!r})"
+
+    @property
+    def last_data_row(self):
+        return self.table_end_row - 1
+
+    def letter(self, column_name):
+        """Letra de una columna de la tabla por su nombre."""
+        return self.columns[column_name]
+
+    def column_range(self, column_name):
+        """Celdas de datos de una columna (sin encabezado ni fila del promedio), p.ej. "F6:F35"."""
+        letter = self.columns[column_name]
+        return f"{letter}{self.data_start_row}:{letter}{self.last_data_row}"
+
+    @property
+    def table_range(self):
+        """Tabla completa: encabezados, datos y fila del promedio, p.ej. "C5:K36"."""
+        letters = list(self.columns.values())
+        return f"{letters[0]}{self.header_row}:{letters[-1]}{self.table_end_row}"
+
+    @property
+    def data_range(self):
+        """Encabezados y datos sin la fila del promedio, p.ej. "C5:K35"."""
+        letters = list(self.columns.values())
+        return f"{letters[0]}{self.header_row}:{letters[-1]}{self.last_data_row}"
+
+    def includes(self, number):
+        """Indica si la pregunta number forma parte de este examen."""
+        return self.questions is None or number in self.questions
+
+    def fingerprint(self):
+        """Hash de la definición, para invalidar la caché de resultados cuando cambia."""
+        text = json.dumps(self.config, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _validate(config, where):
+    missing = [key for key in REQUIRED_KEYS if key not in config]
+    if missing:
+        raise ExamConfigError(f"{where}: faltan las claves {', '.join(missing)}")
+    for key in ("fila_encabezados", "fila_inicio_datos", "fila_fin_tabla"):
+        if not isinstance(config[key], int) or config[key] < 1:
+            raise ExamConfigError(f"{where}: '{key}' debe ser un número de fila")
+    if not config["fila_encabezados"] < config["fila_inicio_datos"] < config["fila_fin_tabla"]:
+        raise ExamConfigError(f"{where}: las filas deben cumplir encabezados < inicio de datos < fin de tabla")
+    if not isinstance(config["columnas"], dict) or not config["columnas"]:
+        raise ExamConfigError(f"{where}: 'columnas' debe asociar cada nombre de columna a su letra")
+    indexes = []
+    for name, letter in config["columnas"].items():
+        try:
+            indexes.append(column_index_from_string(letter))
+        except (ValueError, TypeError):
+            raise ExamConfigError(f"{where}: letra de columna no válida para '{name}': {letter!r}")
+    if indexes != list(range(indexes[0], indexes[0] + len(indexes))):
+        raise ExamConfigError(f"{where}: las columnas deben ser contiguas y estar en orden "
+                              f"({', '.join(get_column_letter(i) for i in indexes)})")
+    cells = dict(config["celdas_respuesta"])
+    if config.get("marca"):
+        cells["marca"] = config["marca"].get("celda")
+    for key, coordinate in cells.items():
+        try:
+            coordinate_to_tuple(coordinate)
+        except (ValueError, TypeError, AttributeError):
+            raise ExamConfigError(f"{where}: celda no válida para '{key}': {coordinate!r}")
+
+
+def load_exam(path):
+    """Lee y valida una definición de examen."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        raise ExamConfigError(f"No existe la definición de examen '{path}'")
+    except (OSError, ValueError) as e:
+        raise ExamConfigError(f"No se pudo leer la definición de examen '{path}': {e}")
+    if not isinstance(config, dict):
+        raise ExamConfigError(f"{os.path.basename(path)}: la definición debe ser un objeto JSON")
+    _validate(config, os.path.basename(path))
+    return ExamDefinition(config, os.path.abspath(path))
+
+
+def load_exams(directory=EXAMS_DIR):
+    """Definiciones de examen de una carpeta, como {id: ExamDefinition} ordenado por id."""
+    exams = {}
+    for path in sorted(glob.glob(os.path.join(glob.escape(directory), '*.json'))):
+        exam = load_exam(path)
+        if exam.id in exams:
+            raise ExamConfigError(f"El id de examen '{exam.id}' está repetido en {os.path.basename(path)}")
+        exams[exam.id] = exam
+    return dict(sorted(exams.items()))
+
+
+def resolve_exams(selection, directory=EXAMS_DIR):
+    """
+    Exámenes a evaluar: ids de la carpeta, rutas a archivos .json o "auto" (todos).
+
+    Sin selección se usa el examen por defecto (base).
+    """
+    selection = list(selection or [DEFAULT_EXAM])
+    available = None
+    exams = []
+    for item in selection:
+        if item.endswith('.json'):
+            exams.append(load_exam(item))
+            continue
+        if available is None:
+            available = load_exams(directory)
+        if item == "auto":
+            if not available:
+                raise ExamConfigError(f"No hay definiciones de examen en '{directory}'")
+            exams.extend(available.values())
+        elif item in available:
+            exams.append(available[item])
+        else:
+            raise ExamConfigError(f"Examen desconocido '{item}'; disponibles: {', '.join(available) or 'ninguno'}")
+    unique = {}
+    for exam in exams:
+        unique.setdefault(exam.id, exam)
+    return list(unique.values())
@@ -0,0 +1,517 @@
+# scripts/formulas.py
+
+"""
+Evaluador de fórmulas en proceso para las celdas de respuesta.
+
+Cuando un archivo se guarda con una herramienta que no almacena el valor calculado
+de las fórmulas (<v>), las celdas de respuesta solo contienen el texto "=...". En
+lugar de recalcular el libro con una suite ofimática externa, se evalúa aquí el
+subconjunto de fórmulas que usan los estudiantes, con nombres en español o inglés
+y argumentos separados por "," o ";":
+
+    CONTARA/COUNTA, CONTAR.SI/COUNTIF, PROMEDIO/AVERAGE, MAX, MIN, SUMA/SUM,
+    CONTAR/COUNT, REDONDEAR/ROUND y BUSCARV/VLOOKUP
+
+más operadores aritméticos, comparaciones y concatenación. Los rangos se
+convierten una vez en arrays de NumPy y las funciones operan sobre el array
+completo. Solo se pueden referenciar celdas de los rangos leídos del envío; si
+una fórmula usa algo fuera de ese subconjunto se lanza FormulaError.
+"""
+
+import fnmatch
+import operator
+import re
+
+import numpy as np
+from openpyxl.utils import get_column_letter, range_boundaries
+
+ERROR_VALUES = ("#N/A", "#VALUE!", "#REF!", "#DIV/0!", "#NUM!", "#NAME?", "#NULL!")
+
+_TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:N/A|VALUE!|REF!|DIV/0!|NUM!|NAME\?|NULL!))
+  | (?P<func>[A-Za-z_][\w.]*(?=\s*\())
+  | (?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?
+             (?:\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?|\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}))
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<op><>|<=|>=|[-+*/^&=<>(),;%])
+""", re.VERBOSE)
+
+_COMPARISONS = {"=": operator.eq, "<>": operator.ne, "<": operator.lt, "<=": operator.le,
+                ">": operator.gt, ">=": operator.ge}
+_BOOLEANS = {"TRUE": True, "VERDADERO": True, "FALSE": False, "FALSO": False}
+
+
+class FormulaError(Exception):
+    """La fórmula usa algo que el evaluador no admite o no puede calcularse con los datos leídos."""
+
+
+class ExcelError(str):
+    """Valor de error de Excel (#N/A, #DIV/0!...); se propaga como en la hoja de cálculo."""
+
+
+class _Range:
+    """Valores de un rango como array 2D de objetos, con su versión numérica calculada una vez."""
+
+    def __init__(self, ref, values):
+        self.ref = ref
+        self.values = values
+        self._numbers = None
+
+    @property
+    def numbers(self):
+        """Array float con NaN en las celdas que no son números (texto, vacías, booleanos)."""
+        if self._numbers is None:
+            flat = self.values.ravel()
+            self._numbers = np.fromiter(
+                (value if _is_number(value) else np.nan for value in flat), dtype=float, count=len(flat)
+            ).reshape(self.values.shape)
+        return self._numbers
+
+    def scalar(self):
+        if self.values.size != 1:
+            raise FormulaError(f"Se esperaba una celda y se recibió el rango {self.ref}")
+        return self.values.flat[0]
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None:
+            raise FormulaError(f"No se reconoce la fórmula a partir de: {text[pos:]}")
+        kind = match.lastgroup
+        if kind != "space":
+            tokens.append((kind, match.group()))
+        pos = match.end()
+    return tokens
+
+
+def _to_number(value):
+    if isinstance(value, ExcelError):
+        return value
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if _is_number(value):
+        return value
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return ExcelError("#VALUE!")
+
+
+def _to_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _criterion(criterion):
+    """
+    Convierte el criterio de CONTAR.SI en una función que recibe un _Range y devuelve una máscara.
+
+    Admite un número, un texto (sin distinguir mayúsculas, con comodines * y ?) o un
+    texto con operador de comparación: ">5", "<>Very Positive", "=10".
+    """
+    op = "="
+    if isinstance(criterion, str) and not isinstance(criterion, ExcelError):
+        match = re.match(r"(<>|<=|>=|<|>|=)?(.*)$", criterion, re.S)
+        op, criterion = match.group(1) or "=", match.group(2)
+        try:
+            criterion = float(criterion)
+        except ValueError:
+            pass
+    compare = _COMPARISONS[op]
+
+    if _is_number(criterion) or isinstance(criterion, bool):
+        target = float(criterion)
+
+        def numeric_mask(rng):
+            numbers = rng.numbers
+            with np.errstate(invalid="ignore"):
+                mask = compare(numbers, target) & ~np.isnan(numbers)
+            if op == "<>":
+                mask |= np.isnan(numbers)  # Las celdas que no son números también son distintas
+            return mask
+        return numeric_mask
+
+    pattern = str(criterion).lower()
+
+    def text_mask(rng):
+        texts = np.array([_to_text(value).lower() if isinstance(value, str) else None
+                          for value in rng.values.ravel()], dtype=object).reshape(rng.values.shape)
+        is_text = np.not_equal(texts, None)
+        if op in ("=", "<>"):
+            if any(c in pattern for c in "*?"):
+                regex = re.compile(fnmatch.translate(pattern), re.S)
+                matches = np.array([bool(t is not None and regex.match(t)) for t in texts.ravel()],
+                                   dtype=bool).reshape(texts.shape)
+            else:
+                matches = is_text & (texts == pattern)
+            if op == "<>":
+                return ~matches
+            if pattern == "":
+                return matches | np.equal(rng.values, None)  # "=" cuenta las celdas vacías
+            return matches
+        return is_text & np.array([t is not None and compare(t, pattern) for t in texts.ravel()],
+                                  dtype=bool).reshape(texts.shape)
+    return text_mask
+
+
+def _numbers_of(args):
+    """Números de los argumentos de SUMA/PROMEDIO/MAX: los rangos ignoran texto y vacías."""
+    parts = []
+    for arg in args:
+        if isinstance(arg, _Range):
+            numbers = arg.numbers.ravel()
+            parts.append(numbers[~np.isnan(numbers)])
+        else:
+            number = _to_number(arg)
+            if isinstance(number, ExcelError):
+                return number
+            parts.append(np.array([number], dtype=float))
+    return np.concatenate(parts) if parts else np.array([], dtype=float)
+
+
+def _first_error(args):
+    for arg in args:
+        if isinstance(arg, _Range):
+            for value in arg.values.ravel():
+                if isinstance(value, ExcelError):
+                    return value
+        elif isinstance(arg, ExcelError):
+            return arg
+    return None
+
+
+def _python_number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _fn_counta(*args):
+    total = 0
+    for arg in args:
+        if isinstance(arg, _Range):
+            total += int(np.count_nonzero(np.not_equal(arg.values, None)))
+        elif arg is not None:
+            total += 1
+    return total
+
+
+def _fn_count(*args):
+    total = 0
+    for arg in args:
+        if isinstance(arg, _Range):
+            total += int(np.count_nonzero(~np.isnan(arg.numbers)))
+        elif not isinstance(_to_number(arg), ExcelError):
+            total += 1
+    return total
+
+
+def _fn_countif(rng, criterion):
+    if not isinstance(rng, _Range):
+        raise FormulaError("El primer argumento de CONTAR.SI debe ser un rango")
+    if isinstance(criterion, _Range):
+        criterion = criterion.scalar()
+    return int(np.count_nonzero(_criterion(criterion)(rng)))
+
+
+def _aggregate(func, empty):
+    def wrapper(*args):
+        error = _first_error(args)
+        if error is not None:
+            return error
+        numbers = _numbers_of(args)
+        if isinstance(numbers, ExcelError):
+            return numbers
+        if numbers.size == 0:
+            return empty
+        return _python_number(func(numbers))
+    return wrapper
+
+
+def _fn_round(value, digits=0):
+    value, digits = _to_number(_scalar(value)), _to_number(_scalar(digits))
+    for item in (value, digits):
+        if isinstance(item, ExcelError):
+            return item
+    # Redondeo de Excel: la mitad se aleja de cero
+    factor = 10 ** int(digits)
+    rounded = np.floor(abs(value) * factor + 0.5) / factor
+    return _python_number(np.copysign(rounded, value))
+
+
+def _fn_vlookup(lookup, table, col_index, approximate=True):
+    if not isinstance(table, _Range):
+        raise FormulaError("El segundo argumento de BUSCARV debe ser un rango")
+    lookup, col_index = _scalar(lookup), _to_number(_scalar(col_index))
+    approximate = bool(_scalar(approximate)) if approximate is not None else False
+    for item in (lookup, col_index):
+        if isinstance(item, ExcelError):
+            return item
+    col_index = int(col_index)
+    if not 1 <= col_index <= table.values.shape[1]:
+        return ExcelError("#REF!")
+
+    keys = table.values[:, 0]
+    if isinstance(lookup, str):
+        texts = np.array([value.lower() if isinstance(value, str) else None for value in keys], dtype=object)
+        target = lookup.lower()
+        if approximate:
+            candidates = np.flatnonzero(np.not_equal(texts, None)
+                                        & np.array([t is not None and t <= target for t in texts], dtype=bool))
+        elif any(c in target for c in "*?"):
+            regex = re.compile(fnmatch.translate(target), re.S)
+            candidates = np.flatnonzero([t is not None and bool(regex.match(t)) for t in texts])
+        else:
+            candidates = np.flatnonzero(texts == target)
+    else:
+        target = _to_number(lookup)
+        if isinstance(target, ExcelError):
+            return target
+        numbers = table.numbers[:, 0]
+        with np.errstate(invalid="ignore"):
+            candidates = np.flatnonzero(numbers <= target if approximate else numbers == target)
+
+    if candidates.size == 0:
+        return ExcelError("#N/A")
+    # Búsqueda exacta: primera coincidencia; aproximada (tabla ordenada): última menor o igual
+    row = candidates[-1] if approximate else candidates[0]
+    return table.values[row, col_index - 1]
+
+
+def _scalar(value):
+    return value.scalar() if isinstance(value, _Range) else value
+
+
+FUNCTIONS = {
+    "COUNTA": _fn_counta, "CONTARA": _fn_counta,
+    "COUNT": _fn_count, "CONTAR": _fn_count,
+    "COUNTIF": _fn_countif, "CONTAR.SI": _fn_countif,
+    "AVERAGE": _aggregate(np.mean, ExcelError("#DIV/0!")), "PROMEDIO": _aggregate(np.mean, ExcelError("#DIV/0!")),
+    "MAX": _aggregate(np.max, 0),
+    "MIN": _aggregate(np.min, 0),
+    "SUM": _aggregate(np.sum, 0), "SUMA": _aggregate(np.sum, 0),
+    "ROUND": _fn_round, "REDONDEAR": _fn_round,
+    "VLOOKUP": _fn_vlookup, "BUSCARV": _fn_vlookup,
+}
+
+
+class FormulaEvaluator:
+    """
+    Calcula fórmulas sobre las celdas ya leídas de un envío (SubmissionData).
+
+    Las celdas con fórmula referenciadas usan su valor guardado o, si no lo tienen,
+    se evalúan a su vez; los resultados y los rangos se memorizan por envío.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._values = {}
+        self._ranges = {}
+        self._evaluating = set()
+
+    def cell_value(self, coordinate):
+        """Valor de una celda: el guardado en el archivo o, para fórmulas sin él, el calculado."""
+        cell = self.data.cell(coordinate)
+        if cell.data_type == 'e':
+            return ExcelError(cell.value)
+        if cell.data_type != 'f':
+            return cell.value
+        if cell.cached is not None:
+            return ExcelError(cell.cached) if cell.cached in ERROR_VALUES else cell.cached
+        if coordinate not in self._values:
+            if coordinate in self._evaluating:
+                raise FormulaError(f"Referencia circular en {coordinate}")
+            self._evaluating.add(coordinate)
+            try:
+                self._values[coordinate] = self.evaluate(cell.value)
+            finally:
+                self._evaluating.discard(coordinate)
+        return self._values[coordinate]
+
+    def evaluate(self, formula):
+        """Evalúa el texto de una fórmula ("=PROMEDIO(K6:K35)") y devuelve su valor."""
+        tokens = _tokenize(str(formula).lstrip("="))
+        if not tokens:
+            raise FormulaError("Fórmula vacía")
+        parser = _Parser(tokens, self)
+        value = parser.expression()
+        if parser.pos != len(tokens):
+            raise FormulaError(f"Símbolo inesperado: {tokens[parser.pos][1]}")
+        return _scalar(value)
+
+    @staticmethod
+    def references(formula):
+        """Referencias a celdas o rangos que contiene la fórmula."""
+        try:
+            return [text for kind, text in _tokenize(str(formula).lstrip("=")) if kind == "ref"]
+        except FormulaError:
+            return []
+
+    def range(self, ref):
+        """_Range con los valores de la referencia; solo admite la hoja activa y celdas leídas."""
+        sheet, _, address = ref.rpartition("!")
+        if sheet and sheet.strip("'").replace("''", "'") != self.data.active_sheet:
+            raise FormulaError(f"Referencia a otra hoja: {ref}")
+        address = address.replace("$", "").upper()
+        if address not in self._ranges:
+            min_col, min_row, max_col, max_row = range_boundaries(address)
+            if min_row is None or min_col is None:
+                raise FormulaError(f"No se admiten filas o columnas completas: {address}")
+            if not self.data.covers(min_col, min_row, max_col, max_row):
+                raise FormulaError(f"El rango {address} no está entre las celdas leídas del envío")
+            values = np.empty((max_row - min_row + 1, max_col - min_col + 1), dtype=object)
+            for col in range(min_col, max_col + 1):
+                letter = get_column_letter(col)
+                for row in range(min_row, max_row + 1):
+                    values[row - min_row, col - min_col] = self.cell_value(f"{letter}{row}")
+            self._ranges[address] = _Range(address, values)
+        return self._ranges[address]
+
+
+class _Parser:
+    """Analizador descendente recursivo que evalúa la fórmula a medida que la recorre."""
+
+    def __init__(self, tokens, evaluator):
+        self.tokens = tokens
+        self.pos = 0
+        self.evaluator = evaluator
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, text=None):
+        kind, value = self.peek()
+        if kind is None or (text is not None and value != text):
+            raise FormulaError(f"Se esperaba '{text}'" if text else "Fórmula incompleta")
+        self.pos += 1
+        return kind, value
+
+    def expression(self):
+        left = self.concatenation()
+        while self.peek()[1] in _COMPARISONS:
+            compare = _COMPARISONS[self.take()[1]]
+            right = self.concatenation()
+            left, right = _scalar(left), _scalar(right)
+            error = _first_error([left, right])
+            if error is not None:
+                left = error
+            elif _is_number(left) and _is_number(right):
+                left = compare(left, right)
+            else:
+                left = compare(_to_text(left).lower(), _to_text(right).lower())
+        return left
+
+    def concatenation(self):
+        left = self.additive()
+        while self.peek()[1] == "&":
+            self.take()
+            right = self.additive()
+            left, right = _scalar(left), _scalar(right)
+            left = _first_error([left, right]) or _to_text(left) + _to_text(right)
+        return left
+
+    def _arithmetic(self, operand, operators):
+        left = operand()
+        while self.peek()[1] in operators:
+            op = operators[self.take()[1]]
+            right = operand()
+            left, right = _to_number(_scalar(left)), _to_number(_scalar(right))
+            error = _first_error([left, right])
+            if error is not None:
+                left = error
+            elif op is operator.truediv and right == 0:
+                left = ExcelError("#DIV/0!")
+            else:
+                left = op(left, right)
+        return left
+
+    def additive(self):
+        return self._arithmetic(self.multiplicative, {"+": operator.add, "-": operator.sub})
+
+    def multiplicative(self):
+        return self._arithmetic(self.power, {"*": operator.mul, "/": operator.truediv})
+
+    def power(self):
+        return self._arithmetic(self.unary, {"^": operator.pow})
+
+    def unary(self):
+        if self.peek()[1] in ("-", "+"):
+            sign = self.take()[1]
+            value = _to_number(_scalar(self.unary()))
+            if isinstance(value, ExcelError) or sign == "+":
+                return value
+            return -value
+        value = self.primary()
+        if self.peek()[1] == "%":
+            self.take()
+            value = _to_number(_scalar(value))
+            if not isinstance(value, ExcelError):
+                value = value / 100
+        return value
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == "number":
+            return _python_number(text)
+        if kind == "string":
+            return text[1:-1].replace('""', '"')
+        if kind == "error":
+            return ExcelError(text)
+        if kind == "ref":
+            return self.evaluator.range(text)
+        if kind == "name":
+            if text.upper() in _BOOLEANS:
+                return _BOOLEANS[text.upper()]
+            raise FormulaError(f"Nombre no admitido: {text}")
+        if kind == "func":
+            return self.call(text)
+        if text == "(":
+            value = self.expression()
+            self.take(")")
+            return value
+        raise FormulaError(f"Símbolo inesperado: {text}")
+
+    def call(self, name):
+        key = name.upper()
+        if key.startswith("_XLFN."):
+            key = key[len("_XLFN."):]
+        if key in _BOOLEANS:  # VERDADERO() / FALSO()
+            self.take("(")
+            self.take(")")
+            return _BOOLEANS[key]
+        func = FUNCTIONS.get(key)
+        if func is None:
+            raise FormulaError(f"Función no admitida: {name}")
+        self.take("(")
+        args = []
+        if self.peek()[1] != ")":
+            while True:
+                if self.peek()[1] in (",", ";", ")"):
+                    args.append(None)  # Argumento omitido: BUSCARV(x;rango;2;)
+                else:
+                    args.append(self.expression())
+                if self.peek()[1] in (",", ";"):
+                    self.take()
+                    continue
+                break
+        self.take(")")
+        try:
+            return func(*args)
+        except TypeError:
+            raise FormulaError(f"Número de argumentos incorrecto en {name}")
@@ -0,0 +1,321 @@
+# scripts/grading_service.py
+
+"""
+Servicio HTTP local de evaluación (asyncio, solo biblioteca estándar).
+
+Mantiene un pool de procesos ya inicializados (con pandas/openpyxl importados y la
+clave de respuestas cargada), de modo que cada petición solo paga la evaluación
+del envío. Los procesos están aislados (ver isolated_runner): si uno se cuelga,
+agota la memoria o cae, esa petición responde con una fila de Error y el proceso
+se reemplaza por otro ya inicializado; si una petición no termina a tiempo se
+responde 504 y se detiene el proceso que la evaluaba. Un hilo supervisor es el
+único que maneja el pool; el bucle de asyncio le pasa las peticiones por una cola.
+Rutas:
+
+    POST /evaluar?nombre=Juan_evaluacion.xlsx   cuerpo: bytes del .xlsx
+         -> {"archivo", "filas", "resumen", "errores_archivo", "segundos"}; 422 con el
+            mismo contenido (y "error") si el archivo no se pudo evaluar
+    GET  /salud      -> estado del servicio ("ok", "recuperando" mientras se reemplazan
+                        procesos) y de la clave de respuestas
+    GET  /metricas   -> profundidad de la cola, peticiones atendidas y latencias
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from evaluate_submissions import failure_records, get_answer_key, init_worker, rubric_version
+from evaluation_api import DEFAULT_FILENAME, SubmissionResult, grade
+from isolated_runner import DEFAULT_MAX_MEMORY_MB, IsolatedPool, TaskFailure
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_QUEUE = 64  # Peticiones admitidas (en cola o en evaluación) antes de responder 503
+REQUEST_TIMEOUT = 60.0  # Segundos máximos por petición, incluida la espera en cola
+SUPERVISOR_POLL = 0.1  # Intervalo de vigilancia del pool en el hilo supervisor
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error", 503: "Service Unavailable",
+            504: "Gateway Timeout"}
+
+
+class HTTPError(Exception):
+    """Error de la petición que se responde con el código indicado (y payload como cuerpo, si se da)."""
+
+    def __init__(self, status, message, payload=None):
+        super().__init__(message)
+        self.status = status
+        self.payload = payload
+
+
+def _grade_bytes(task):
+    """Evalúa un envío (nombre, bytes) en un proceso de trabajo, desde memoria; devuelve sus filas."""
+    filename, data = task
+    return grade(data, filename).records
+
+
+def _safe_filename(name):
+    """Nombre de archivo sin rutas ni caracteres problemáticos, con extensión .xlsx/.xlsm."""
+    name = os.path.basename(name or "").strip()
+    name = re.sub(r'[^\w .()-]', '_', name)
+    if not (name.endswith('.xlsx') or name.endswith('.xlsm')):
+        name = (name or os.path.splitext(DEFAULT_FILENAME)[0]) + '.xlsx'
+    return name
+
+
+class GradingService:
+    """Servicio de evaluación: pool de procesos aislados precalentado y métricas de la cola."""
+
+    def __init__(self, workers=1, max_queue=MAX_QUEUE, max_upload=MAX_UPLOAD_BYTES, timeout=REQUEST_TIMEOUT,
+                 max_memory_mb=DEFAULT_MAX_MEMORY_MB):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.max_upload = max_upload
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self.pool = None
+        self.rubric_version = None
+        self.started = time.time()
+        self.pending = 0
+        self.served = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.ready_workers = 0  # Procesos listos, según el último sondeo del supervisor
+        self.spawned_workers = 0  # Procesos arrancados en total (incluye los reemplazos)
+        self._keys = itertools.count()
+        self._futures = {}  # clave -> asyncio.Future de la petición
+        self._commands = queue.Queue()  # ("evaluar", clave, (nombre, bytes)), ("cancelar", clave, None) o None
+        self._wake_reader, self._wake_writer = mp.Pipe(duplex=False)
+        self._supervisor = None
+
+    async def start(self):
+        """Carga la clave de respuestas, arranca los procesos de trabajo y espera a que estén listos."""
+        get_answer_key()
+        self.rubric_version = rubric_version()
+        self.pool = IsolatedPool(_grade_bytes, self.workers, timeout=self.timeout,
+                                 max_memory_mb=self.max_memory_mb, initializer=init_worker, keep_warm=True)
+        self._supervisor = threading.Thread(target=self._supervise, args=(asyncio.get_running_loop(),),
+                                            name="supervisor", daemon=True)
+        self._supervisor.start()
+        while self.ready_workers < self.workers:
+            await asyncio.sleep(SUPERVISOR_POLL)
+
+    def close(self):
+        if self._supervisor is not None:
+            self._send(None)
+            self._supervisor.join()
+            self._supervisor = None
+
+    def _send(self, command):
+        """Pasa una orden al hilo supervisor y lo despierta."""
+        self._commands.put(command)
+        self._wake_writer.send(None)
+
+    def _supervise(self, loop):
+        """Hilo supervisor: envía las peticiones al pool, recoge los resultados y mantiene los procesos."""
+        try:
+            while True:
+                while not self._commands.empty():
+                    command = self._commands.get()
+                    if command is None:
+                        return
+                    action, key, task = command
+                    if action == "evaluar":
+                        self.pool.submit(key, task)
+                    else:
+                        self.pool.cancel(key)
+                for key, result in self.pool.collect(SUPERVISOR_POLL, wake=[self._wake_reader]):
+                    loop.call_soon_threadsafe(self._resolve, key, result)
+                while self._wake_reader.poll():
+                    self._wake_reader.recv()
+                self.ready_workers, self.spawned_workers = self.pool.ready, self.pool.started
+        finally:
+            self.pool.close()
+
+    def _resolve(self, key, result):
+        future = self._futures.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    async def grade(self, filename, data):
+        if self.pending >= self.max_queue:
+            self.rejected += 1
+            raise HTTPError(503, f"Cola llena ({self.pending} peticiones pendientes)")
+        self.pending += 1
+        start = time.perf_counter()
+        key = next(self._keys)
+        try:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[key] = future
+            self._send(("evaluar", key, (filename, data)))
+            try:
+                result = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                self._futures.pop(key, None)
+                self._send(("cancelar", key, None))  # Se detiene el proceso si ya la estaba evaluando
+                self.timed_out += 1
+                raise HTTPError(504, f"La evaluación no terminó en {self.timeout:g} s")
+            if isinstance(result, TaskFailure):  # Cuelgue, memoria o caída: se informa como fila de Error
+                self.failed += 1
+                records, _ = failure_records(filename, result)
+            else:
+                records = result
+        finally:
+            self._futures.pop(key, None)
+            self.pending -= 1
+        elapsed = time.perf_counter() - start
+        self.served += 1
+        self.total_seconds += elapsed
+        self.max_seconds = max(self.max_seconds, elapsed)
+        result = SubmissionResult(filename, records)
+        payload = {**result.to_dict(), "segundos": round(elapsed, 4)}
+        if not result.questions and result.errors:  # Rechazado, ilegible o fallo del proceso
+            raise HTTPError(422, result.errors[0], {"error": result.errors[0], **payload})
+        return payload
+
+    def health(self):
+        if self.pool is None:
+            status = "iniciando"
+        elif self.ready_workers < self.workers:
+            status = "recuperando"  # Algún proceso cayó o se recicló y su reemplazo aún se inicializa
+        else:
+            status = "ok"
+        return {"estado": status, "workers": self.workers, "workers_listos": self.ready_workers,
+                "procesos_reemplazados": max(0, self.spawned_workers - self.workers),
+                "version_rubrica": self.rubric_version, "activo_desde": round(time.time() - self.started, 1)}
+
+    def metrics(self):
+        return {
+            "en_cola": max(0, self.pending - self.workers),
+            "en_evaluacion": min(self.pending, self.workers),
+            "pendientes": self.pending,
+            "capacidad_cola": self.max_queue,
+            "atendidas": self.served,
+            "fallidas": self.failed,
+            "tiempo_agotado": self.timed_out,
+            "rechazadas": self.rejected,
+            "latencia_media_ms": round(self.total_seconds / self.served * 1000, 2) if self.served else None,
+            "latencia_max_ms": round(self.max_seconds * 1000, 2),
+        }
+
+    async def route(self, method, target, headers, body):
+        url = urlsplit(target)
+        if url.path == "/salud":
+            if method != "GET":
+                raise HTTPError(405, "Usa GET")
+            return self.health()
+        if url.path == "/metricas":
+            if method != "GET":
+                raise HTTPError(405, "Usa GET")
+            return self.metrics()
+        if url.path == "/evaluar":
+            if method != "POST":
+                raise HTTPError(405, "Usa POST con los bytes del archivo .xlsx")
+            if not body:
+                raise HTTPError(400, "El cuerpo de la petición está vacío")
+            name = parse_qs(url.query).get("nombre", [headers.get("x-filename", DEFAULT_FILENAME)])[0]
+            return await self.grade(_safe_filename(name), body)
+        raise HTTPError(404, f"Ruta no encontrada: {url.path}")
+
+    async def handle(self, reader, writer):
+        """Atiende una conexión HTTP/1.1 (una petición por conexión)."""
+        try:
+            try:
+                method, target, headers, body = await self._read_request(reader, writer)
+                status, payload = 200, await self.route(method, target, headers, body)
+            except HTTPError as e:
+                status, payload = e.status, e.payload or {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"Error inesperado al evaluar: {e}"}
+            self._write_response(writer, status, payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader, writer):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise HTTPError(400, "Petición HTTP no válida")
+        method, target, _ = parts
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1')
+            if line in ('\r\n', '\n', ''):
+                break
+            key, _, value = line.partition(':')
+            headers[key.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Content-Length no válido")
+        if length > self.max_upload:
+            raise HTTPError(413, f"El archivo supera el máximo de {self.max_upload} bytes")
+        if length and headers.get('expect', '').lower() == '100-continue':
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    @staticmethod
+    def _write_response(writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=1, max_queue=MAX_QUEUE, timeout=REQUEST_TIMEOUT,
+                max_memory_mb=DEFAULT_MAX_MEMORY_MB):
+    """Arranca el servicio y atiende peticiones hasta que se interrumpa."""
+    service = GradingService(workers, max_queue, timeout=timeout, max_memory_mb=max_memory_mb)
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Servicio de evaluación en http://{host}:{port} ({service.workers} proceso(s) listos)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    """Inicia el servicio desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de evaluación de envíos.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Dirección de escucha (por defecto {DEFAULT_HOST})")
+    parser.add_argument('--puerto', type=int, default=DEFAULT_PORT, help=f"Puerto (por defecto {DEFAULT_PORT})")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos de evaluación precalentados")
+    parser.add_argument('--cola', type=int, default=MAX_QUEUE, help="Peticiones pendientes admitidas antes de 503")
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT,
+                        help="Segundos máximos por petición antes de responder 504 "
+                             f"(por defecto {REQUEST_TIMEOUT:g})")
+    parser.add_argument('--max-memoria', type=float, default=DEFAULT_MAX_MEMORY_MB,
+                        help="Memoria adicional máxima por proceso en MB, sobre la que ocupa al arrancar "
+                             f"(por defecto {DEFAULT_MAX_MEMORY_MB})")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.puerto, args.workers, args.cola, args.timeout, args.max_memoria))
+    except KeyboardInterrupt:
+        print("\nServicio detenido.")
+
+
+if __name__ == "__main__":
+    main()
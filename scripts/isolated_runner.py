@@ -0,0 +1,341 @@
+# scripts/isolated_runner.py
+
+"""
+Ejecución aislada de tareas en procesos de trabajo supervisados.
+
+A diferencia de ProcessPoolExecutor, cada proceso se vigila por separado: si una
+tarea supera el tiempo máximo, si el proceso supera la memoria permitida o si
+termina de forma abrupta (segfault en una extensión en C, kill del sistema), se
+detiene solo ese proceso, la tarea se informa como TaskFailure y se arranca otro
+proceso para las tareas restantes. Los procesos se reciclan tras un número de
+tareas para acotar el crecimiento de memoria en ejecuciones largas.
+
+El límite de memoria es la memoria adicional que puede usar cada proceso sobre la
+que ocupa al arrancar (tras el inicializador), y se aplica de dos formas: dentro
+del proceso con RLIMIT_AS (el límite que Linux aplica de verdad, pues ignora
+RLIMIT_RSS), de modo que una asignación excesiva produce MemoryError, y desde el
+supervisor comparando la RSS real en /proc con la RSS base que informa el proceso.
+
+Los procesos no se crean con fork: el proceso principal tiene otros hilos (lectura
+anticipada, supervisor del servicio) y un hijo creado con fork mientras uno de ellos
+tiene tomado un lock (del intérprete de E/S, de logging, de malloc) lo hereda tomado
+y puede bloquearse para siempre. Se usa forkserver (spawn donde no existe): los
+procesos se crean desde un servidor de un solo hilo que ya tiene importados los
+módulos de func y del inicializador, de modo que arrancar o reemplazar un proceso no
+repite esas importaciones. func, el inicializador y sus argumentos deben poder
+serializarse con pickle (funciones de nivel de módulo).
+"""
+
+import multiprocessing as mp
+import os
+import time
+from collections import deque, namedtuple
+from multiprocessing.connection import wait
+
+try:
+    import resource
+except ImportError:  # Windows: sin límites de memoria dentro del proceso
+    resource = None
+
+DEFAULT_TIMEOUT = 120.0  # Segundos máximos por tarea
+DEFAULT_MAX_MEMORY_MB = 1024  # Memoria adicional permitida a cada proceso
+DEFAULT_RECYCLE_AFTER = 100  # Tareas por proceso antes de reemplazarlo
+POLL_SECONDS = 0.5  # Intervalo de vigilancia de tiempos y memoria
+SHUTDOWN_SECONDS = 5.0
+READY = "listo"  # Primer mensaje de un proceso de trabajo, con su RSS base en bytes
+
+# kind: "tiempo", "memoria", "caida" o "error" (excepción no capturada por la tarea)
+TaskFailure = namedtuple("TaskFailure", ["kind", "message", "seconds"])
+
+
+def _proc_bytes(pid, field):
+    """Campo de /proc/<pid>/statm en bytes (0: memoria virtual, 1: RSS), o None si no existe."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[field]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _context(preload):
+    """Contexto de multiprocessing de los procesos de trabajo (ver el docstring del módulo)."""
+    if "forkserver" not in mp.get_all_start_methods():
+        return mp.get_context("spawn")
+    context = mp.get_context("forkserver")
+    # Solo tiene efecto si el servidor aún no arrancó (es uno por proceso principal)
+    context.set_forkserver_preload(sorted(preload))
+    return context
+
+
+def _limit_memory(max_memory_mb):
+    """Limita el espacio de direcciones del proceso actual a su tamaño actual más max_memory_mb."""
+    if resource is None or not max_memory_mb:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = (_proc_bytes(os.getpid(), 0) or 0) + int(max_memory_mb * 1024 * 1024)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _worker_main(conn, func, initializer, initargs, max_memory_mb):
+    """Bucle de un proceso de trabajo: recibe (clave, argumento) y responde (clave, ok, valor)."""
+    if initializer is not None:
+        initializer(*initargs)
+    _limit_memory(max_memory_mb)
+    conn.send((READY, _proc_bytes(os.getpid(), 1)))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        key, arg = task
+        try:
+            reply = (key, True, func(arg))
+        except BaseException as e:  # MemoryError, RecursionError... se informan sin tumbar el proceso
+            reply = (key, False, (type(e).__name__, str(e)))
+        try:
+            conn.send(reply)
+        except (OSError, ValueError, MemoryError) as e:
+            conn.send((key, False, (type(e).__name__, f"No se pudo devolver el resultado: {e}")))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context, func, initializer, initargs, max_memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, daemon=True,
+                                       args=(child_conn, func, initializer, initargs, max_memory_mb))
+        self.process.start()
+        child_conn.close()
+        self.task = None  # (clave, inicio) de la tarea en curso
+        self.done = 0
+        self.base_rss = None  # RSS al terminar de arrancar, en bytes (None hasta que el proceso la informa)
+        self.ready = False  # El proceso terminó de arrancar (envió READY)
+
+    def reply(self):
+        """Respuesta (clave, ok, valor) de la tarea en curso, o None si aún no llegó."""
+        while self.conn.poll():
+            message = self.conn.recv()
+            if message[0] == READY:
+                self.base_rss = message[1]
+                self.ready = True
+            else:
+                return message
+        return None
+
+    def assign(self, key, arg):
+        self.conn.send((key, arg))
+        self.task = (key, time.monotonic())
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(SHUTDOWN_SECONDS)
+        self.kill()
+
+
+class IsolatedPool:
+    """
+    Ejecuta func(arg) para cada argumento en procesos aislados y vigilados.
+
+    map() produce (arg, resultado) en el orden de entrada; el resultado es el valor
+    devuelto por func o una TaskFailure si la tarea no terminó correctamente.
+
+    Para tareas que llegan de una en una (modo de vigilancia, servicio), submit(clave,
+    arg) encola una tarea, collect() devuelve las terminadas en cualquier orden y
+    cancel(clave) la retira de la cola o detiene su proceso. Con keep_warm se
+    mantienen siempre workers procesos arrancados, reemplazando los que caen, para
+    que la siguiente tarea no espere al inicializador.
+    """
+
+    def __init__(self, func, workers=1, timeout=DEFAULT_TIMEOUT, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+                 recycle_after=DEFAULT_RECYCLE_AFTER, initializer=None, initargs=(), keep_warm=False):
+        self.func = func
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_memory_mb = max_memory_mb
+        self.recycle_after = recycle_after
+        self.initializer = initializer
+        self.initargs = initargs
+        self.keep_warm = keep_warm
+        self.context = _context({f.__module__ for f in (func, initializer) if f is not None})
+        self.started = 0  # Procesos arrancados (incluye los reemplazos)
+        self._workers = []
+        self._queue = deque()  # (clave, arg) a la espera de un proceso libre
+
+    def _spawn(self):
+        self.started += 1
+        return _Worker(self.context, self.func, self.initializer, self.initargs, self.max_memory_mb)
+
+    @property
+    def pending(self):
+        """Tareas en cola o en ejecución."""
+        return len(self._queue) + sum(worker.task is not None for worker in self._workers)
+
+    @property
+    def ready(self):
+        """Procesos arrancados e inicializados."""
+        return sum(worker.ready for worker in self._workers)
+
+    def has_capacity(self):
+        """Indica si una tarea enviada ahora empezaría sin esperar a que termine otra."""
+        return not self._queue and (len(self._workers) < self.workers
+                                    or any(worker.task is None for worker in self._workers))
+
+    def submit(self, key, arg):
+        """Encola func(arg); su resultado lo devuelve collect() con la clave key."""
+        self._queue.append((key, arg))
+        self._dispatch()
+
+    def cancel(self, key):
+        """Retira la tarea key de la cola o, si ya se está ejecutando, detiene su proceso."""
+        for item in self._queue:
+            if item[0] == key:
+                self._queue.remove(item)
+                return
+        for worker in self._workers:
+            if worker.task is not None and worker.task[0] == key:
+                worker.kill()
+                self._workers.remove(worker)
+                self._dispatch()
+                return
+
+    def _dispatch(self):
+        """Asigna las tareas en cola a los procesos libres, arrancando los que falten."""
+        while self._queue:
+            worker = next((worker for worker in self._workers if worker.task is None), None)
+            if worker is None:
+                if len(self._workers) >= self.workers:
+                    break
+                worker = self._spawn()
+                self._workers.append(worker)
+            worker.assign(*self._queue.popleft())
+        while self.keep_warm and len(self._workers) < self.workers:
+            self._workers.append(self._spawn())
+
+    def _check(self, worker, now):
+        """Devuelve (clave, resultado) si la tarea del proceso terminó o falló, o None si sigue en curso."""
+        key, start = worker.task
+        elapsed = now - start
+        try:
+            reply = worker.reply()
+        except (EOFError, OSError):
+            reply = None  # El proceso murió mientras respondía: se trata abajo como caída
+        if reply is not None:
+            _, ok, value = reply
+            if ok:
+                return key, value
+            error_type, message = value
+            if error_type == "MemoryError":
+                return key, TaskFailure("memoria", f"La evaluación superó la memoria adicional máxima de "
+                                          f"{self.max_memory_mb:g} MB (MemoryError)", elapsed)
+            return key, TaskFailure("error", f"{error_type}: {message}" if message else error_type, elapsed)
+        if not worker.process.is_alive():
+            code = worker.process.exitcode
+            reason = f"terminado por la señal {-code}" if code is not None and code < 0 else f"código {code}"
+            return key, TaskFailure("caida", f"El proceso de evaluación terminó inesperadamente ({reason})",
+                                      elapsed)
+        if self.timeout and elapsed > self.timeout:
+            return key, TaskFailure("tiempo", f"La evaluación superó el tiempo máximo de {self.timeout:g} s",
+                                      elapsed)
+        if self.max_memory_mb and worker.base_rss is not None:
+            rss = _proc_bytes(worker.process.pid, 1)
+            if rss is not None and rss - worker.base_rss > self.max_memory_mb * 1024 * 1024:
+                return key, TaskFailure("memoria", f"La evaluación superó la memoria adicional máxima de "
+                                          f"{self.max_memory_mb:g} MB ({(rss - worker.base_rss) / 2**20:.0f} MB "
+                                          f"sobre los {worker.base_rss / 2**20:.0f} MB del proceso al arrancar)",
+                                          elapsed)
+        return None
+
+    def collect(self, timeout=POLL_SECONDS, wake=()):
+        """
+        Espera hasta timeout segundos a que termine alguna tarea y devuelve [(clave, resultado)].
+
+        Los procesos que fallan se detienen y se reemplazan; wake son objetos adicionales
+        (conexiones, sockets) cuya disponibilidad interrumpe la espera.
+        """
+        if self._workers or wake:
+            wait([worker.conn for worker in self._workers] + [worker.process.sentinel for worker in self._workers]
+                 + list(wake), timeout=timeout)
+        now = time.monotonic()
+        finished = []
+        for position, worker in enumerate(self._workers):
+            if worker.task is None:
+                try:
+                    worker.reply()  # Aviso de proceso listo
+                except (EOFError, OSError):
+                    pass
+                if not worker.process.is_alive():  # Caído sin tarea (p.ej. el OOM killer)
+                    worker.kill()
+                    self._workers[position] = None
+                continue
+            outcome = self._check(worker, now)
+            if outcome is None:
+                continue
+            finished.append(outcome)
+            worker.task = None
+            worker.done += 1
+            if isinstance(outcome[1], TaskFailure) and outcome[1].kind != "error":
+                worker.kill()
+            elif worker.done >= self.recycle_after:
+                worker.stop()
+            else:
+                continue
+            self._workers[position] = None  # Se arranca otro proceso cuando haga falta
+        self._workers = [worker for worker in self._workers if worker is not None]
+        self._dispatch()
+        return finished
+
+    def close(self):
+        """Detiene todos los procesos; las tareas en cola o en curso se descartan."""
+        for worker in self._workers:
+            if worker.task is None:
+                worker.stop()
+            else:
+                worker.kill()
+        self._workers = []
+        self._queue.clear()
+
+    def map(self, args):
+        """
+        Produce (arg, resultado) en el orden de args.
+
+        Los argumentos se toman del iterable solo cuando hay un proceso libre, de modo
+        que un generador (p.ej. con lectura anticipada acotada) no se consume de golpe.
+        """
+        source = enumerate(args)
+        exhausted = False
+        submitted = {}  # índice -> argumento de las tareas aún no entregadas
+        finished = {}
+        next_index = 0
+        try:
+            while True:
+                while not exhausted and self.has_capacity():
+                    item = next(source, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    submitted[item[0]] = item[1]
+                    self.submit(*item)
+                if not self.pending:
+                    break
+                finished.update(self.collect())
+                while next_index in finished:
+                    yield submitted.pop(next_index), finished.pop(next_index)
+                    next_index += 1
+        finally:
+            self.close()
@@ -0,0 +1,108 @@
+# scripts/merge_results.py
+
+"""
+Combina los resultados parciales de los fragmentos (--shard i/N) en un solo informe.
+
+Comprueba que estén todos los fragmentos de la misma ejecución (mismo N y misma
+versión de la rúbrica) y que ningún envío aparezca dos veces; después escribe
+evaluation_results.xlsx con los envíos ordenados por nombre de archivo, igual que
+una ejecución en una sola máquina, la hoja de envíos parecidos (con los rasgos de
+similitud de todos los fragmentos) y la hoja de rendimiento de todos los fragmentos.
+"""
+
+import argparse
+
+from evaluate_submissions import RESULTS_FILE, export_records
+from profiling import PERFORMANCE_SHEET, TIMINGS_COLUMNS, summarize_timings
+from report_writer import ReportWriter
+from results_export import EXPORT_FORMATS
+from sharding import find_partials, read_partial
+from similarity import (DEFAULT_THRESHOLD, SIMILARITY_COLUMNS, SIMILARITY_FORMATS, SIMILARITY_SHEET,
+                        SimilarityIndex)
+
+
+class MergeError(Exception):
+    """Los parciales no forman una ejecución completa y coherente."""
+
+
+def load_partials(results_file=RESULTS_FILE, count=None):
+    """
+    Lee los parciales de una ejecución en count fragmentos (None: el único N presente).
+
+    Devuelve (versión de la rúbrica, envíos ordenados por nombre de archivo).
+    """
+    partials = find_partials(results_file)
+    counts = sorted({n for _, n in partials})
+    if count is None:
+        if not counts:
+            raise MergeError(f"No se encontraron resultados parciales junto a '{results_file}'")
+        if len(counts) > 1:
+            raise MergeError(f"Hay parciales de repartos distintos (N = {', '.join(map(str, counts))}); "
+                             f"indica cuál combinar con --fragmentos")
+        count = counts[0]
+
+    missing = [i for i in range(1, count + 1) if (i, count) not in partials]
+    if missing:
+        raise MergeError(f"Faltan los fragmentos {', '.join(f'{i}/{count}' for i in missing)}; "
+                         f"ejecútalos con --shard antes de combinar")
+
+    version = None
+    submissions = {}
+    for index in range(1, count + 1):
+        header, entries = read_partial(partials[(index, count)])
+        if version is None:
+            version = header["version_rubrica"]
+        elif header["version_rubrica"] != version:
+            raise MergeError(f"El fragmento {index}/{count} se evaluó con otra versión de la rúbrica "
+                             f"({header['version_rubrica']} frente a {version}); vuelve a ejecutarlo")
+        for entry in entries:
+            if entry["archivo"] in submissions:
+                raise MergeError(f"El envío '{entry['archivo']}' aparece en más de un fragmento")
+            submissions[entry["archivo"]] = entry
+    return version, [submissions[name] for name in sorted(submissions)]
+
+
+def merge(results_file=RESULTS_FILE, count=None, export_format=None, similarity_threshold=DEFAULT_THRESHOLD):
+    """Genera el informe combinado; devuelve el número de envíos."""
+    _, submissions = load_partials(results_file, count)
+    writer = ReportWriter(results_file)
+    similar = SimilarityIndex(similarity_threshold)
+    all_records = []
+    all_timings = []
+    for entry in submissions:
+        writer.write_records(entry["filas"])
+        all_timings.extend(entry["mediciones"])
+        if entry.get("rasgos") is not None:
+            similar.add(entry["archivo"], entry["rasgos"])
+        if export_format:
+            all_records.extend(entry["filas"])
+    if similar.names:
+        writer.add_sheet(SIMILARITY_SHEET, SIMILARITY_COLUMNS, similar.report_rows(), SIMILARITY_FORMATS)
+    if all_timings:
+        writer.add_sheet(PERFORMANCE_SHEET, TIMINGS_COLUMNS, summarize_timings(all_timings))
+    writer.close()
+    print(f"Informe combinado de {len(submissions)} envío(s) generado en '{results_file}'")
+    if export_format:
+        export_records(all_records, export_format, results_file)
+    return len(submissions)
+
+
+def main(argv=None):
+    """Combina los parciales desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Combina los resultados parciales de los fragmentos.")
+    parser.add_argument('--fragmentos', type=int,
+                        help="Número de fragmentos N de la ejecución (por defecto, el único presente)")
+    parser.add_argument('--export', choices=EXPORT_FORMATS,
+                        help="Exportar también los resultados por pregunta y el resumen por envío")
+    parser.add_argument('--umbral-similitud', type=float, default=DEFAULT_THRESHOLD, metavar='0-1',
+                        help=f"Similitud mínima para agrupar envíos parecidos (por defecto {DEFAULT_THRESHOLD:g})")
+    args = parser.parse_args(argv)
+    try:
+        merge(RESULTS_FILE, args.fragmentos, args.export, args.umbral_similitud)
+    except MergeError as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
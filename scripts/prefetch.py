@@ -0,0 +1,128 @@
+# scripts/prefetch.py
+
+"""
+Lectura anticipada de los envíos en hilos de E/S.
+
+Con user_submissions/ en una carpeta de red, leer cada archivo bloquea la
+evaluación mientras la CPU no hace nada. Prefetcher lee los bytes de los
+siguientes envíos en hilos de E/S mientras se evalúa el actual, con una cola
+acotada (depth archivos en memoria como máximo), y entrega (ruta, bytes) en el
+orden de entrada. La evaluación analiza después desde memoria (io.BytesIO).
+Con read se leen otras fuentes, p.ej. los miembros de un zip de exportación
+(ver zip_submissions). Los archivos mayores que el tamaño máximo de un envío no
+se leen (ver read_file).
+
+Por cada archivo mide el tiempo de lectura en el hilo de E/S y el tiempo que el
+consumidor esperó por él; la diferencia entre el tiempo total y la espera es el
+tiempo en que la evaluación no estuvo frenada por la E/S.
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from resource_guard import DEFAULT_LIMITS, SubmissionRejected
+
+DEFAULT_DEPTH = 4  # Archivos leídos por adelantado
+DEFAULT_IO_THREADS = 2
+
+
+def read_file(path, limits=DEFAULT_LIMITS):
+    """
+    Bytes del archivo en disco.
+
+    Un archivo mayor que el tamaño máximo de un envío (limits.max_total_mb) no se
+    lee: se lanza SubmissionRejected, igual que con los miembros de un zip de
+    exportación (ver zip_submissions).
+    """
+    max_bytes = int(limits.max_total_mb * 1024 * 1024)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > max_bytes:
+            raise _too_large(size, limits)
+        content = f.read(max_bytes + 1)  # Acotado aunque el archivo crezca mientras se lee
+    if len(content) > max_bytes:
+        raise _too_large(len(content), limits)
+    return content
+
+
+def _too_large(size, limits):
+    return SubmissionRejected(f"el archivo ocupa {size / 2**20:.1f} MB (máximo {limits.max_total_mb} MB)")
+
+
+def _timed_read(read, path):
+    start = time.perf_counter()
+    content = read(path)
+    return content, time.perf_counter() - start
+
+
+class Prefetcher:
+    """
+    Itera (ruta, bytes) leyendo por adelantado hasta depth archivos en io_threads hilos.
+
+    read(ruta) devuelve los bytes (por defecto, del archivo en disco). Si la lectura
+    falla, se entrega (ruta, None) y el error queda en errors[ruta], para que la
+    evaluación lo informe como cualquier otro envío.
+    """
+
+    def __init__(self, paths, depth=DEFAULT_DEPTH, io_threads=DEFAULT_IO_THREADS, read=read_file):
+        self.paths = list(paths)
+        self.read = read
+        self.depth = max(1, depth)
+        self.io_threads = max(1, io_threads)
+        self.read_seconds = {}  # ruta -> segundos de lectura en el hilo de E/S
+        self.wait_seconds = {}  # ruta -> segundos que el consumidor esperó los bytes
+        self.errors = {}
+        self.bytes_read = 0
+        self.started = None
+        self.finished = None
+
+    def __iter__(self):
+        self.started = time.perf_counter()
+        pending = deque()
+        upcoming = iter(self.paths)
+        with ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix="prefetch") as pool:
+            def fill():
+                while len(pending) < self.depth:
+                    path = next(upcoming, None)
+                    if path is None:
+                        return
+                    pending.append((path, pool.submit(_timed_read, self.read, path)))
+
+            fill()
+            while pending:
+                path, future = pending.popleft()
+                wait_start = time.perf_counter()
+                try:
+                    content, seconds = future.result()
+                except Exception as e:  # Disco, zip dañado, envío rechazado...
+                    content, seconds = None, 0.0
+                    self.errors[path] = e
+                self.wait_seconds[path] = time.perf_counter() - wait_start
+                self.read_seconds[path] = seconds
+                if content is not None:
+                    self.bytes_read += len(content)
+                fill()  # Se lanza la siguiente lectura antes de entregar este archivo
+                yield path, content
+        self.finished = time.perf_counter()
+
+    def entries(self, path, submission):
+        """Mediciones del archivo en el formato de profiling.measure (lectura y espera de E/S)."""
+        if path not in self.read_seconds:
+            return []
+        return [
+            {"envio": submission, "tipo": "fase", "nombre": "lectura_disco",
+             "segundos": self.read_seconds[path], "memoria_kb": None},
+            {"envio": submission, "tipo": "fase", "nombre": "espera_disco",
+             "segundos": self.wait_seconds[path], "memoria_kb": None},
+        ]
+
+    def summary(self):
+        """Resumen de la canalización: tiempo total, lectura, espera de E/S y tiempo sin esperas."""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        total = end - self.started if self.started is not None else 0.0
+        waited = sum(self.wait_seconds.values())
+        return {"total": total, "lectura": sum(self.read_seconds.values()), "espera_es": waited,
+                "sin_espera": max(0.0, total - waited), "archivos": len(self.read_seconds),
+                "mb": self.bytes_read / 2**20}
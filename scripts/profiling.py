@@ -0,0 +1,118 @@
+# scripts/profiling.py
+
+"""
+Instrumentación de rendimiento del evaluador.
+
+Cada fase de la evaluación de un envío (lectura, encabezados, DataFrame) y cada
+pregunta de la rúbrica se mide con measure(), que añade una entrada con el tiempo
+transcurrido y, si tracemalloc está activo (opción --profile), la memoria asignada
+en el pico de la fase. Las entradas se agregan en la hoja "Rendimiento" del informe
+y en un archivo JSON para comparar ejecuciones.
+"""
+
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+TIMINGS_COLUMNS = ["Tipo", "Nombre", "Llamadas", "Total (s)", "Media (ms)", "p95 (ms)", "Máx (ms)",
+                   "Envío más lento", "Memoria pico (KB)"]
+PERFORMANCE_SHEET = "Rendimiento"
+
+
+@contextmanager
+def measure(entries, submission, kind, name, track_memory=True):
+    """
+    Mide el bloque y añade a entries un diccionario con envío, tipo, nombre, segundos y memoria.
+
+    La memoria (KB asignados en el pico del bloque) solo se registra si tracemalloc está
+    activo; con track_memory=False no se reinicia el pico, para poder anidar mediciones.
+    """
+    tracking = track_memory and tracemalloc.is_tracing()
+    if tracking:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        memory = None
+        if tracking:
+            memory = round((tracemalloc.get_traced_memory()[1] - base) / 1024, 1)
+        entries.append({"envio": submission, "tipo": kind, "nombre": name,
+                        "segundos": elapsed, "memoria_kb": memory})
+
+
+def start_profiling():
+    """Activa el seguimiento de memoria y devuelve un perfilador cProfile ya iniciado."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_timings(entries):
+    """
+    Agrega las entradas por (tipo, nombre): llamadas, total, media, p95, máximo y envío más lento.
+
+    Las entradas de tipo "envio" (tiempo total de cada archivo) se listan una a una,
+    de la más lenta a la más rápida, para localizar envíos patológicos.
+    """
+    groups = {}
+    for entry in entries:
+        key = (entry["tipo"], entry["envio"] if entry["tipo"] == "envio" else entry["nombre"])
+        groups.setdefault(key, []).append(entry)
+
+    rows = []
+    for (kind, name), group in groups.items():
+        seconds = [entry["segundos"] for entry in group]
+        slowest = max(group, key=lambda entry: entry["segundos"])
+        memory = [entry["memoria_kb"] for entry in group if entry["memoria_kb"] is not None]
+        rows.append({
+            "Tipo": kind,
+            "Nombre": name,
+            "Llamadas": len(group),
+            "Total (s)": round(sum(seconds), 4),
+            "Media (ms)": round(sum(seconds) / len(seconds) * 1000, 2),
+            "p95 (ms)": round(_percentile(seconds, 95) * 1000, 2),
+            "Máx (ms)": round(slowest["segundos"] * 1000, 2),
+            "Envío más lento": slowest["envio"],
+            "Memoria pico (KB)": max(memory) if memory else None,
+        })
+
+    kind_order = {"fase": 0, "pregunta": 1, "informe": 2, "envio": 3, "fallo": 4}
+    rows.sort(key=lambda row: (kind_order.get(row["Tipo"], 5),
+                               -row["Total (s)"] if row["Tipo"] == "envio" else 0))
+    return rows
+
+
+def timings_path(results_file):
+    """Ruta del archivo de tiempos junto al informe (evaluation_results.timings.json)."""
+    return os.path.splitext(results_file)[0] + '.timings.json'
+
+
+def profile_path(results_file, worker=False):
+    """Ruta del volcado de cProfile; los procesos de trabajo usan uno propio por PID."""
+    root = os.path.splitext(results_file)[0]
+    return f"{root}.worker{os.getpid()}.prof" if worker else f"{root}.prof"
+
+
+def write_timings(path, entries, **metadata):
+    """Guarda las entradas y su resumen en JSON, con los metadatos de la ejecución."""
+    data = {"generado": datetime.now().isoformat(timespec='seconds'), **metadata,
+            "resumen": summarize_timings(entries), "entradas": entries}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
@@ -0,0 +1,145 @@
+# scripts/report_writer.py
+
+import json
+import tempfile
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+REPORT_COLUMNS = ["No.", "Tema", "Pregunta", "Estado", "Observaciones"]
+REPORT_SHEET = "Resultados_Evaluacion"
+MAX_COLUMN_WIDTH = 100
+
+
+def _named_styles():
+    """Estilos con nombre del informe: se registran una vez y las celdas solo los referencian."""
+    header = NamedStyle(name="informe_encabezado")
+    header.font = Font(bold=True)
+    header.fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
+    header.alignment = Alignment(horizontal='center', vertical='center')
+
+    correct = NamedStyle(name="informe_correcto")
+    correct.fill = PatternFill(start_color="CCFFCC", end_color="CCFFCC", fill_type="solid")
+
+    incorrect = NamedStyle(name="informe_incorrecto")
+    incorrect.fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+
+    separator = NamedStyle(name="informe_separador")
+    separator.font = Font(bold=True)
+    separator.fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
+
+    return [header, correct, incorrect, separator]
+
+
+def row_style(row):
+    """Devuelve el nombre del estilo de una fila del informe según su estado."""
+    status = row[3]
+    if status == "Correcto":
+        return "informe_correcto"
+    if status == "Incorrecto":
+        return "informe_incorrecto"
+    if row[2] and str(row[2]).startswith("---"):
+        return "informe_separador"
+    return None
+
+
+def column_width(max_length):
+    """Ancho de columna para el texto más largo (mismo cálculo que el ajuste automático anterior)."""
+    return min((max_length + 2) * 1.2, MAX_COLUMN_WIDTH)
+
+
+class ReportWriter:
+    """
+    Escritor en streaming de evaluation_results.xlsx.
+
+    Las filas se añaden a medida que termina cada envío y se vuelcan a un archivo
+    temporal mientras se calcula el ancho de cada columna, de modo que la memoria
+    no crece con el número de filas. Al cerrar, el libro se genera en modo
+    write-only de openpyxl (que exige conocer los anchos antes de la primera fila)
+    aplicando estilos con nombre en lugar de formatear celda a celda.
+    """
+
+    def __init__(self, path, columns=REPORT_COLUMNS, sheet_title=REPORT_SHEET):
+        self.path = path
+        self.columns = list(columns)
+        self.sheet_title = sheet_title
+        self.max_lengths = [len(str(name)) for name in self.columns]
+        self.row_count = 0
+        self._extra_sheets = []
+        self._spool = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+
+    def write_record(self, record):
+        """Añade una fila (diccionario con las columnas del informe)."""
+        row = [record.get(name) for name in self.columns]
+        # Las cadenas vacías se escriben como celdas vacías
+        row = [None if value == "" else value for value in row]
+        for idx, value in enumerate(row):
+            if value is not None:
+                self.max_lengths[idx] = max(self.max_lengths[idx], len(str(value)))
+        self._spool.write(json.dumps(row, ensure_ascii=False, default=str))
+        self._spool.write('\n')
+        self.row_count += 1
+
+    def write_records(self, records):
+        """Añade las filas de un envío."""
+        for record in records:
+            self.write_record(record)
+
+    def add_sheet(self, title, columns, rows, number_formats=None):
+        """
+        Añade una hoja adicional pequeña (p.ej. "Rendimiento") con filas ya agregadas.
+
+        number_formats (columna -> formato numérico de Excel, p.ej. "0%") da formato a
+        las celdas de esas columnas sin convertir sus valores en texto.
+        """
+        formats = [(number_formats or {}).get(name) for name in columns]
+        self._extra_sheets.append((title, list(columns), [[row.get(name) for name in columns] for row in rows],
+                                   formats))
+
+    def close(self):
+        """Genera el libro con las filas acumuladas y libera el archivo temporal."""
+        wb = Workbook(write_only=True)
+        for style in _named_styles():
+            wb.add_named_style(style)
+
+        ws = wb.create_sheet(self.sheet_title)
+        for idx, max_length in enumerate(self.max_lengths, 1):
+            ws.column_dimensions[get_column_letter(idx)].width = column_width(max_length)
+
+        ws.append([self._cell(ws, name, "informe_encabezado") for name in self.columns])
+        self._spool.seek(0)
+        for line in self._spool:
+            row = json.loads(line)
+            style = row_style(row)
+            if style is None:
+                ws.append(row)
+            else:
+                ws.append([self._cell(ws, value, style) for value in row])
+
+        self._spool.close()
+
+        for title, columns, rows, formats in self._extra_sheets:
+            extra = wb.create_sheet(title)
+            for idx, name in enumerate(columns):
+                max_length = max([len(str(name))] + [len(str(row[idx])) for row in rows if row[idx] is not None])
+                extra.column_dimensions[get_column_letter(idx + 1)].width = column_width(max_length)
+            extra.append([self._cell(extra, name, "informe_encabezado") for name in columns])
+            for row in rows:
+                extra.append(row if not any(formats) else
+                             [self._number_cell(extra, value, number_format) if number_format else value
+                              for value, number_format in zip(row, formats)])
+        wb.save(self.path)
+
+    @staticmethod
+    def _cell(ws, value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    @staticmethod
+    def _number_cell(ws, value, number_format):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.number_format = number_format
+        return cell
@@ -0,0 +1,130 @@
+# scripts/resource_guard.py
+
+"""
+Inspección previa de los envíos para acotar memoria y tiempo por archivo.
+
+Antes de leer un envío se revisa el directorio del zip (sin descomprimir nada) y
+el comienzo de la hoja activa y styles.xml (buscando bytes, sin analizar XML). Los límites son configurables:
+
+- Se rechaza el archivo si no es un zip válido, si tiene demasiadas partes, si el
+  tamaño descomprimido (total o de una parte) es excesivo o si una parte grande
+  tiene una relación de compresión propia de una bomba zip.
+- Se degrada a lectura mínima (sin estilos ni gráficos) si la dimensión declarada
+  de la hoja o el número de estilos superan los límites; las preguntas que
+  dependen de estilos o gráficos se informan como no evaluadas.
+"""
+
+import re
+import zipfile
+from collections import namedtuple
+
+from openpyxl.utils import range_boundaries
+
+from xlsx_reader import REL_TYPE_WORKSHEET, find_workbook_parts
+
+Limits = namedtuple("Limits", ["max_total_mb", "max_member_mb", "max_ratio", "max_members",
+                               "max_rows", "max_cols", "max_styles"])
+DEFAULT_LIMITS = Limits(max_total_mb=100, max_member_mb=50, max_ratio=100, max_members=5000,
+                        max_rows=100000, max_cols=1000, max_styles=5000)
+
+# Las partes pequeñas (XML repetitivo) pueden comprimirse mucho sin ser peligrosas
+RATIO_MIN_BYTES = 1024 * 1024
+HEAD_BYTES = 64 * 1024  # Bytes iniciales de la hoja en los que se busca <dimension>
+CHUNK_SIZE = 64 * 1024
+OVERLAP_BYTES = 256
+
+_DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+_CELL_XFS_RE = re.compile(rb'<(?:\w+:)?cellXfs\b[^>]*\bcount="(\d+)"')
+_SHEET_DATA_RE = re.compile(rb'<(?:\w+:)?sheetData\b')
+
+Inspection = namedtuple("Inspection", ["reasons", "uncompressed_bytes"])
+
+
+class SubmissionRejected(Exception):
+    """El envío supera un límite que impide leerlo con seguridad; su mensaje se informa tal cual."""
+
+
+def _search(zf, part, pattern, stop=None, limit=None):
+    """
+    Busca pattern en los bytes de una parte, leyéndola por bloques y sin analizar XML.
+
+    Deja de leer al encontrarlo, al aparecer stop o tras limit bytes (None: sin límite).
+    """
+    tail = b''
+    read = 0
+    with zf.open(part) as stream:
+        while limit is None or read < limit:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            read += len(chunk)
+            data = tail + chunk
+            match = pattern.search(data)
+            if match:
+                return match
+            if stop is not None and stop.search(data):
+                break
+            tail = data[-OVERLAP_BYTES:]  # Por si la etiqueta queda partida entre dos bloques
+    return None
+
+
+def _check_zip(zf, limits):
+    infos = zf.infolist()
+    if len(infos) > limits.max_members:
+        raise SubmissionRejected(f"el archivo tiene {len(infos)} partes (máximo {limits.max_members})")
+    total = 0
+    for info in infos:
+        total += info.file_size
+        if info.file_size > limits.max_member_mb * 1024 * 1024:
+            raise SubmissionRejected(f"la parte {info.filename} ocupa {info.file_size / 2**20:.1f} MB "
+                                     f"descomprimida (máximo {limits.max_member_mb} MB)")
+        if info.file_size >= RATIO_MIN_BYTES:
+            ratio = info.file_size / max(info.compress_size, 1)
+            if ratio > limits.max_ratio:
+                raise SubmissionRejected(f"la parte {info.filename} tiene una relación de compresión de "
+                                         f"{ratio:.0f}:1 (máximo {limits.max_ratio}:1)")
+    if total > limits.max_total_mb * 1024 * 1024:
+        raise SubmissionRejected(f"el contenido descomprimido ocupa {total / 2**20:.1f} MB "
+                                 f"(máximo {limits.max_total_mb} MB)")
+    return total
+
+
+def inspect_submission(source, limits=DEFAULT_LIMITS):
+    """
+    Revisa un envío (ruta o archivo binario) contra los límites.
+
+    Lanza SubmissionRejected si no debe leerse; si no, devuelve una Inspection cuya
+    lista reasons indica, si no está vacía, por qué debe leerse en modo mínimo.
+    """
+    try:
+        zf = zipfile.ZipFile(source)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise SubmissionRejected(f"no es un archivo XLSX válido ({e})")
+    with zf:
+        total = _check_zip(zf, limits)
+        reasons = []
+        try:
+            parts = find_workbook_parts(zf)
+        except (KeyError, SyntaxError) as e:
+            raise SubmissionRejected(f"no se pudo leer la estructura del libro ({e})")
+
+        if parts.sheets:
+            rel = parts.sheets[parts.active][1]
+            if rel and rel[0] == REL_TYPE_WORKSHEET and rel[1] in zf.NameToInfo:
+                match = _search(zf, rel[1], _DIMENSION_RE, stop=_SHEET_DATA_RE, limit=HEAD_BYTES)
+                if match:
+                    try:
+                        _, _, max_col, max_row = range_boundaries(match.group(1).decode())
+                    except ValueError:
+                        max_col = max_row = None
+                    if max_row is not None and max_row > limits.max_rows:
+                        reasons.append(f"la hoja declara {max_row} filas (máximo {limits.max_rows})")
+                    if max_col is not None and max_col > limits.max_cols:
+                        reasons.append(f"la hoja declara {max_col} columnas (máximo {limits.max_cols})")
+
+        if parts.styles and parts.styles in zf.NameToInfo:
+            match = _search(zf, parts.styles, _CELL_XFS_RE)
+            if match and int(match.group(1)) > limits.max_styles:
+                reasons.append(f"el libro tiene {int(match.group(1))} estilos de celda "
+                               f"(máximo {limits.max_styles})")
+    return Inspection(reasons, total)
@@ -0,0 +1,77 @@
+# scripts/result_cache.py
+
+import json
+import sqlite3
+
+
+class ResultCache:
+    """
+    Caché persistente (SQLite) de las filas de resultado de cada envío.
+
+    Cada archivo se guarda con el hash de su contenido y la versión de la rúbrica
+    con la que se evaluó; solo se reutiliza si ambos coinciden.
+
+    Guarda también los hechos extraídos de cada archivo (ver submission_facts) con
+    la versión de la extracción: si solo cambia la rúbrica, el envío se vuelve a
+    evaluar a partir de ellos sin abrir el archivo.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " archivo TEXT PRIMARY KEY,"
+            " hash TEXT NOT NULL,"
+            " version_rubrica TEXT NOT NULL,"
+            " filas TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS hechos ("
+            " archivo TEXT PRIMARY KEY,"
+            " hash TEXT NOT NULL,"
+            " version_hechos TEXT NOT NULL,"
+            " datos BLOB NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, filename, content_hash, rubric_version):
+        """Devuelve las filas guardadas para el archivo, o None si no hay una entrada vigente."""
+        row = self.conn.execute(
+            "SELECT hash, version_rubrica, filas FROM resultados WHERE archivo = ?", (filename,)
+        ).fetchone()
+        if row is None or row[0] != content_hash or row[1] != rubric_version:
+            return None
+        return json.loads(row[2])
+
+    def put(self, filename, content_hash, rubric_version, records):
+        """Guarda (o reemplaza) las filas de resultado del archivo."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO resultados (archivo, hash, version_rubrica, filas) VALUES (?, ?, ?, ?)",
+            (filename, content_hash, rubric_version, json.dumps(records, ensure_ascii=False)),
+        )
+
+    def get_facts(self, filename, content_hash, facts_version):
+        """Devuelve los hechos guardados del archivo (bytes), o None si no hay una entrada vigente."""
+        row = self.conn.execute(
+            "SELECT hash, version_hechos, datos FROM hechos WHERE archivo = ?", (filename,)
+        ).fetchone()
+        if row is None or row[0] != content_hash or row[1] != facts_version:
+            return None
+        return row[2]
+
+    def put_facts(self, filename, content_hash, facts_version, facts):
+        """Guarda (o reemplaza) los hechos extraídos del archivo."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO hechos (archivo, hash, version_hechos, datos) VALUES (?, ?, ?, ?)",
+            (filename, content_hash, facts_version, sqlite3.Binary(facts)),
+        )
+
+    def commit(self):
+        """Confirma los cambios pendientes (p.ej. para que otro proceso los vea de inmediato)."""
+        self.conn.commit()
+
+    def close(self):
+        """Confirma los cambios pendientes y cierra la base de datos."""
+        self.conn.commit()
+        self.conn.close()
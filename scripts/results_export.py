@@ -0,0 +1,108 @@
+# scripts/results_export.py
+
+"""
+Exportación columnar de los resultados de la evaluación.
+
+Convierte las filas del informe (con sus separadores "--- Evaluando: ... ---")
+en una tabla tipada con una fila por (envío, pregunta) y en un resumen de
+puntajes por envío, y las guarda en CSV, JSONL o Parquet para que el análisis
+posterior no tenga que interpretar el Excel.
+"""
+
+import os
+
+import pandas as pd
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+SUBMISSION_PREFIX = "--- Evaluando: "
+SUBMISSION_SUFFIX = " ---"
+END_MARKER = "--- Fin de evaluación ---"
+
+RESULT_COLUMNS = ["envio", "pregunta_no", "tema", "pregunta", "estado", "observaciones", "puntaje"]
+STATUSES = ["Correcto", "Incorrecto", "Error"]
+
+
+def records_to_frame(records):
+    """
+    Convierte las filas del informe en un DataFrame con una fila por (envío, pregunta).
+
+    El envío se toma de la fila separadora que abre cada evaluación; los separadores
+    y las filas de cierre no se incluyen. Las filas de error generales del envío
+    (sin número de pregunta) se conservan con pregunta_no vacío.
+    """
+    rows = []
+    submission = None
+    for record in records:
+        question = record.get("Pregunta") or ""
+        if question.startswith(SUBMISSION_PREFIX) and question.endswith(SUBMISSION_SUFFIX):
+            submission = question[len(SUBMISSION_PREFIX):-len(SUBMISSION_SUFFIX)]
+            continue
+        if question == END_MARKER:
+            continue
+        number = record.get("No.")
+        rows.append((submission, None if number in ("", None) else number, record.get("Tema"),
+                     question, record.get("Estado"), record.get("Observaciones")))
+
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS[:-1])
+    df["envio"] = df["envio"].astype("string")
+    df["pregunta_no"] = pd.to_numeric(df["pregunta_no"]).astype("Int64")
+    for column in ("tema", "pregunta", "observaciones"):
+        df[column] = df[column].fillna("").astype("string")
+    df["estado"] = pd.Categorical(df["estado"], categories=STATUSES)
+    df["puntaje"] = (df["estado"] == "Correcto").astype("int8")
+    return df
+
+
+def summarize_scores(df):
+    """Resumen por envío: número de preguntas, correctas, incorrectas, errores y porcentaje."""
+    questions = df[df["pregunta_no"].notna()]
+    counts = pd.crosstab(questions["envio"], questions["estado"]).reindex(columns=STATUSES, fill_value=0)
+    summary = pd.DataFrame({
+        "preguntas": counts.sum(axis=1),
+        "correctas": counts["Correcto"],
+        "incorrectas": counts["Incorrecto"],
+        "errores": counts["Error"],
+    })
+    # Envíos que no llegaron a evaluarse (p.ej. archivo ilegible): aparecen con 0 preguntas
+    summary = summary.reindex(df["envio"].dropna().unique(), fill_value=0)
+    summary["errores_envio"] = (df[df["pregunta_no"].isna()].groupby("envio").size()
+                                .reindex(summary.index, fill_value=0))
+    summary["puntaje"] = summary["correctas"]
+    summary["porcentaje"] = (summary["correctas"] / summary["preguntas"].where(summary["preguntas"] > 0)
+                             * 100).round(2)
+    summary.index.name = "envio"
+    return summary.reset_index().astype({column: "int64" for column in
+                                         ("preguntas", "correctas", "incorrectas", "errores",
+                                          "errores_envio", "puntaje")})
+
+
+def _write_frame(df, path, fmt):
+    if fmt == 'csv':
+        df.to_csv(path, index=False, encoding='utf-8')
+    elif fmt == 'jsonl':
+        df.to_json(path, orient='records', lines=True, force_ascii=False)
+    elif fmt == 'parquet':
+        try:
+            df.to_parquet(path, index=False)
+        except ImportError as e:
+            raise ImportError("La exportación a Parquet requiere pyarrow o fastparquet "
+                              "(pip install pyarrow).") from e
+    else:
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+
+
+def export_paths(base_file, fmt):
+    """Rutas de la tabla de resultados y del resumen junto a base_file (evaluation_results.xlsx)."""
+    root = os.path.splitext(base_file)[0]
+    return f"{root}.{fmt}", f"{root}_resumen.{fmt}"
+
+
+def export_results(records, base_file, fmt):
+    """Guarda la tabla de resultados y el resumen por envío; devuelve sus rutas."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación no soportado: {fmt}")
+    df = records_to_frame(records)
+    results_path, summary_path = export_paths(base_file, fmt)
+    _write_frame(df, results_path, fmt)
+    _write_frame(summarize_scores(df), summary_path, fmt)
+    return results_path, summary_path
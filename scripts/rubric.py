@@ -0,0 +1,263 @@
+# scripts/rubric.py
+
+"""
+Motor de rúbricas declarativas.
+
+Cada pregunta es una regla registrada con @rule que declara qué celdas, rangos y
+gráficos necesita. El motor reúne esas necesidades en una única lectura por envío
+(ver required_ranges) y después ejecuta todas las reglas sobre los datos ya leídos:
+cada rango se extrae una sola vez aunque lo consulten varias reglas.
+
+Las posiciones dependen de la variante de examen (ver exam_config): cells y ranges
+pueden ser listas fijas o funciones que reciben el ExamDefinition, y el texto de
+la pregunta puede usar sus parámetros ("... el ID {id_buscado} ...").
+"""
+
+from collections import namedtuple
+
+import numpy as np
+from openpyxl.utils import get_column_letter, range_boundaries
+
+from formulas import FormulaError, FormulaEvaluator
+
+RULES = []
+
+# Columna de un rango como arrays de NumPy: valores (object), tipos de dato, ids de estilo y número de fila
+ColumnArrays = namedtuple("ColumnArrays", ["values", "data_types", "style_ids", "rows"])
+
+
+class RuleError(Exception):
+    """Error esperado de una regla (p.ej. respuesta vacía); su mensaje se informa tal cual."""
+
+
+class Rule:
+    """Pregunta de la rúbrica: metadatos, necesidades de datos y función de evaluación."""
+
+    def __init__(self, number, topic, question, func, cells=(), ranges=(), charts=False, styles=False,
+                 error_prefix="Error al evaluar respuesta"):
+        self.number = number
+        self.topic = topic
+        self.question = question
+        self.func = func
+        self.cells = cells if callable(cells) else tuple(cells)
+        self.ranges = ranges if callable(ranges) else tuple(ranges)
+        self.charts = charts
+        self.styles = styles
+        self.error_prefix = error_prefix
+
+    def needs(self, exam):
+        """Celdas y rangos que consulta la regla en un examen."""
+        cells = self.cells(exam) if callable(self.cells) else self.cells
+        ranges = self.ranges(exam) if callable(self.ranges) else self.ranges
+        return tuple(ranges) + tuple(cells)
+
+    def text(self, exam):
+        """Enunciado de la pregunta con los parámetros del examen."""
+        return self.question.format(**exam.parameters) if exam is not None else self.question
+
+    def evaluate(self, ctx):
+        """Ejecuta la regla y devuelve (estado, observaciones)."""
+        if ctx.minimal and (self.charts or self.styles):
+            return "Error", f"No evaluada (lectura mínima): {ctx.minimal}"
+        try:
+            status, observations = self.func(ctx)
+        except RuleError as e:
+            return "Error", str(e)
+        except Exception as e:
+            return "Error", f"{self.error_prefix}: {str(e)}"
+        return status, observations
+
+
+def rule(number, topic, question, cells=(), ranges=(), charts=False, styles=False,
+         error_prefix="Error al evaluar respuesta"):
+    """
+    Registra una función como regla de la rúbrica.
+
+    La función recibe un RubricContext y devuelve (estado, observaciones). cells y
+    ranges son listas o funciones del examen que las devuelven; charts y styles
+    indican si consulta los gráficos o los estilos de las celdas.
+    """
+    def decorator(func):
+        RULES.append(Rule(number, topic, question, func, cells, ranges, charts, styles, error_prefix))
+        return func
+    return decorator
+
+
+def _contains(outer, inner):
+    o_min_col, o_min_row, o_max_col, o_max_row = range_boundaries(outer)
+    i_min_col, i_min_row, i_max_col, i_max_row = range_boundaries(inner)
+    return (o_min_col <= i_min_col and i_max_col <= o_max_col
+            and o_min_row <= i_min_row and i_max_row <= o_max_row)
+
+
+def required_ranges(rules, extra=(), exams=(None,)):
+    """
+    Reúne los rangos y celdas que necesitan las reglas en los exámenes indicados, para leerlos de una vez.
+
+    Se omiten los que ya están contenidos en otro rango de la lista.
+    """
+    needed = []
+    refs = list(extra) + [ref for exam in exams for r in rules
+                          if exam is None or exam.includes(r.number) for ref in r.needs(exam)]
+    for ref in refs:
+        if not any(_contains(other, ref) for other in needed):
+            needed = [other for other in needed if not _contains(ref, other)] + [ref]
+    return needed
+
+
+def numeric_values(values):
+    """
+    Convierte un array de valores en float: None pasa a NaN.
+
+    Devuelve (números, máscara de valores no numéricos); los no numéricos también son NaN.
+    """
+    numbers = np.full(len(values), np.nan)
+    non_numeric = np.zeros(len(values), dtype=bool)
+    for idx, value in enumerate(values):
+        if value is None:
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers[idx] = value
+        else:
+            non_numeric[idx] = True
+    return numbers, non_numeric
+
+
+def format_rows(rows):
+    """Lista de filas compacta para los mensajes: 6-9, 12, 15-20."""
+    rows = [int(row) for row in rows]
+    parts = []
+    start = prev = None
+    for row in rows:
+        if prev is not None and row == prev + 1:
+            prev = row
+            continue
+        if start is not None:
+            parts.append(f"{start}-{prev}" if prev != start else str(start))
+        start = prev = row
+    if start is not None:
+        parts.append(f"{start}-{prev}" if prev != start else str(start))
+    return ", ".join(parts)
+
+
+def needs_charts(rules):
+    """Indica si alguna regla consulta los gráficos del libro."""
+    return any(r.charts for r in rules)
+
+
+class RubricContext:
+    """Datos ya leídos de un envío, compartidos por todas las reglas."""
+
+    def __init__(self, user_data, answer_key, minimal=None, exam=None):
+        self.data = user_data
+        self.exam = exam  # ExamDefinition de la variante evaluada
+        self.minimal = minimal  # Motivo de la lectura mínima (sin estilos ni gráficos), o None
+        self.answer_key = answer_key
+        self.expected = answer_key["answers"]
+        self._ranges = {}
+        self._arrays = {}
+        self._style_ids = {}
+        self._formulas = None
+
+    def value(self, coordinate):
+        """Valor de una celda (en las celdas con fórmula, el texto "=...")."""
+        return self.data.cell(coordinate).value
+
+    @property
+    def formulas(self):
+        """FormulaEvaluator del envío; se crea al primer uso."""
+        if self._formulas is None:
+            self._formulas = FormulaEvaluator(self.data)
+        return self._formulas
+
+    def computed(self, coordinate):
+        """
+        Valor calculado de una celda: el que guardó la aplicación o, si la fórmula no
+        lo tiene, el que resulta de evaluarla. Lanza RuleError si no se puede calcular.
+        """
+        try:
+            return self.formulas.cell_value(coordinate)
+        except FormulaError as e:
+            raise RuleError(f"No se pudo calcular la fórmula {self.value(coordinate)}: {e}")
+
+    def evaluate(self, formula):
+        """Evalúa una fórmula sobre los datos del envío; lanza RuleError si no se puede calcular."""
+        try:
+            return self.formulas.evaluate(formula)
+        except FormulaError as e:
+            raise RuleError(f"No se pudo calcular la fórmula {formula}: {e}")
+
+    def cell(self, coordinate):
+        """CellInfo de una celda."""
+        return self.data.cell(coordinate)
+
+    def range(self, ref):
+        """Celdas de un rango como lista de filas; se extraen una sola vez por envío."""
+        if ref not in self._ranges:
+            min_col, min_row, max_col, max_row = range_boundaries(ref)
+            letters = [get_column_letter(col) for col in range(min_col, max_col + 1)]
+            self._ranges[ref] = [[self.data.cell(f"{letter}{row}") for letter in letters]
+                                 for row in range(min_row, max_row + 1)]
+        return self._ranges[ref]
+
+    def column(self, ref):
+        """Celdas de un rango de una sola columna como lista."""
+        return [row[0] for row in self.range(ref)]
+
+    def column_arrays(self, ref):
+        """Celdas de un rango de una sola columna como ColumnArrays de NumPy; se construyen una vez por envío."""
+        if ref not in self._arrays:
+            cells = self.column(ref)
+            min_row = range_boundaries(ref)[1]
+            values = np.empty(len(cells), dtype=object)
+            values[:] = [cell.value for cell in cells]
+            self._arrays[ref] = ColumnArrays(
+                values,
+                np.array([cell.data_type for cell in cells], dtype="U1"),
+                np.array([cell.style_id for cell in cells], dtype=np.int32),
+                np.arange(min_row, min_row + len(cells)),
+            )
+        return self._arrays[ref]
+
+    def style_ids(self, ref):
+        """Ids de estilo de un rango como array 2D de enteros; se construye una vez por envío."""
+        if ref not in self._style_ids:
+            self._style_ids[ref] = np.array([[cell.style_id for cell in row] for row in self.range(ref)],
+                                            dtype=np.int32)
+        return self._style_ids[ref]
+
+    def style_mask(self, style_ids, predicate):
+        """
+        Máscara booleana de predicate(CellStyle) para un array de ids de estilo.
+
+        El predicado se evalúa una sola vez por id distinto y queda memorizado en la
+        tabla de estilos del libro; conviene pasar funciones con nombre (no lambdas
+        creadas en cada llamada) para que la memoria sirva entre reglas.
+        """
+        unique, inverse = np.unique(style_ids, return_inverse=True)
+        styles = self.data.styles
+        answers = np.array([styles.matches(int(style_id), predicate) for style_id in unique], dtype=bool)
+        return answers[inverse].reshape(np.shape(style_ids))
+
+    @property
+    def charts(self):
+        return self.data.charts
+
+
+def run_rules(rules, ctx, add_result, timer=None):
+    """
+    Evalúa las reglas del examen del contexto en orden de número e informa cada resultado con add_result.
+
+    timer, si se indica, es una función que recibe el nombre de la pregunta y devuelve
+    un gestor de contexto que mide su evaluación (ver profiling.measure).
+    """
+    exam = ctx.exam
+    for r in sorted(rules, key=lambda r: r.number):
+        if exam is not None and not exam.includes(r.number):
+            continue
+        if timer is None:
+            status, observations = r.evaluate(ctx)
+        else:
+            with timer(f"Pregunta {r.number}"):
+                status, observations = r.evaluate(ctx)
+        add_result(r.number, r.topic, r.text(exam), status, observations)
@@ -0,0 +1,99 @@
+# scripts/sharding.py
+
+"""
+Reparto de los envíos entre varias máquinas (--shard i/N) y resultados parciales.
+
+Cada envío pertenece a un único fragmento según el hash SHA-256 de su nombre de
+archivo, de modo que todas las máquinas calculan el mismo reparto sin
+coordinarse y un fragmento fallido puede repetirse sin tocar los demás. Cada
+fragmento guarda sus resultados en un archivo parcial JSONL junto al informe
+(evaluation_results.shard-2-of-4.jsonl): una línea de cabecera con el fragmento
+y la versión de la rúbrica, y una línea por envío con sus filas, mediciones y
+rasgos de similitud.
+El archivo se escribe con otro nombre y se renombra al terminar, así que un
+parcial presente siempre está completo. merge_results.py combina los parciales.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+
+def parse_shard(text):
+    """Convierte "i/N" (1 <= i <= N) en la tupla (i, N); para usar como type de argparse."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Fragmento no válido '{text}': usa i/N, por ejemplo 2/4")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Fragmento no válido '{text}': i debe estar entre 1 y N")
+    return index, count
+
+
+def shard_of(filename, count):
+    """Fragmento (1..count) al que pertenece un envío según el hash de su nombre de archivo."""
+    digest = hashlib.sha256(os.path.basename(filename).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def select_shard(paths, index, count):
+    """Rutas que corresponden al fragmento index de count, en el mismo orden."""
+    return [path for path in paths if shard_of(path, count) == index]
+
+
+def partial_path(results_file, index, count):
+    """Archivo parcial de un fragmento junto al informe (evaluation_results.shard-2-of-4.jsonl)."""
+    return f"{os.path.splitext(results_file)[0]}.shard-{index}-of-{count}.jsonl"
+
+
+def find_partials(results_file):
+    """Parciales presentes junto al informe, como {(i, N): ruta}."""
+    root = os.path.splitext(results_file)[0]
+    found = {}
+    for path in glob.glob(glob.escape(root) + ".shard-*-of-*.jsonl"):
+        match = re.search(r"\.shard-(\d+)-of-(\d+)\.jsonl$", path)
+        if match:
+            found[(int(match.group(1)), int(match.group(2)))] = path
+    return found
+
+
+class PartialResultsWriter:
+    """Escribe el archivo parcial de un fragmento; se hace visible solo al cerrarlo (close)."""
+
+    def __init__(self, path, index, count, rubric_version):
+        self.path = path
+        self.count = 0
+        self._tmp_path = f"{path}.tmp{os.getpid()}"
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        header = {"fragmento": index, "fragmentos": count, "version_rubrica": rubric_version,
+                  "generado": datetime.now().isoformat(timespec='seconds')}
+        self._file.write(json.dumps(header, ensure_ascii=False) + '\n')
+
+    def write(self, filename, records, entries, features=None):
+        """Añade los resultados de un envío y, si se calcularon, sus rasgos de similitud."""
+        entry = {"archivo": filename, "filas": records, "mediciones": entries}
+        if features is not None:
+            entry["rasgos"] = features
+        self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def discard(self):
+        """Descarta un parcial a medio escribir (la ejecución falló)."""
+        self._file.close()
+        os.remove(self._tmp_path)
+
+
+def read_partial(path):
+    """Devuelve (cabecera, [envíos]) de un archivo parcial."""
+    with open(path, encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        submissions = [json.loads(line) for line in f if line.strip()]
+    return header, submissions
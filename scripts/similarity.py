@@ -0,0 +1,200 @@
+# scripts/similarity.py
+
+"""
+Detección de envíos parecidos (posibles copias) sin comparar todos los pares.
+
+De cada envío se toman sus rasgos a partir de los datos ya leídos para evaluarlo
+(ver submission_facts): valores de las celdas de la tabla y de las respuestas,
+fórmulas, estilos y anchos de columna, gráficos, tablas y autofiltro, y las
+propiedades del documento (autor, última modificación, fechas). Cada rasgo se
+reduce a un entero; un envío es el conjunto de sus rasgos.
+
+Los rasgos que comparten muchos envíos (los datos de la plantilla, las respuestas
+correctas, el formato pedido, los errores habituales) no indican copia y se
+descartan antes de comparar: solo cuentan los rasgos poco comunes. Con ellos se
+calcula la firma MinHash de cada envío y un índice LSH por bandas propone los
+pares candidatos en tiempo casi lineal; de cada candidato se calcula la similitud
+de Jaccard exacta y los pares por encima del umbral se unen en grupos.
+"""
+
+import zlib
+from collections import Counter, defaultdict
+
+import numpy as np
+
+SIMILARITY_SHEET = "Similitud"
+SIMILARITY_COLUMNS = ["Grupo", "Envío", "Envíos en el grupo", "Similitud máxima", "Más parecido a",
+                      "Rasgos en común"]
+SIMILARITY_FORMATS = {"Similitud máxima": "0%"}  # Formatos numéricos de la hoja (ver ReportWriter.add_sheet)
+
+DEFAULT_THRESHOLD = 0.6  # Jaccard mínimo entre rasgos poco comunes para considerar dos envíos parecidos
+# Un rasgo es común (y se descarta) si lo tienen más de max(COMMON_FLOOR, MAX_SHARE * envíos);
+# el mínimo permite detectar grupos de copias de hasta COMMON_FLOOR envíos en cohortes pequeñas
+MAX_SHARE = 0.05
+COMMON_FLOOR = 10
+MIN_FEATURES = 2  # Envíos con menos rasgos poco comunes no se comparan (no hay nada que distinga)
+NUM_PERM = 128  # Funciones hash de la firma MinHash
+BANDS = 32  # Bandas del índice LSH (NUM_PERM / BANDS filas por banda; umbral aproximado 0.42)
+MAX_BUCKET = 50  # En cubetas más grandes se compara cada envío solo con el primero
+SEED = 20240917
+
+# Categorías de rasgos; la categoría se guarda en los bits altos del entero del rasgo
+CATEGORIES = ("celdas", "fórmulas", "estilos", "gráficos", "estructura", "metadatos")
+(CELLS, FORMULAS, STYLES, CHARTS, STRUCTURE, METADATA) = range(len(CATEGORIES))
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(SEED)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+
+def _normalize_formula(formula):
+    return str(formula).upper().replace(" ", "").replace("$", "")
+
+
+def submission_features(user_data):
+    """
+    Rasgos de un envío ya leído (SubmissionData), como lista ordenada de enteros.
+
+    Cada rasgo es "categoría << 32 | crc32(texto)"; ver CATEGORIES.
+    """
+    texts = set()
+    for coordinate, cell in user_data.cells.items():
+        if cell.data_type == 'f':
+            formula = _normalize_formula(cell.value)
+            texts.add((FORMULAS, f"{coordinate}{formula}"))
+            texts.add((FORMULAS, formula))  # La misma fórmula en otra celda
+        elif cell.value is not None:
+            texts.add((CELLS, f"{coordinate}={cell.value!r}"))
+        if cell.style_id:
+            # Por columna: centrar toda la tabla es una sola decisión, no cientos de rasgos
+            style = user_data.styles.resolve(cell.style_id)
+            column = coordinate.rstrip("0123456789")
+            texts.add((STYLES, f"{column}:{style.number_format}|{style.horizontal}|{style.vertical}|"
+                               f"{style.font_color}"))
+    for min_col, max_col, width in user_data.column_widths:
+        texts.add((STYLES, f"ancho {min_col}-{max_col}={width}"))
+    for chart in user_data.charts:
+        texts.add((CHARTS, f"{chart.sheet}|{chart.type}|{chart.title}|{'|'.join(map(str, chart.axis_titles))}"))
+        for series in chart.series:
+            texts.add((CHARTS, f"{chart.type}|{series.name}|{series.categories}|{series.values}"))
+    for name, ref in user_data.tables.items():
+        texts.add((STRUCTURE, f"tabla {name}={ref}"))
+    if user_data.auto_filter_ref:
+        texts.add((STRUCTURE, f"autofiltro={user_data.auto_filter_ref}"))
+    texts.add((STRUCTURE, f"hojas={'|'.join(user_data.sheetnames)}"))
+    for name, value in user_data.properties.items():
+        texts.add((METADATA, f"{name}={value}"))
+    return sorted({category << 32 | zlib.crc32(text.encode('utf-8')) for category, text in texts})
+
+
+def minhash(features):
+    """Firma MinHash (NUM_PERM enteros) de un conjunto de rasgos no vacío."""
+    values = np.asarray(features, dtype=np.uint64) % np.uint64(_PRIME)
+    return ((_A[:, None] * values[None, :] + _B[:, None]) % np.uint64(_PRIME)).min(axis=1)
+
+
+def _shared_summary(shared):
+    """Rasgos compartidos por categoría para el informe: "celdas 12, metadatos 2"."""
+    counts = Counter(int(feature) >> 32 for feature in shared)
+    return ", ".join(f"{CATEGORIES[category]} {count}" for category, count in sorted(counts.items()))
+
+
+class SimilarityIndex:
+    """
+    Rasgos de los envíos de una ejecución y agrupación de los parecidos.
+
+    Se añade cada envío con add (nombre, rasgos) a medida que se evalúa; clusters
+    calcula los grupos al final, cuando ya se sabe qué rasgos son comunes.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_share=MAX_SHARE):
+        self.threshold = threshold
+        self.max_share = max_share
+        self.names = []
+        self.features = []
+
+    def add(self, name, features):
+        """Añade un envío con sus rasgos (ver submission_features)."""
+        self.names.append(name)
+        self.features.append(np.asarray(features, dtype=np.int64))
+
+    def _distinctive(self):
+        """Rasgos de cada envío sin los comunes a gran parte de la cohorte."""
+        counts = Counter()
+        for features in self.features:
+            counts.update(features.tolist())
+        limit = max(COMMON_FLOOR, self.max_share * len(self.features))
+        common = np.array([feature for feature, count in counts.items() if count > limit], dtype=np.int64)
+        return [features[~np.isin(features, common)] for features in self.features]
+
+    def _candidates(self, distinctive):
+        """Pares de envíos que coinciden en alguna banda de sus firmas MinHash."""
+        rows = NUM_PERM // BANDS
+        buckets = defaultdict(list)
+        for idx, features in enumerate(distinctive):
+            if len(features) < MIN_FEATURES:
+                continue
+            signature = minhash(features)
+            for band in range(BANDS):
+                buckets[(band, signature[band * rows:(band + 1) * rows].tobytes())].append(idx)
+        pairs = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BUCKET:
+                pairs.update((members[0], other) for other in members[1:])
+            else:
+                pairs.update((a, b) for pos, a in enumerate(members) for b in members[pos + 1:])
+        return pairs
+
+    def clusters(self):
+        """
+        Grupos de envíos parecidos, de mayor a menor tamaño.
+
+        Cada grupo es una lista de (nombre, similitud máxima, nombre del más parecido,
+        resumen de los rasgos compartidos con él).
+        """
+        distinctive = self._distinctive()
+        parent = list(range(len(self.names)))
+
+        def find(idx):
+            while parent[idx] != idx:
+                parent[idx] = parent[parent[idx]]
+                idx = parent[idx]
+            return idx
+
+        best = {}  # índice -> (similitud, índice del más parecido, rasgos compartidos)
+        for a, b in self._candidates(distinctive):
+            shared = np.intersect1d(distinctive[a], distinctive[b], assume_unique=True)
+            similarity = len(shared) / (len(distinctive[a]) + len(distinctive[b]) - len(shared))
+            if similarity < self.threshold:
+                continue
+            parent[find(a)] = find(b)
+            for idx, other in ((a, b), (b, a)):
+                if idx not in best or similarity > best[idx][0]:
+                    best[idx] = (similarity, other, shared)
+
+        groups = defaultdict(list)
+        for idx in best:
+            groups[find(idx)].append(idx)
+        result = []
+        for members in groups.values():
+            members.sort(key=lambda idx: self.names[idx])
+            result.append([(self.names[idx], best[idx][0], self.names[best[idx][1]], _shared_summary(best[idx][2]))
+                           for idx in members])
+        result.sort(key=lambda group: (-len(group), -max(item[1] for item in group), group[0][0]))
+        return result
+
+    def report_rows(self):
+        """Filas de la hoja "Similitud" del informe (ver SIMILARITY_COLUMNS)."""
+        rows = []
+        for number, group in enumerate(self.clusters(), 1):
+            for name, similarity, closest, shared in group:
+                rows.append({"Grupo": number, "Envío": name, "Envíos en el grupo": len(group),
+                             "Similitud máxima": float(similarity), "Más parecido a": closest,
+                             "Rasgos en común": shared})
+        if not rows:
+            rows.append({"Envío": f"No se encontraron envíos parecidos entre {len(self.names)} "
+                                  f"(umbral {self.threshold:.0%})"})
+        return rows
@@ -0,0 +1,127 @@
+# scripts/submission_facts.py
+
+"""
+Hechos extraídos de un envío, guardados para volver a evaluarlo sin abrir el archivo.
+
+Los hechos son exactamente lo que consultan las preguntas: las celdas leídas de la
+hoja activa (encabezados, tabla, respuestas y marca, con su valor, tipo, id de
+estilo y valor calculado), la tabla de estilos (formatos numéricos, alineación y
+color de fuente), los anchos de columna, las tablas, el autofiltro, los gráficos y
+las propiedades del documento, además del motivo de la lectura mínima si la hubo.
+Cuando cambia una pregunta de la rúbrica, el envío se vuelve a evaluar a partir de
+estos hechos en lugar de descomprimir y analizar de nuevo el XLSX.
+
+Se guardan en columnas (coordenadas, valores, tipos, estilos y valores calculados
+como listas paralelas) serializadas en JSON y comprimidas con zlib: unos pocos KB
+por envío.
+"""
+
+import datetime
+import json
+import zlib
+from collections import namedtuple
+
+from xlsx_reader import CellInfo, ChartInfo, ChartSeries, StyleTable, SubmissionData
+
+# --- Versión del formato de los hechos ---
+# Incrementar cuando cambie lo que extrae xlsx_reader o la forma de guardarlo,
+# para invalidar los hechos guardados.
+FACTS_VERSION = 2
+
+# user_data: SubmissionData reconstruido; minimal: motivo de la lectura mínima, o None
+SubmissionFacts = namedtuple("SubmissionFacts", ["user_data", "minimal"])
+
+
+def _encode_value(value):
+    """Valor de celda en JSON: las fechas, horas y duraciones se guardan como [tipo, texto]."""
+    if isinstance(value, datetime.datetime):
+        return ["fecha_hora", value.isoformat()]
+    if isinstance(value, datetime.date):
+        return ["fecha", value.isoformat()]
+    if isinstance(value, datetime.time):
+        return ["hora", value.isoformat()]
+    if isinstance(value, datetime.timedelta):
+        return ["duracion", value.total_seconds()]
+    return value
+
+
+def _decode_value(value):
+    if not isinstance(value, list):
+        return value
+    kind, text = value
+    if kind == "fecha_hora":
+        return datetime.datetime.fromisoformat(text)
+    if kind == "fecha":
+        return datetime.date.fromisoformat(text)
+    if kind == "hora":
+        return datetime.time.fromisoformat(text)
+    return datetime.timedelta(seconds=text)
+
+
+def dump_facts(user_data, minimal=None):
+    """Serializa los datos leídos de un envío como hechos comprimidos (bytes)."""
+    coordinates = list(user_data.cells)
+    cells = [user_data.cells[coordinate] for coordinate in coordinates]
+    styles = user_data.styles
+    facts = {
+        "version": FACTS_VERSION,
+        "lectura_minima": minimal,
+        "hojas": user_data.sheetnames,
+        "hoja_activa": user_data.active_sheet,
+        "rangos_leidos": user_data.read_bounds,
+        "celdas": {
+            "coordenadas": coordinates,
+            "valores": [_encode_value(cell.value) for cell in cells],
+            "tipos": [cell.data_type for cell in cells],
+            "estilos": [cell.style_id for cell in cells],
+            "calculados": [_encode_value(cell.cached) for cell in cells],
+        },
+        "estilos": {
+            "xfs": styles.xfs,
+            "fuentes": styles.fonts,
+            "formatos": {str(num_fmt_id): code for num_fmt_id, code in styles.num_formats.items()},
+        },
+        "anchos": user_data.column_widths,
+        "tablas": user_data.tables,
+        "autofiltro": user_data.auto_filter_ref,
+        "graficos": [[chart.sheet, chart.type, chart.title, [list(series) for series in chart.series],
+                      chart.axis_titles] for chart in user_data.charts],
+        "propiedades": user_data.properties,
+    }
+    return zlib.compress(json.dumps(facts, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def load_facts(blob):
+    """Reconstruye los datos de un envío a partir de sus hechos; devuelve SubmissionFacts o lanza ValueError."""
+    try:
+        return _load_facts(blob)
+    except (zlib.error, ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Hechos ilegibles: {e}")
+
+
+def _load_facts(blob):
+    facts = json.loads(zlib.decompress(blob).decode('utf-8'))
+    if facts.get("version") != FACTS_VERSION:
+        raise ValueError(f"versión {facts.get('version')} no compatible")
+    data = SubmissionData()
+    data.sheetnames = facts["hojas"]
+    data.active_sheet = facts["hoja_activa"]
+    data.read_bounds = [tuple(bounds) for bounds in facts["rangos_leidos"]]
+    cells = facts["celdas"]
+    data.cells = {
+        coordinate: CellInfo(_decode_value(value), data_type, style_id, _decode_value(cached))
+        for coordinate, value, data_type, style_id, cached in zip(cells["coordenadas"], cells["valores"],
+                                                                  cells["tipos"], cells["estilos"],
+                                                                  cells["calculados"])
+    }
+    styles = facts["estilos"]
+    data.styles = StyleTable([tuple(xf) for xf in styles["xfs"]], styles["fuentes"],
+                             {int(num_fmt_id): code for num_fmt_id, code in styles["formatos"].items()})
+    data.column_widths = [tuple(width) for width in facts["anchos"]]
+    data.tables = facts["tablas"]
+    data.auto_filter_ref = facts["autofiltro"]
+    data.charts = [ChartInfo(sheet, chart_type, title, [ChartSeries(*series) for series in series_list],
+                             axis_titles)
+                   for sheet, chart_type, title, series_list, axis_titles in facts["graficos"]]
+    data.properties = facts["propiedades"]
+    return SubmissionFacts(data, facts["lectura_minima"])
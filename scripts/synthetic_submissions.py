@@ -0,0 +1,278 @@
+# scripts/synthetic_submissions.py
+
+"""
+Generador de envíos sintéticos para las mediciones de rendimiento.
+
+Parte de data/base_datos_original.xlsx y crea N archivos con variaciones
+controladas por una semilla: respuestas correctas o incorrectas en M6–M17,
+encabezado renombrado, centrado, formato de fecha, orden por puntuación, fuente
+roja, fórmula de promedio, formato de tabla, gráficos, hojas adicionales grandes
+e imágenes incrustadas.
+"""
+
+import argparse
+import os
+import random
+import struct
+import time
+import zipfile
+import zlib
+
+from openpyxl import load_workbook
+from openpyxl.chart import BarChart, LineChart, Reference, ScatterChart, Series
+from openpyxl.styles import Alignment, Font
+from openpyxl.utils.datetime import from_excel
+from openpyxl.worksheet.table import Table, TableStyleInfo
+
+from evaluate_submissions import (COLUMN_MAPPING, DATA_START_ROW, DEFAULT_EXAM, HEADER_ROW, TABLE_END_ROW,
+                                  TEMPLATE_FILE, get_answer_key)
+
+LAST_DATA_ROW = TABLE_END_ROW - 1
+# Celda -> clave de la respuesta, tomadas de la definición del examen por defecto
+ANSWER_CELLS = {coordinate: key for key, coordinate in DEFAULT_EXAM.answer_cells.items()}
+DATE_FORMATS = ['dd/mm/yyyy', 'yyyy-mm-dd', 'mm/dd/yyyy']
+
+
+class SyntheticOptions:
+    """Probabilidades y tamaños de las variaciones de los envíos sintéticos."""
+
+    def __init__(self, correct_ratio=0.7, extra_sheets=1, extra_rows=2000, extra_cols=20,
+                 image_ratio=0.3, image_size=256):
+        self.correct_ratio = correct_ratio
+        self.extra_sheets = extra_sheets
+        self.extra_rows = extra_rows
+        self.extra_cols = extra_cols
+        self.image_ratio = image_ratio
+        self.image_size = image_size
+
+
+def _wrong_answer(value, rng):
+    if isinstance(value, str):
+        return rng.choice(["Linda Perez", "Iggy Pop", "No sé", value.upper() + " X"])
+    return value + rng.choice([-3, -2, -1, 1, 2, 5])
+
+
+def _fill_answers(ws, answers, rng, options):
+    for coordinate, key in ANSWER_CELLS.items():
+        if rng.random() < 0.05:
+            continue  # respuesta en blanco
+        value = answers[key]
+        ws[coordinate] = value if rng.random() < options.correct_ratio else _wrong_answer(value, rng)
+
+
+def _sort_by_score(ws):
+    first_col = ws[f"{COLUMN_MAPPING['ID']}{DATA_START_ROW}"].column
+    last_col = ws[f"{COLUMN_MAPPING['Duración Llamada (Minutos)']}{DATA_START_ROW}"].column
+    score_idx = ws[f"{COLUMN_MAPPING['Puntuación']}{DATA_START_ROW}"].column - first_col
+    rows = [[ws.cell(row=r, column=c).value for c in range(first_col, last_col + 1)]
+            for r in range(DATA_START_ROW, LAST_DATA_ROW + 1)]
+    rows.sort(key=lambda row: row[score_idx] or 0, reverse=True)
+    for r, values in enumerate(rows, DATA_START_ROW):
+        for c, value in enumerate(values, first_col):
+            ws.cell(row=r, column=c, value=value)
+
+
+def _format_dates(ws, number_format):
+    for row in ws[f"{COLUMN_MAPPING['Fecha']}{DATA_START_ROW}:{COLUMN_MAPPING['Fecha']}{LAST_DATA_ROW}"]:
+        cell = row[0]
+        if isinstance(cell.value, (int, float)):
+            cell.value = from_excel(cell.value)
+        cell.number_format = number_format
+
+
+def _center_table(ws):
+    first, last = COLUMN_MAPPING['ID'], COLUMN_MAPPING['Duración Llamada (Minutos)']
+    for row in ws[f"{first}{HEADER_ROW}:{last}{TABLE_END_ROW}"]:
+        for cell in row:
+            cell.alignment = Alignment(horizontal='center', vertical='center')
+
+
+def _paint_low_scores(ws):
+    column = COLUMN_MAPPING['Puntuación']
+    for row in ws[f"{column}{DATA_START_ROW}:{column}{LAST_DATA_ROW}"]:
+        if row[0].value is not None and row[0].value < 5:
+            row[0].font = Font(color="FFFF0000")
+
+
+def _add_charts(ws, rng):
+    names = Reference(ws, min_col=ws[f"{COLUMN_MAPPING['Nombre del Cliente']}1"].column,
+                      min_row=DATA_START_ROW, max_row=LAST_DATA_ROW)
+    score_col = ws[f"{COLUMN_MAPPING['Puntuación']}1"].column
+    scores = Reference(ws, min_col=score_col, min_row=HEADER_ROW, max_row=LAST_DATA_ROW)
+    if rng.random() < 0.8:
+        bar = BarChart()
+        bar.type = rng.choice(['bar', 'col'])
+        bar.title = "Puntuación por cliente"
+        bar.add_data(scores, titles_from_data=True)
+        bar.set_categories(names)
+        ws.add_chart(bar, "Q20")
+    if rng.random() < 0.8:
+        durations = Reference(ws, min_col=ws[f"{COLUMN_MAPPING['Duración Llamada (Minutos)']}1"].column,
+                              min_row=DATA_START_ROW, max_row=LAST_DATA_ROW)
+        if rng.random() < 0.5:
+            chart = ScatterChart()
+            chart.series.append(Series(Reference(ws, min_col=score_col, min_row=DATA_START_ROW,
+                                                 max_row=LAST_DATA_ROW), durations))
+        else:
+            chart = LineChart()
+            chart.add_data(scores, titles_from_data=True)
+            chart.set_categories(durations)
+        chart.title = "Duración vs Puntuación"
+        ws.add_chart(chart, "Q40")
+
+
+def _add_extra_sheet(wb, index, options, rng):
+    ws = wb.create_sheet(f"Extra{index}")
+    for r in range(1, options.extra_rows + 1):
+        ws.append([rng.randint(0, 10000) if c % 3 else f"texto {r}-{c}" for c in range(options.extra_cols)])
+
+
+def _png_bytes(size, rng):
+    """PNG en escala de grises con ruido (no comprimible) de size x size píxeles."""
+    def chunk(tag, data):
+        return (struct.pack(">I", len(data)) + tag + data
+                + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    raw = b"".join(b"\x00" + rng.randbytes(size) for _ in range(size))
+    header = struct.pack(">IIBBBBB", size, size, 8, 0, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b""))
+
+
+_DRAWING_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<xdr:wsDr xmlns:xdr="http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<xdr:oneCellAnchor><xdr:from><xdr:col>1</xdr:col><xdr:colOff>0</xdr:colOff><xdr:row>1</xdr:row>'
+    '<xdr:rowOff>0</xdr:rowOff></xdr:from><xdr:ext cx="{emu}" cy="{emu}"/>'
+    '<xdr:pic><xdr:nvPicPr><xdr:cNvPr id="1" name="Imagen 1"/><xdr:cNvPicPr/></xdr:nvPicPr>'
+    '<xdr:blipFill><a:blip r:embed="rId1"/><a:stretch><a:fillRect/></a:stretch></xdr:blipFill>'
+    '<xdr:spPr><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></xdr:spPr></xdr:pic>'
+    '<xdr:clientData/></xdr:oneCellAnchor></xdr:wsDr>'
+)
+_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="{id}" Type="{type}" Target="{target}"/></Relationships>'
+)
+_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/"
+
+
+def _embed_image(path, sheet_index, image):
+    """
+    Incrusta una imagen en la hoja sheet_index (1-based, sin dibujos propios) reescribiendo el zip.
+
+    openpyxl necesita Pillow para insertar imágenes; aquí se añaden directamente la
+    imagen, el dibujo y sus relaciones.
+    """
+    sheet_part = f"xl/worksheets/sheet{sheet_index}.xml"
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == sheet_part:
+                data = data.replace(b"</worksheet>", b'<drawing r:id="rIdImg"/></worksheet>')
+                if b'xmlns:r="' not in data:
+                    data = data.replace(
+                        b"<worksheet ",
+                        b'<worksheet xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" ',
+                        1)
+            elif item.filename == "[Content_Types].xml":
+                data = data.replace(b"</Types>", (
+                    b'<Default Extension="png" ContentType="image/png"/>'
+                    b'<Override PartName="/xl/drawings/drawing_img1.xml" '
+                    b'ContentType="application/vnd.openxmlformats-officedocument.drawing+xml"/></Types>'))
+            dst.writestr(item, data)
+        dst.writestr("xl/media/synthetic_image1.png", image)
+        dst.writestr("xl/drawings/drawing_img1.xml", _DRAWING_XML.replace("{emu}", "3000000"))
+        dst.writestr("xl/drawings/_rels/drawing_img1.xml.rels",
+                     _RELS_XML.format(id="rId1", type=_REL_TYPE + "image",
+                                      target="../media/synthetic_image1.png"))
+        dst.writestr(f"xl/worksheets/_rels/sheet{sheet_index}.xml.rels",
+                     _RELS_XML.format(id="rIdImg", type=_REL_TYPE + "drawing",
+                                      target="/xl/drawings/drawing_img1.xml"))
+    os.replace(tmp_path, path)
+
+
+def generate_submission(path, answers, rng, options=None):
+    """Crea un envío sintético en path; devuelve las variaciones aplicadas."""
+    options = options or SyntheticOptions()
+    wb = load_workbook(TEMPLATE_FILE)
+    ws = wb.active
+    applied = []
+
+    _fill_answers(ws, answers, rng, options)
+    if rng.random() < 0.7:
+        ws[f"{COLUMN_MAPPING['Sentimiento']}{HEADER_ROW}"] = "Sentimiento"
+        applied.append("encabezado")
+    if rng.random() < 0.6:
+        _sort_by_score(ws)
+        applied.append("orden")
+    if rng.random() < 0.7:
+        _format_dates(ws, rng.choice(DATE_FORMATS))
+        applied.append("fechas")
+    if rng.random() < 0.6:
+        _center_table(ws)
+        applied.append("centrado")
+    if rng.random() < 0.5:
+        _paint_low_scores(ws)
+        applied.append("rojo")
+    if rng.random() < 0.7:
+        ws[f"{COLUMN_MAPPING['Duración Llamada (Minutos)']}{TABLE_END_ROW}"] = rng.choice(
+            ["=PROMEDIO(K6:K35)", "=AVERAGE(K6:K35)", "=SUM(K6:K35)/30"])
+        applied.append("promedio")
+    if rng.random() < 0.5:
+        for letter in COLUMN_MAPPING.values():
+            ws.column_dimensions[letter].width = ws.column_dimensions[letter].width * rng.uniform(0.8, 1.3)
+        applied.append("anchos")
+    if rng.random() < 0.5:
+        first, last = COLUMN_MAPPING['ID'], COLUMN_MAPPING['Duración Llamada (Minutos)']
+        table = Table(displayName="Llamadas", ref=f"{first}{HEADER_ROW}:{last}{LAST_DATA_ROW}")
+        table.tableStyleInfo = TableStyleInfo(name="TableStyleMedium9", showRowStripes=True)
+        ws.add_table(table)
+        applied.append("tabla")
+    _add_charts(ws, rng)
+    if ws._charts:
+        applied.append("graficos")
+    for index in range(1, options.extra_sheets + 1):
+        _add_extra_sheet(wb, index, options, rng)
+    with_image = rng.random() < options.image_ratio
+    if with_image:
+        wb.create_sheet("Imagen")
+        applied.append("imagen")
+
+    wb.save(path)
+    if with_image:
+        _embed_image(path, len(wb.sheetnames), _png_bytes(options.image_size, rng))
+    return applied
+
+
+def generate_submissions(out_dir, count, seed=0, options=None):
+    """Crea count envíos sintéticos en out_dir y devuelve sus rutas."""
+    os.makedirs(out_dir, exist_ok=True)
+    answers = get_answer_key()["answers"]
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        path = os.path.join(out_dir, f"Sintetico {index:04d}_evaluacion.xlsx")
+        generate_submission(path, answers, rng, options)
+        paths.append(path)
+    return paths
+
+
+def main():
+    """Genera envíos sintéticos desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Genera envíos sintéticos a partir de la plantilla.")
+    parser.add_argument('destino', help="Carpeta de destino")
+    parser.add_argument('-n', '--cantidad', type=int, default=20, help="Número de envíos (por defecto 20)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla de las variaciones")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    created = generate_submissions(args.destino, args.cantidad, args.semilla)
+    print(f"{len(created)} envíos generados en '{args.destino}' ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
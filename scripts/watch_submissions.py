@@ -0,0 +1,221 @@
+# scripts/watch_submissions.py
+
+"""
+Modo de vigilancia: evalúa los envíos a medida que llegan a user_submissions/.
+
+La carpeta se sondea cada pocos segundos (sin dependencias externas). Un archivo
+se evalúa cuando su tamaño y fecha de modificación no cambian durante un tiempo
+de asentamiento y es un zip completo, de modo que no se lee mientras se copia y
+los guardados repetidos del mismo archivo se agrupan en una sola evaluación. La
+evaluación se hace en procesos aislados en segundo plano (ver isolated_runner):
+un envío que se cuelga, agota la memoria o tumba su proceso no detiene la
+vigilancia; se vuelve a intentar y, si falla de nuevo, se informa como Error.
+Los resultados se guardan en la caché de resultados (la ejecución por lotes los
+reutiliza) y se añaden a un registro JSONL en vivo. Un archivo solo se da por
+evaluado cuando su resultado está escrito.
+"""
+
+import argparse
+import json
+import os
+import time
+import zipfile
+from datetime import datetime
+
+from answer_key import file_sha256
+from evaluate_submissions import (RESULTS_CACHE, RESULTS_FILE, SUBMISSIONS_DIR, collect_records, failure_records,
+                                  get_answer_key, init_worker, rubric_version)
+from isolated_runner import IsolatedPool, TaskFailure
+from result_cache import ResultCache
+
+LIVE_RESULTS_FILE = os.path.splitext(RESULTS_FILE)[0] + '.live.jsonl'
+POLL_INTERVAL = 1.0  # Segundos entre sondeos de la carpeta
+SETTLE_SECONDS = 2.0  # Tiempo sin cambios para considerar un archivo completo
+INCOMPLETE_GRACE = 30.0  # Tiempo máximo esperando a que un archivo sea un zip válido
+MAX_ATTEMPTS = 2  # Evaluaciones fallidas (tiempo, memoria, caída) de un mismo contenido antes de informar Error
+
+
+def list_submissions(directory):
+    """Envíos .xlsx/.xlsm de la carpeta, sin los archivos de bloqueo de Excel (~$...)."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names)
+            if (name.endswith('.xlsx') or name.endswith('.xlsm')) and not name.startswith('~$')]
+
+
+def _signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FileTracker:
+    """
+    Sigue el tamaño y la fecha de modificación de los envíos entre sondeos.
+
+    poll() devuelve los archivos cuya firma lleva settle segundos sin cambiar y que
+    aún no se entregaron con esa firma; cada guardado nuevo reinicia la espera. Un
+    archivo se marca como entregado (mark_delivered) con la firma que tenía al
+    encolarlo, cuando ya se escribió su resultado.
+    """
+
+    def __init__(self, settle=SETTLE_SECONDS):
+        self.settle = settle
+        self._changes = {}  # ruta -> (firma, instante del último cambio)
+        self._delivered = {}  # ruta -> firma ya entregada
+
+    def poll(self, paths, now):
+        ready = []
+        for path in paths:
+            signature = _signature(path)
+            if signature is None:
+                continue
+            previous = self._changes.get(path)
+            if previous is None or previous[0] != signature:
+                self._changes[path] = (signature, now)
+                continue
+            if now - previous[1] >= self.settle and self._delivered.get(path) != signature:
+                ready.append(path)
+        for path in set(self._changes) - set(paths):
+            del self._changes[path]
+            self._delivered.pop(path, None)
+        return ready
+
+    def stable_for(self, path, now):
+        """Segundos que lleva el archivo sin cambios."""
+        return now - self._changes[path][1]
+
+    def signature(self, path):
+        """Firma (tamaño, fecha de modificación) con la que el archivo se dio por asentado."""
+        return self._changes[path][0]
+
+    def mark_delivered(self, path, signature):
+        if path in self._changes:  # Si se borró mientras se evaluaba no queda nada que recordar
+            self._delivered[path] = signature
+
+
+class LiveResultsStore:
+    """Registro en vivo de resultados: una línea JSON por envío evaluado."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, filename, content_hash, records, source):
+        entry = {"archivo": filename, "hash": content_hash, "origen": source,
+                 "evaluado": datetime.now().isoformat(timespec='seconds'), "filas": records}
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def _summary(records):
+    statuses = [record["Estado"] for record in records if record["No."] != ""]
+    if not statuses:
+        errors = [record["Observaciones"] for record in records if record["Estado"] == "Error"]
+        return f"error: {errors[0] if errors else 'sin resultados'}"
+    return f"{statuses.count('Correcto')}/{len(statuses)} correctas"
+
+
+def watch(directory=SUBMISSIONS_DIR, workers=1, interval=POLL_INTERVAL, settle=SETTLE_SECONDS,
+          live_file=LIVE_RESULTS_FILE, max_polls=None):
+    """
+    Vigila directory y evalúa cada envío nuevo o modificado cuando termina de escribirse.
+
+    Un archivo cuyo contenido (hash) no cambia respecto a la última evaluación no se
+    vuelve a evaluar; si se guarda de nuevo mientras se evalúa, se evalúa otra vez al
+    terminar. Si la evaluación falla se vuelve a encolar, hasta MAX_ATTEMPTS veces.
+    max_polls limita el número de sondeos (None: hasta Ctrl+C).
+    """
+    get_answer_key()
+    version = rubric_version()
+    cache = ResultCache(RESULTS_CACHE)
+    store = LiveResultsStore(live_file)
+    tracker = FileTracker(settle)
+    graded = {}  # nombre de archivo -> hash de la última evaluación
+    in_flight = {}  # ruta -> (hash, firma) de los envíos encolados
+    attempts = {}  # (nombre de archivo, hash) -> evaluaciones fallidas
+    polls = 0
+
+    print(f"Vigilando '{directory}' (Ctrl+C para terminar). Resultados en vivo en '{live_file}'")
+    pool = IsolatedPool(collect_records, workers, initializer=init_worker)
+    try:
+        while max_polls is None or polls < max_polls:
+            polls += 1
+            now = time.monotonic()
+            for path in tracker.poll(list_submissions(directory), now):
+                if path in in_flight:
+                    continue  # se vuelve a considerar cuando termine la evaluación en curso
+                if not zipfile.is_zipfile(path) and tracker.stable_for(path, now) < INCOMPLETE_GRACE:
+                    continue  # todavía incompleto; se evalúa igualmente (como error) tras la espera
+                signature = tracker.signature(path)
+                filename = os.path.basename(path)
+                try:
+                    content_hash = file_sha256(path)
+                except OSError:
+                    continue  # borrado o bloqueado; se vuelve a intentar en el siguiente sondeo
+                if graded.get(filename) == content_hash:
+                    tracker.mark_delivered(path, signature)
+                    continue
+                cached = cache.get(filename, content_hash, version)
+                if cached is not None:
+                    graded[filename] = content_hash
+                    store.append(filename, content_hash, cached, "cache")
+                    tracker.mark_delivered(path, signature)
+                    print(f"[{datetime.now():%H:%M:%S}] {filename}: {_summary(cached)} (en caché)")
+                    continue
+                print(f"[{datetime.now():%H:%M:%S}] En cola: {filename}")
+                pool.submit(path, path)
+                in_flight[path] = (content_hash, signature)
+
+            if pool.pending:
+                for path, outcome in pool.collect(interval):
+                    content_hash, signature = in_flight.pop(path)
+                    filename = os.path.basename(path)
+                    if isinstance(outcome, TaskFailure):
+                        failures = attempts.get((filename, content_hash), 0) + 1
+                        if failures < MAX_ATTEMPTS:
+                            # Sin marcarlo como entregado: el siguiente sondeo lo vuelve a encolar
+                            attempts[(filename, content_hash)] = failures
+                            print(f"[{datetime.now():%H:%M:%S}] Fallo al evaluar {filename} "
+                                  f"({outcome.message}); se reintentará")
+                            continue
+                        attempts.pop((filename, content_hash))
+                        records, _ = failure_records(path, outcome)  # No se guarda en caché
+                        store.append(filename, content_hash, records, "fallo")
+                    else:
+                        attempts.pop((filename, content_hash), None)
+                        records, _ = outcome
+                        cache.put(filename, content_hash, version, records)
+                        cache.commit()
+                        store.append(filename, content_hash, records, "evaluacion")
+                    graded[filename] = content_hash
+                    tracker.mark_delivered(path, signature)
+                    print(f"[{datetime.now():%H:%M:%S}] {filename}: {_summary(records)}")
+            else:
+                time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nVigilancia detenida.")
+    finally:
+        pool.close()
+        cache.close()
+    print(f"{len(graded)} envío(s) evaluado(s). Ejecuta evaluate_submissions.py para generar el informe "
+          f"(reutiliza estos resultados).")
+
+
+def main():
+    """Inicia el modo de vigilancia desde la línea de comandos."""
+    parser = argparse.ArgumentParser(description="Evalúa los envíos a medida que llegan a la carpeta.")
+    parser.add_argument('--carpeta', default=SUBMISSIONS_DIR, help="Carpeta a vigilar (por defecto user_submissions)")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos de evaluación en segundo plano")
+    parser.add_argument('--intervalo', type=float, default=POLL_INTERVAL, help="Segundos entre sondeos")
+    parser.add_argument('--espera', type=float, default=SETTLE_SECONDS,
+                        help="Segundos sin cambios antes de evaluar un archivo")
+    args = parser.parse_args()
+    watch(args.carpeta, args.workers, args.intervalo, args.espera)
+
+
+if __name__ == "__main__":
+    main()
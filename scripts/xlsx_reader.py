@@ -0,0 +1,671 @@
+# scripts/xlsx_reader.py
+
+"""
+Lector ligero de archivos XLSX para la evaluación.
+
+En lugar de construir el modelo completo de openpyxl (todas las celdas, estilos,
+imágenes y gráficos), abre el zip y analiza en streaming solo las partes que usan
+las preguntas: la lista de hojas, styles.xml, las celdas de los rangos pedidos de
+la hoja activa, las cadenas compartidas que esas celdas referencian, las tablas,
+el autofiltro, los gráficos y las propiedades del documento (autor, fechas). Las
+filas posteriores al último rango pedido se saltan sin analizarlas.
+"""
+
+import posixpath
+import re
+import zipfile
+from collections import namedtuple
+from xml.etree import ElementTree as ET
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils import column_index_from_string, get_column_letter, range_boundaries
+from openpyxl.utils.cell import coordinate_from_string
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+# --- Espacios de nombres OOXML ---
+SHEET_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CHART_NS = "http://schemas.openxmlformats.org/drawingml/2006/chart"
+DRAWINGML_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+
+REL_TYPE_WORKSHEET = REL_NS + "/worksheet"
+REL_TYPE_CHARTSHEET = REL_NS + "/chartsheet"
+REL_TYPE_STYLES = REL_NS + "/styles"
+REL_TYPE_SHARED_STRINGS = REL_NS + "/sharedStrings"
+REL_TYPE_DRAWING = REL_NS + "/drawing"
+REL_TYPE_CHART = REL_NS + "/chart"
+REL_TYPE_TABLE = REL_NS + "/table"
+REL_TYPE_OFFICE_DOCUMENT = REL_NS + "/officeDocument"
+REL_TYPE_CORE_PROPERTIES = "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties"
+
+CHUNK_SIZE = 64 * 1024  # Bytes leídos por iteración al recorrer una hoja
+
+CellStyle = namedtuple("CellStyle", ["number_format", "horizontal", "vertical", "font_color"])
+# type sigue la semántica de openpyxl ('bar'/'col' según barDir, 'scatter', 'line'...);
+# los títulos son el texto o la referencia que los define, y las series son ChartSeries
+ChartInfo = namedtuple("ChartInfo", ["sheet", "type", "title", "series", "axis_titles"])
+# Referencias (fórmulas como "'Datos'!$D$6:$D$35") del nombre, las categorías (o X) y los valores (o Y)
+ChartSeries = namedtuple("ChartSeries", ["name", "categories", "values"])
+
+
+def _tag(ns, name):
+    return f"{{{ns}}}{name}"
+
+
+class CellInfo:
+    """
+    Valor y metadatos de una celda, con la misma semántica que openpyxl (sin data_only).
+
+    En las celdas con fórmula, value es el texto "=..." y cached el valor calculado
+    que guardó la aplicación (<v>), o None si el archivo no lo incluye.
+    """
+
+    __slots__ = ("value", "data_type", "style_id", "cached")
+
+    def __init__(self, value=None, data_type='n', style_id=0, cached=None):
+        self.value = value
+        self.data_type = data_type
+        self.style_id = style_id
+        self.cached = cached
+
+
+EMPTY_CELL = CellInfo()
+
+
+class StyleTable:
+    """
+    Tablas de styles.xml necesarias para resolver formatos, alineación y color de fuente.
+
+    Un libro suele tener solo unos pocos estilos distintos (cellXfs) aunque tenga miles
+    de celdas, así que cada id de estilo se resuelve una sola vez y las preguntas sobre
+    estilos ("¿centrado?", "¿fuente roja?") se memorizan por id: clasificar un rango
+    se reduce a comparar enteros.
+    """
+
+    def __init__(self, xfs=None, fonts=None, num_formats=None):
+        self.xfs = xfs or [(0, 0, None, None)]  # (numFmtId, fontId, horizontal, vertical)
+        self.fonts = fonts or [None]  # Color RGB de cada fuente
+        self.num_formats = num_formats or {}  # numFmtId -> código de formato personalizado
+        self._resolved = {}  # id de estilo -> CellStyle
+        self._answers = {}  # (predicado, id de estilo) -> bool
+
+    def number_format(self, style_id):
+        """Devuelve el código de formato numérico del estilo."""
+        num_fmt_id = self._xf(style_id)[0]
+        if num_fmt_id in self.num_formats:
+            return self.num_formats[num_fmt_id]
+        return BUILTIN_FORMATS.get(num_fmt_id, 'General')
+
+    def resolve(self, style_id):
+        """Devuelve el CellStyle (formato, alineación y color de fuente) del estilo; se resuelve una vez por id."""
+        style = self._resolved.get(style_id)
+        if style is None:
+            num_fmt_id, font_id, horizontal, vertical = self._xf(style_id)
+            font_color = self.fonts[font_id] if 0 <= font_id < len(self.fonts) else None
+            style = self._resolved[style_id] = CellStyle(self.number_format(style_id), horizontal, vertical,
+                                                         font_color)
+        return style
+
+    def matches(self, style_id, predicate):
+        """Resultado de predicate(CellStyle) para el estilo, memorizado por (predicado, id)."""
+        key = (predicate, style_id)
+        answer = self._answers.get(key)
+        if answer is None:
+            answer = self._answers[key] = bool(predicate(self.resolve(style_id)))
+        return answer
+
+    def _xf(self, style_id):
+        if 0 <= style_id < len(self.xfs):
+            return self.xfs[style_id]
+        return self.xfs[0]
+
+
+class SubmissionData:
+    """Datos extraídos de un envío: lo que consultan las preguntas de la evaluación."""
+
+    def __init__(self):
+        self.sheetnames = []
+        self.active_sheet = None
+        self.cells = {}  # "M6" -> CellInfo (solo los rangos pedidos de la hoja activa)
+        self.read_bounds = []  # [(min_col, min_row, max_col, max_row)] de los rangos leídos
+        self.column_widths = []  # [(primera columna, última columna, ancho)] de los elementos <col>
+        self.tables = {}  # nombre -> rango
+        self.auto_filter_ref = None
+        self.charts = []  # ChartInfo de todas las hojas
+        self.styles = StyleTable()
+        self.properties = {}  # Propiedades del documento (creator, lastModifiedBy, created, modified...)
+
+    def cell(self, coordinate):
+        """Devuelve la celda indicada; las celdas ausentes se tratan como vacías."""
+        return self.cells.get(coordinate, EMPTY_CELL)
+
+    def covers(self, min_col, min_row, max_col, max_row):
+        """Indica si todas las celdas del rectángulo están dentro de los rangos leídos."""
+        for col in range(min_col, max_col + 1):
+            for row in range(min_row, max_row + 1):
+                if not any(b[0] <= col <= b[2] and b[1] <= row <= b[3] for b in self.read_bounds):
+                    return False
+        return True
+
+    def column_width(self, col_letter):
+        """Devuelve el ancho definido para la columna, o None si no tiene uno propio."""
+        col = column_index_from_string(col_letter)
+        for min_col, max_col, width in self.column_widths:
+            if min_col <= col <= max_col:
+                return width
+        return None
+
+    def style(self, cell):
+        """Devuelve el CellStyle de una celda."""
+        return self.styles.resolve(cell.style_id)
+
+    def values(self, cell_range):
+        """Devuelve los valores de un rango como lista de filas."""
+        min_col, min_row, max_col, max_row = range_boundaries(cell_range)
+        return [[self.cell(f"{get_column_letter(col)}{row}").value for col in range(min_col, max_col + 1)]
+                for row in range(min_row, max_row + 1)]
+
+
+# --- Utilidades del paquete zip ---
+
+def _resolve_target(base_part, target):
+    """Convierte el destino de una relación en la ruta del miembro dentro del zip."""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _rels_part(part):
+    directory, name = posixpath.split(part)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+
+def _read_rels(zf, part):
+    """Devuelve {rId: (tipo, ruta)} de las relaciones de una parte (vacío si no tiene)."""
+    rels_name = _rels_part(part)
+    if rels_name not in zf.NameToInfo:
+        return {}
+    rels = {}
+    with zf.open(rels_name) as stream:
+        for _, elem in ET.iterparse(stream):
+            if elem.tag == _tag(PKG_REL_NS, 'Relationship'):
+                if elem.get('TargetMode') != 'External':
+                    rels[elem.get('Id')] = (elem.get('Type'), _resolve_target(part, elem.get('Target')))
+                elem.clear()
+    return rels
+
+
+def _find_package_part(package_rels, part_type, default=None):
+    for rel_type, target in package_rels.values():
+        if rel_type == part_type:
+            return target
+    return default
+
+
+def _read_core_properties(zf, part):
+    """Devuelve las propiedades del documento (docProps/core.xml) con valor, por su nombre local."""
+    properties = {}
+    with zf.open(part) as stream:
+        root = ET.parse(stream).getroot()
+    for elem in root:
+        text = (elem.text or '').strip()
+        if text:
+            properties[elem.tag.rpartition('}')[2]] = text
+    return properties
+
+
+# --- Libro y estilos ---
+
+def _read_workbook(zf, workbook_part):
+    """Devuelve la lista de hojas [(nombre, rId)], el índice de la hoja activa y el epoch de fechas."""
+    sheets = []
+    active = 0
+    epoch = CALENDAR_WINDOWS_1900
+    with zf.open(workbook_part) as stream:
+        for _, elem in ET.iterparse(stream):
+            if elem.tag == _tag(SHEET_NS, 'sheet'):
+                sheets.append((elem.get('name'), elem.get(_tag(REL_NS, 'id'))))
+            elif elem.tag == _tag(SHEET_NS, 'workbookView'):
+                active = int(elem.get('activeTab', 0))
+            elif elem.tag == _tag(SHEET_NS, 'workbookPr'):
+                if elem.get('date1904') in ('1', 'true'):
+                    epoch = CALENDAR_MAC_1904
+    return sheets, active, epoch
+
+
+def _read_styles(zf, styles_part):
+    """Lee de styles.xml los formatos numéricos, las fuentes y los cellXfs."""
+    num_formats = {}
+    fonts = []
+    xfs = []
+    section = None
+    with zf.open(styles_part) as stream:
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            name = elem.tag.rpartition('}')[2]
+            if event == 'start':
+                if name in ('fonts', 'cellXfs', 'cellStyleXfs', 'dxfs'):
+                    section = name
+                continue
+            if name == 'numFmt':
+                num_formats[int(elem.get('numFmtId'))] = elem.get('formatCode')
+            elif name == 'font' and section == 'fonts':
+                color = elem.find(_tag(SHEET_NS, 'color'))
+                rgb = color.get('rgb') if color is not None else None
+                if rgb is not None and len(rgb) == 6:
+                    rgb = "00" + rgb
+                fonts.append(rgb)
+                elem.clear()
+            elif name == 'xf' and section == 'cellXfs':
+                alignment = elem.find(_tag(SHEET_NS, 'alignment'))
+                horizontal = vertical = None
+                if alignment is not None:
+                    horizontal = alignment.get('horizontal')
+                    vertical = alignment.get('vertical')
+                xfs.append((int(elem.get('numFmtId', 0)), int(elem.get('fontId', 0)), horizontal, vertical))
+                elem.clear()
+            elif name in ('fonts', 'cellXfs', 'cellStyleXfs', 'dxfs'):
+                section = None
+    return StyleTable(xfs, fonts, num_formats)
+
+
+def _date_styles(styles):
+    """Devuelve los índices de estilo con formato de fecha y de duración, como hace openpyxl."""
+    dates = set()
+    timedeltas = set()
+    for idx in range(len(styles.xfs)):
+        fmt = styles.number_format(idx)
+        if is_date_format(fmt):
+            dates.add(idx)
+        if is_timedelta_format(fmt):
+            timedeltas.add(idx)
+    return dates, timedeltas
+
+
+def _read_shared_strings(zf, part, indices):
+    """Lee solo las cadenas compartidas indicadas, deteniéndose tras la última necesaria."""
+    strings = {}
+    if not indices:
+        return strings
+    last = max(indices)
+    idx = 0
+    si_tag = _tag(SHEET_NS, 'si')
+    t_tag = _tag(SHEET_NS, 't')
+    r_tag = _tag(SHEET_NS, 'r')
+    with zf.open(part) as stream:
+        for _, elem in ET.iterparse(stream):
+            if elem.tag != si_tag:
+                continue
+            if idx in indices:
+                parts = []
+                for child in elem:
+                    if child.tag == t_tag:
+                        parts.append(child.text or '')
+                    elif child.tag == r_tag:
+                        parts.append(child.findtext(t_tag) or '')
+                strings[idx] = ''.join(parts)
+            elem.clear()
+            if idx >= last:
+                break
+            idx += 1
+    return strings
+
+
+# --- Hoja de cálculo ---
+
+def _cast_number(value):
+    """Convierte el texto de un número al tipo de Python, igual que openpyxl."""
+    if '.' in value or 'E' in value or 'e' in value:
+        return float(value)
+    return int(value)
+
+
+def _cached_value(value, data_type):
+    """Valor calculado de una celda con fórmula según su atributo t (str, b, e o número)."""
+    if data_type in ('str', 'e', 'inlineStr'):
+        return value
+    if data_type == 'b':
+        return bool(int(value))
+    try:
+        return _cast_number(value)
+    except ValueError:
+        return value
+
+
+class _SheetParser:
+    """Recorre una hoja en streaming y extrae las celdas de los rangos pedidos."""
+
+    def __init__(self, bounds, date_styles, timedelta_styles, epoch):
+        self.bounds = bounds  # [(min_col, min_row, max_col, max_row)]
+        self.max_row = max(b[3] for b in bounds)
+        self.date_styles = date_styles
+        self.timedelta_styles = timedelta_styles
+        self.epoch = epoch
+        self.cells = {}
+        self.pending_strings = {}  # coordenada -> índice de cadena compartida
+        self.shared_formulae = {}
+        self.column_widths = []
+        self.auto_filter_ref = None
+        self.table_rids = []
+        self.row = 0
+        self.col = 0
+        self.rows_done = False
+
+    def wanted(self, row, col):
+        for min_col, min_row, max_col, max_row in self.bounds:
+            if min_row <= row <= max_row and min_col <= col <= max_col:
+                return True
+        return False
+
+    def handle(self, event, elem):
+        name = elem.tag.rpartition('}')[2]
+        if event == 'start':
+            if name == 'row':
+                self.row = int(elem.get('r')) if elem.get('r') else self.row + 1
+                self.col = 0
+                if self.row > self.max_row:
+                    self.rows_done = True
+            return
+        if name == 'c':
+            self._handle_cell(elem)
+        elif name == 'row':
+            elem.clear()
+        elif name == 'col':
+            width = elem.get('width')
+            if width is not None:
+                self.column_widths.append((int(elem.get('min')), int(elem.get('max')), float(width)))
+        else:
+            self.handle_tail(name, elem)
+
+    def handle_tail(self, name, elem):
+        if name == 'autoFilter':
+            self.auto_filter_ref = elem.get('ref')
+        elif name == 'tablePart':
+            self.table_rids.append(elem.get(_tag(REL_NS, 'id')))
+
+    def _handle_cell(self, elem):
+        coordinate = elem.get('r')
+        if coordinate:
+            column, row = coordinate_from_string(coordinate)
+            self.col = column_index_from_string(column)
+        else:
+            self.col += 1
+            row = self.row
+            coordinate = f"{get_column_letter(self.col)}{row}"
+
+        formula = elem.find(_tag(SHEET_NS, 'f'))
+        wanted = self.wanted(row, self.col)
+        if formula is not None and formula.get('t') == 'shared' and formula.text:
+            # Guardar la fórmula maestra aunque esté fuera de los rangos pedidos
+            self.shared_formulae.setdefault(formula.get('si'), Translator("=" + formula.text, coordinate))
+        if not wanted:
+            return
+
+        data_type = elem.get('t', 'n')
+        style_id = int(elem.get('s', 0))
+        value = None if data_type == 'inlineStr' else (elem.findtext(_tag(SHEET_NS, 'v')) or None)
+
+        cached = None
+        if formula is not None:
+            if value is not None:
+                cached = _cached_value(value, data_type)
+            data_type = 'f'
+            value = self._formula_text(formula, coordinate)
+        elif value is not None:
+            if data_type == 'n':
+                value = _cast_number(value)
+                if style_id in self.date_styles:
+                    data_type = 'd'
+                    try:
+                        value = from_excel(value, self.epoch, timedelta=style_id in self.timedelta_styles)
+                    except (OverflowError, ValueError):
+                        data_type, value = 'e', "#VALUE!"
+            elif data_type == 's':
+                self.pending_strings[coordinate] = int(value)
+            elif data_type == 'b':
+                value = bool(int(value))
+            elif data_type == 'str':
+                data_type = 's'
+            elif data_type == 'd':
+                value = from_ISO8601(value)
+        elif data_type == 'inlineStr':
+            inline = elem.find(_tag(SHEET_NS, 'is'))
+            if inline is not None:
+                data_type = 's'
+                value = ''.join(t.text or '' for t in inline.iter(_tag(SHEET_NS, 't')))
+
+        self.cells[coordinate] = CellInfo(value, data_type, style_id, cached)
+
+    def _formula_text(self, formula, coordinate):
+        value = "=" + (formula.text or '')
+        if formula.get('t') == 'shared' and not formula.text:
+            translator = self.shared_formulae.get(formula.get('si'))
+            if translator is not None:
+                value = translator.translate_formula(coordinate)
+        return value
+
+
+def _parse_sheet(zf, part, parser):
+    """
+    Recorre la hoja hasta la última fila pedida y salta el resto de sheetData.
+
+    Cuando se supera la última fila pedida deja de analizar XML: busca el cierre
+    de sheetData en los bytes restantes y analiza solo la cola de la hoja
+    (autoFilter, tableParts), anteponiéndole la etiqueta raíz original
+    para conservar las declaraciones de espacios de nombres.
+    """
+    pull = ET.XMLPullParser(events=('start', 'end'))
+    root_tag = None
+    end_marker = None
+    with zf.open(part) as stream:
+        chunk = b''
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if root_tag is None:
+                match = re.search(rb'<(\w+:)?worksheet\b[^>]*>', chunk)
+                if match:
+                    root_tag = match.group(0)
+                    end_marker = b'</' + (match.group(1) or b'') + b'sheetData>'
+            pull.feed(chunk)
+            for event, elem in pull.read_events():
+                parser.handle(event, elem)
+                if parser.rows_done:
+                    break
+            if parser.rows_done:
+                break
+
+        if not parser.rows_done or root_tag is None:
+            pull.close()
+            for event, elem in pull.read_events():
+                parser.handle(event, elem)
+            return
+
+        # Buscar el cierre de sheetData sin analizar las filas restantes
+        buffer = chunk
+        while True:
+            pos = buffer.find(end_marker)
+            if pos != -1:
+                tail = buffer[pos + len(end_marker):] + stream.read()
+                break
+            more = stream.read(CHUNK_SIZE)
+            if not more:
+                return
+            buffer = buffer[-len(end_marker):] + more
+
+    tail_parser = ET.XMLPullParser(events=('end',))
+    tail_parser.feed(root_tag + tail)
+    tail_parser.close()
+    for _, elem in tail_parser.read_events():
+        parser.handle_tail(elem.tag.rpartition('}')[2], elem)
+
+
+# --- Gráficos ---
+
+def _chart_text(elem):
+    """Texto de un título o nombre de serie: texto enriquecido, referencia o valor literal."""
+    if elem is None:
+        return None
+    ref = elem.find(f'.//{_tag(CHART_NS, "f")}')
+    if ref is not None:
+        return ref.text
+    runs = [t.text or '' for t in elem.iter(_tag(DRAWINGML_NS, 't'))]
+    if runs:
+        return ''.join(runs)
+    return elem.findtext(f'.//{_tag(CHART_NS, "v")}')
+
+
+def _series_ref(ser, *names):
+    """Fórmula de la primera de las partes indicadas (cat/xVal, val/yVal) que tenga referencia."""
+    for name in names:
+        part = ser.find(_tag(CHART_NS, name))
+        if part is not None:
+            ref = part.find(f'.//{_tag(CHART_NS, "f")}')
+            if ref is not None:
+                return ref.text
+    return None
+
+
+def _read_chart(zf, part, sheet_name):
+    """
+    Lee una parte de gráfico: tipo (el del primer gráfico del área de trazado, como
+    openpyxl), título, series con sus referencias y títulos de los ejes.
+    """
+    with zf.open(part) as stream:
+        root = ET.parse(stream).getroot()
+    chart = root.find(_tag(CHART_NS, 'chart'))
+    plot = chart.find(_tag(CHART_NS, 'plotArea')) if chart is not None else None
+    if plot is None:
+        return ChartInfo(sheet_name, None, None, [], [])
+
+    chart_type = None
+    series = []
+    axis_titles = []
+    for elem in plot:
+        name = elem.tag.rpartition('}')[2]
+        if name.endswith('Chart'):
+            if chart_type is None:
+                chart_type = name[:-len('Chart')]
+                if chart_type in ('bar', 'bar3D'):
+                    bar_dir = elem.find(_tag(CHART_NS, 'barDir'))
+                    chart_type = bar_dir.get('val') if bar_dir is not None else 'col'  # Igual que BarChart.type
+            for ser in elem.findall(_tag(CHART_NS, 'ser')):
+                series.append(ChartSeries(_chart_text(ser.find(_tag(CHART_NS, 'tx'))),
+                                          _series_ref(ser, 'cat', 'xVal'), _series_ref(ser, 'val', 'yVal')))
+        elif name.endswith('Ax'):
+            title = _chart_text(elem.find(_tag(CHART_NS, 'title')))
+            if title:
+                axis_titles.append(title)
+    title = _chart_text(chart.find(_tag(CHART_NS, 'title')))
+    return ChartInfo(sheet_name, chart_type, title, series, axis_titles)
+
+
+def _sheet_charts(zf, sheet_part, sheet_name):
+    """Devuelve los gráficos de los dibujos de una hoja; sin dibujos no se abre nada más."""
+    charts = []
+    for rel_type, drawing_part in _read_rels(zf, sheet_part).values():
+        if rel_type != REL_TYPE_DRAWING or drawing_part not in zf.NameToInfo:
+            continue
+        for chart_rel_type, chart_part in _read_rels(zf, drawing_part).values():
+            if chart_rel_type == REL_TYPE_CHART and chart_part in zf.NameToInfo:
+                charts.append(_read_chart(zf, chart_part, sheet_name))
+    return charts
+
+
+def _read_table_ref(zf, part):
+    """Devuelve (nombre, rango) de una parte de tabla."""
+    with zf.open(part) as stream:
+        for event, elem in ET.iterparse(stream, events=('start',)):
+            return elem.get('displayName') or elem.get('name'), elem.get('ref')
+    return None, None
+
+
+# --- Punto de entrada ---
+
+WorkbookParts = namedtuple("WorkbookParts", ["sheets", "active", "epoch", "styles", "shared_strings",
+                                             "core_properties"])
+
+
+def find_workbook_parts(zf):
+    """
+    Localiza en el zip abierto las partes del libro sin leer hojas ni estilos.
+
+    Devuelve WorkbookParts: sheets es la lista [(nombre, (tipo, ruta) o None)] en el
+    orden del libro, active el índice de la hoja activa (0 si no es válido), epoch el
+    de las fechas y styles, shared_strings y core_properties las rutas de esas partes
+    (None si el libro no las declara). Lanza KeyError o SyntaxError si falta
+    workbook.xml o está dañado.
+    """
+    package_rels = _read_rels(zf, '')
+    workbook_part = _find_package_part(package_rels, REL_TYPE_OFFICE_DOCUMENT, 'xl/workbook.xml')
+    workbook_rels = _read_rels(zf, workbook_part)
+    sheets, active, epoch = _read_workbook(zf, workbook_part)
+    if not 0 <= active < len(sheets):
+        active = 0
+    return WorkbookParts(
+        sheets=[(name, workbook_rels.get(rid)) for name, rid in sheets],
+        active=active,
+        epoch=epoch,
+        styles=_find_package_part(workbook_rels, REL_TYPE_STYLES),
+        shared_strings=_find_package_part(workbook_rels, REL_TYPE_SHARED_STRINGS),
+        core_properties=_find_package_part(package_rels, REL_TYPE_CORE_PROPERTIES),
+    )
+
+
+def read_submission(source, ranges, charts=True, styles=True):
+    """
+    Lee de un archivo XLSX (ruta o archivo binario) lo que necesita la evaluación.
+
+    `ranges` es la lista de rangos ("C5:K36", "M6:M17") de la hoja activa cuyas
+    celdas se extraen; el resto de filas y columnas no se analiza. Con charts=False
+    no se abren los dibujos ni los gráficos; con styles=False no se lee styles.xml
+    (todas las celdas quedan con el estilo por defecto y las fechas como números).
+    """
+    data = SubmissionData()
+    with zipfile.ZipFile(source) as zf:
+        parts = find_workbook_parts(zf)
+        data.sheetnames = [name for name, _ in parts.sheets]
+        if styles and parts.styles and parts.styles in zf.NameToInfo:
+            data.styles = _read_styles(zf, parts.styles)
+
+        sheet_name, sheet_rel = parts.sheets[parts.active]
+        if sheet_rel is None or sheet_rel[0] != REL_TYPE_WORKSHEET:
+            raise ValueError(f"La hoja activa '{sheet_name}' no es una hoja de cálculo")
+        sheet_part = sheet_rel[1]
+        data.active_sheet = sheet_name
+
+        date_styles, timedelta_styles = _date_styles(data.styles)
+        parser = _SheetParser([range_boundaries(r) for r in ranges], date_styles, timedelta_styles, parts.epoch)
+        _parse_sheet(zf, sheet_part, parser)
+        data.read_bounds = parser.bounds
+
+        data.cells = parser.cells
+        data.column_widths = parser.column_widths
+        data.auto_filter_ref = parser.auto_filter_ref
+
+        if parser.pending_strings and parts.shared_strings and parts.shared_strings in zf.NameToInfo:
+            strings = _read_shared_strings(zf, parts.shared_strings, set(parser.pending_strings.values()))
+            for coordinate, idx in parser.pending_strings.items():
+                data.cells[coordinate].value = strings.get(idx)
+
+        sheet_rels = _read_rels(zf, sheet_part)
+        for rid in parser.table_rids:
+            rel = sheet_rels.get(rid)
+            if rel and rel[0] == REL_TYPE_TABLE and rel[1] in zf.NameToInfo:
+                name, ref = _read_table_ref(zf, rel[1])
+                data.tables[name] = ref
+
+        if parts.core_properties and parts.core_properties in zf.NameToInfo:
+            try:
+                data.properties = _read_core_properties(zf, parts.core_properties)
+            except ET.ParseError:
+                pass  # Propiedades dañadas: no afectan a la evaluación
+
+        if charts:
+            for name, rel in parts.sheets:
+                if rel and rel[0] in (REL_TYPE_WORKSHEET, REL_TYPE_CHARTSHEET):
+                    data.charts.extend(_sheet_charts(zf, rel[1], name))
+
+    return data
@@ -0,0 +1,83 @@
+# scripts/zip_submissions.py
+
+"""
+Envíos leídos directamente de la exportación ZIP de la plataforma de cursos.
+
+La plataforma entrega un único .zip con cientos de envíos, normalmente uno por
+carpeta con el nombre del alumno. En lugar de extraerlo al disco, cada miembro
+.xlsx/.xlsm se lee como bytes cuando se va a evaluar, de modo que cada envío se
+descomprime una sola vez y se analiza desde memoria.
+
+Como la carpeta suele identificar al alumno, el nombre del envío es la ruta del
+miembro con las barras sustituidas por "_" (Ana Ruiz_123_/examen.xlsx ->
+Ana Ruiz_123__examen.xlsx); un envío en la raíz del zip conserva su nombre.
+"""
+
+import os
+import zipfile
+
+from resource_guard import DEFAULT_LIMITS, SubmissionRejected
+
+IGNORED_FOLDERS = ("__MACOSX",)
+
+
+def is_submission_member(member_name):
+    """Indica si un miembro del zip es un envío (.xlsx/.xlsm, sin carpetas de sistema ni bloqueos ~$)."""
+    parts = [part for part in member_name.replace('\\', '/').split('/') if part]
+    if not parts or parts[0] in IGNORED_FOLDERS:
+        return False
+    name = parts[-1]
+    return (name.endswith('.xlsx') or name.endswith('.xlsm')) and not name.startswith(('~$', '.'))
+
+
+def submission_name(member_name):
+    """Nombre del envío para el informe a partir de la ruta del miembro."""
+    parts = [part for part in member_name.replace('\\', '/').split('/') if part]
+    return "_".join(parts)
+
+
+class ZipSubmissions:
+    """
+    Envíos de un zip de exportación: names (ordenados) y read(nombre) -> bytes.
+
+    Los miembros que superan el tamaño máximo de un envío no se leen: read lanza
+    SubmissionRejected. Puede leerse desde varios hilos a la vez.
+    """
+
+    def __init__(self, source, limits=DEFAULT_LIMITS):
+        self.source = source
+        self.limits = limits
+        self._zip = zipfile.ZipFile(source)
+        members = {}
+        for info in self._zip.infolist():
+            if info.is_dir() or not is_submission_member(info.filename):
+                continue
+            name = submission_name(info.filename)
+            stem, ext = os.path.splitext(name)
+            copy = 2
+            while name in members:  # Dos rutas que se aplanan igual
+                name = f"{stem} ({copy}){ext}"
+                copy += 1
+            members[name] = info
+        self._members = members
+        self.names = sorted(members)
+
+    def read(self, name):
+        """Bytes del envío name, descomprimidos en memoria."""
+        info = self._members[name]
+        if info.file_size > self.limits.max_total_mb * 1024 * 1024:
+            raise SubmissionRejected(f"el envío ocupa {info.file_size / 2**20:.1f} MB dentro del zip "
+                                     f"(máximo {self.limits.max_total_mb} MB)")
+        return self._zip.read(info)
+
+    def __len__(self):
+        return len(self.names)
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Los scripts se importan entre sí por nombre de módulo (from xlsx_reader import ...)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'scripts'))
+
+from xlsx_reader import CellInfo, SubmissionData  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def answer_key_path():
+    return os.path.join(ROOT_DIR, 'data', 'respuestas_esperadas.xlsx')
+
+
+def make_submission(cells, bounds=((1, 1, 20, 60),), sheet="Datos"):
+    """SubmissionData de prueba a partir de {"C6": valor}; los textos "=..." son fórmulas sin valor guardado."""
+    data = SubmissionData()
+    data.sheetnames = [sheet]
+    data.active_sheet = sheet
+    data.read_bounds = list(bounds)
+    for coordinate, value in cells.items():
+        if isinstance(value, str) and value.startswith("="):
+            data.cells[coordinate] = CellInfo(value, 'f')
+        elif isinstance(value, str):
+            data.cells[coordinate] = CellInfo(value, 's')
+        else:
+            data.cells[coordinate] = CellInfo(value, 'n')
+    return data
@@ -0,0 +1,56 @@
+import os
+import zipfile
+
+import pytest
+from openpyxl import load_workbook
+
+from conftest import ROOT_DIR
+from create_user_file import CORE_PART, CUSTOM_PART, create_submission_files
+
+TEMPLATE_PATH = os.path.join(ROOT_DIR, 'data', 'base_datos_original.xlsx')
+
+
+@pytest.fixture
+def roster(tmp_path):
+    path = tmp_path / "lista.csv"
+    path.write_text("nombre;grupo\nAna Pérez;A\nLuis/Gómez;B\nAna Pérez;C\n", encoding="utf-8")
+    return str(path)
+
+
+def test_each_student_gets_a_stamped_copy_of_the_template(tmp_path, roster):
+    output_dir = tmp_path / "envios"
+    assert create_submission_files(roster, TEMPLATE_PATH, str(output_dir), workers=2) == {"metadatos": 3}
+    # No queda la base temporal en la carpeta de destino
+    assert sorted(os.listdir(output_dir)) == [
+        "Ana Pérez (2)_evaluacion.xlsx", "Ana Pérez_evaluacion.xlsx", "Luis_Gómez_evaluacion.xlsx"]
+
+    wb = load_workbook(output_dir / "Luis_Gómez_evaluacion.xlsx")
+    assert wb.properties.title == "Evaluación de Excel - Luis/Gómez"
+    assert {prop.name: prop.value for prop in wb.custom_doc_props.props}.items() >= {
+        "Estudiante": "Luis/Gómez", "grupo": "B"}.items()
+
+    # Las hojas, estilos e imágenes se conservan byte a byte
+    with zipfile.ZipFile(TEMPLATE_PATH) as template, zipfile.ZipFile(output_dir / "Ana Pérez_evaluacion.xlsx") as zf:
+        assert zf.testzip() is None
+        assert sorted(zf.namelist()) == sorted(template.namelist())
+        for name in template.namelist():
+            if name not in (CORE_PART, CUSTOM_PART):
+                assert zf.read(name) == template.read(name), name
+
+
+def test_existing_files_are_kept_unless_overwrite(tmp_path, roster):
+    output_dir = tmp_path / "envios"
+    output_dir.mkdir()
+    existing = output_dir / "Ana Pérez_evaluacion.xlsx"
+    existing.write_bytes(b"trabajo del estudiante")
+
+    assert create_submission_files(roster, TEMPLATE_PATH, str(output_dir)) == {"existente": 1, "metadatos": 2}
+    assert existing.read_bytes() == b"trabajo del estudiante"
+    assert create_submission_files(roster, TEMPLATE_PATH, str(output_dir), overwrite=True) == {"metadatos": 3}
+    assert zipfile.is_zipfile(existing)
+
+
+def test_hardlink_mode_does_not_share_the_stamped_files(tmp_path, roster):
+    output_dir = tmp_path / "envios"
+    create_submission_files(roster, TEMPLATE_PATH, str(output_dir), link_mode="hardlink")
+    assert all(os.stat(output_dir / name).st_nlink == 1 for name in os.listdir(output_dir))
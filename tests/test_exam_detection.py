@@ -0,0 +1,61 @@
+import json
+import os
+
+import pytest
+
+from conftest import make_submission
+from evaluate_submissions import detect_exams
+from exam_config import EXAMS_DIR, ExamConfigError, ExamDefinition, resolve_exams
+
+
+def _exam(**changes):
+    with open(os.path.join(EXAMS_DIR, 'base.json'), encoding='utf-8') as f:
+        config = json.load(f)
+    config.update(changes)
+    return ExamDefinition(config)
+
+
+@pytest.fixture(scope="module")
+def exams():
+    base = _exam()
+    marked = _exam(id="b", marca={"celda": "B2", "valor": "Variante B"})
+    shifted = _exam(id="c", fila_encabezados=8, fila_inicio_datos=9, fila_fin_tabla=39,
+                    columnas={name: chr(ord(letter) + 1) for name, letter in base.columns.items()})
+    return base, marked, shifted
+
+
+def _submission(exam, **extra):
+    cells = {f"{letter}{exam.header_row}": name for name, letter in exam.columns.items()}
+    return make_submission({**cells, **extra})
+
+
+def test_single_exam_checks_only_the_headers(exams):
+    base, _, shifted = exams
+    assert detect_exams(_submission(base), [base]) == ([base], None)
+    found, error = detect_exams(_submission(shifted), [base])
+    assert found == [] and "no encontrada en la posición correcta" in error
+
+
+def test_exam_is_detected_by_its_header_positions(exams):
+    base, _, shifted = exams
+    assert detect_exams(_submission(shifted), list(exams)) == ([shifted], None)
+    assert detect_exams(_submission(base), list(exams)) == ([base], None)
+
+
+def test_marker_selects_variants_with_the_same_headers(exams):
+    base, marked, _ = exams
+    assert detect_exams(_submission(base, B2=" Variante B "), list(exams)) == ([base, marked], None)
+    assert detect_exams(_submission(base, B2="Variante A"), list(exams)) == ([base], None)
+
+
+def test_submission_matching_no_exam_reports_the_candidates(exams):
+    found, error = detect_exams(make_submission({"C5": "Otra cosa"}), list(exams))
+    assert found == []
+    assert "ningún examen (base, b, c)" in error
+
+
+def test_resolve_exams():
+    assert [exam.id for exam in resolve_exams(None)] == ["base"]
+    assert [exam.id for exam in resolve_exams(["auto", "base"])] == [exam.id for exam in resolve_exams(["auto"])]
+    with pytest.raises(ExamConfigError, match="Examen desconocido"):
+        resolve_exams(["no-existe"])
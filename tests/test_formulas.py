@@ -0,0 +1,98 @@
+import pytest
+
+from conftest import make_submission
+from formulas import ExcelError, FormulaError, FormulaEvaluator, _tokenize
+from xlsx_reader import read_submission
+
+
+@pytest.fixture
+def evaluator():
+    cells = {"C5": "Nombre", "D5": "Sentimiento", "E5": "Puntos"}
+    rows = [("Ana", "Very Positive", 9), ("Luis", "Positive", 4), ("Eva", "Negative", 7),
+            ("Juan", "Positive", 2)]
+    for row, (name, sentiment, points) in enumerate(rows, 6):
+        cells[f"C{row}"], cells[f"D{row}"], cells[f"E{row}"] = name, sentiment, points
+    cells["M10"] = "=PROMEDIO(E6:E9)"
+    cells["M11"] = "=M10*2"
+    cells["M12"] = "=M13+1"
+    cells["M13"] = "=M12+1"
+    return FormulaEvaluator(make_submission(cells, bounds=[(3, 5, 5, 9), (13, 10, 13, 13)]))
+
+
+def test_tokenize_spanish_function_names_and_references():
+    assert _tokenize("CONTAR.SI($D$6:D9;\">5\")") == [
+        ("func", "CONTAR.SI"), ("op", "("), ("ref", "$D$6:D9"), ("op", ";"), ("string", '">5"'), ("op", ")")]
+
+
+def test_tokenize_sheet_references_strings_and_errors():
+    kinds = [kind for kind, _ in _tokenize("'Hoja 1'!A1:B2&\"dijo \"\"hola\"\"\"<>#N/A")]
+    assert kinds == ["ref", "op", "string", "op", "error"]
+
+
+def test_tokenize_rejects_unknown_characters():
+    with pytest.raises(FormulaError):
+        _tokenize("SUMA(A1{)")
+
+
+@pytest.mark.parametrize("spanish, english", [
+    ("=PROMEDIO(E6:E9)", "=AVERAGE(E6:E9)"),
+    ("=CONTARA(C6:C9)", "=COUNTA(C6:C9)"),
+    ("=CONTAR.SI(D6:D9;\"Positive\")", "=COUNTIF(D6:D9,\"Positive\")"),
+    ("=BUSCARV(\"Eva\";C6:E9;3;FALSO)", "=VLOOKUP(\"Eva\",C6:E9,3,FALSE)"),
+    ("=SUMA(E6:E9)", "=_xlfn.SUM(E6:E9)"),
+])
+def test_spanish_and_english_names_give_the_same_value(evaluator, spanish, english):
+    assert evaluator.evaluate(spanish) == evaluator.evaluate(english)
+
+
+@pytest.mark.parametrize("formula, expected", [
+    ("=PROMEDIO(E6:E9)", 5.5),
+    ("=MAX(E6:E9)", 9),
+    ("=CONTARA(C5:C9)", 5),
+    ("=CONTAR(C5:E9)", 4),
+    ("=CONTAR.SI(E6:E9;\">5\")", 2),
+    ("=CONTAR.SI(D6:D9;\"*positive\")", 3),
+    ("=CONTAR.SI(D6:D9;\"<>Positive\")", 2),
+    ("=BUSCARV(\"luis\";C6:E9;2;0)", "Positive"),
+    ("=REDONDEAR(2.5;0)", 3),
+    ("=REDONDEAR(-2.5;0)", -3),
+    ("=\"Total: \"&SUMA(E6:E9)", "Total: 22"),
+    ("=50%*E6", 4.5),
+])
+def test_evaluates_the_supported_subset(evaluator, formula, expected):
+    assert evaluator.evaluate(formula) == expected
+
+
+def test_excel_errors_propagate_as_values(evaluator):
+    assert evaluator.evaluate("=PROMEDIO(C6:C9)") == ExcelError("#DIV/0!")
+    assert evaluator.evaluate("=BUSCARV(\"Pedro\";C6:E9;2;FALSO)") == ExcelError("#N/A")
+    assert evaluator.evaluate("=1/0+E6") == ExcelError("#DIV/0!")
+
+
+def test_formula_cells_without_cached_value_are_evaluated(evaluator):
+    assert evaluator.cell_value("M11") == 11
+
+
+def test_circular_reference_raises(evaluator):
+    with pytest.raises(FormulaError, match="circular"):
+        evaluator.cell_value("M12")
+
+
+@pytest.mark.parametrize("formula", [
+    "=SUMA(E6:E40)",  # Fuera de los rangos leídos
+    "=SUMA(E:E)",
+    "=SUMA(Otra!E6:E9)",
+    "=DESVEST(E6:E9)",
+    "=MAX(E6:E9",
+    "=CONTAR.SI(E6:E9)",
+])
+def test_unsupported_or_unreadable_formulas_raise(evaluator, formula):
+    with pytest.raises(FormulaError):
+        evaluator.evaluate(formula)
+
+
+def test_answer_key_formula_matches_its_cached_value(answer_key_path):
+    data = read_submission(answer_key_path, ["C5:K36"])
+    cell = data.cell("K36")
+    assert cell.data_type == 'f'
+    assert FormulaEvaluator(data).evaluate(cell.value) == pytest.approx(cell.cached)
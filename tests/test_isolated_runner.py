@@ -0,0 +1,59 @@
+import os
+import time
+
+from isolated_runner import IsolatedPool, TaskFailure
+
+
+# Las tareas deben ser funciones de nivel de módulo: los procesos no se crean con fork
+def _task(arg):
+    if arg == "cae":
+        os._exit(9)
+    if arg == "cuelga":
+        time.sleep(60)
+    if arg == "falla":
+        raise ValueError("argumento no válido")
+    return arg * 2
+
+
+def _pid(_):
+    return os.getpid()
+
+
+def test_map_keeps_order_and_reports_each_failure():
+    pool = IsolatedPool(_task, workers=2, timeout=1)
+    results = dict(pool.map([1, "cae", 2, "cuelga", "falla", 3]))
+    assert [results[arg] for arg in (1, 2, 3)] == [2, 4, 6]
+    assert results["cae"].kind == "caida"
+    assert results["cuelga"].kind == "tiempo"
+    assert results["falla"] == TaskFailure("error", "ValueError: argumento no válido", results["falla"].seconds)
+
+
+def test_failed_processes_are_replaced():
+    pool = IsolatedPool(_task, workers=1, timeout=1)
+    assert [result for _, result in pool.map([1, "cae", 2])][::2] == [2, 4]
+    assert pool.started == 2  # El que cayó y su reemplazo; un error de la tarea no reemplaza el proceso
+    assert [result for _, result in pool.map(["falla", 3])][1] == 6
+
+
+def test_processes_are_recycled_after_recycle_after_tasks():
+    pool = IsolatedPool(_pid, workers=1, recycle_after=2)
+    pids = [pid for _, pid in pool.map(range(5))]
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert pool.started == 3
+
+
+def test_cancel_stops_the_running_task():
+    pool = IsolatedPool(_task, workers=1, timeout=30, keep_warm=True)
+    try:
+        pool.submit("a", "cuelga")
+        pool.submit("b", 5)
+        pool.collect(timeout=0.1)
+        pool.cancel("a")
+        finished = []
+        deadline = time.monotonic() + 30
+        while not finished and time.monotonic() < deadline:
+            finished = pool.collect()
+        assert finished == [("b", 10)]
+        assert pool.pending == 0
+    finally:
+        pool.close()
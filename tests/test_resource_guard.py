@@ -0,0 +1,53 @@
+import io
+import zipfile
+
+import pytest
+
+from resource_guard import DEFAULT_LIMITS, SubmissionRejected, inspect_submission
+
+
+def _rewrite(source_path, changes):
+    """Copia del libro en memoria con los miembros de changes (nombre -> función bytes -> bytes) modificados."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(source_path) as src, zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            dst.writestr(info.filename, changes.get(info.filename, lambda d: d)(data))
+    buffer.seek(0)
+    return buffer
+
+
+def test_answer_key_is_within_the_limits(answer_key_path):
+    inspection = inspect_submission(answer_key_path)
+    assert inspection.reasons == []
+    assert inspection.uncompressed_bytes > 0
+
+
+def test_non_zip_is_rejected():
+    with pytest.raises(SubmissionRejected, match="no es un archivo XLSX"):
+        inspect_submission(io.BytesIO(b"no es un zip"))
+
+
+def test_zip_bomb_is_rejected(answer_key_path):
+    bomb = _rewrite(answer_key_path, {"xl/media/image4.png": lambda _: b"\0" * (4 * 1024 * 1024)})
+    with pytest.raises(SubmissionRejected, match="relación de compresión"):
+        inspect_submission(bomb)
+
+
+def test_oversized_part_is_rejected(answer_key_path):
+    limits = DEFAULT_LIMITS._replace(max_member_mb=0.01)
+    with pytest.raises(SubmissionRejected, match="descomprimida"):
+        inspect_submission(answer_key_path, limits)
+
+
+def test_huge_sheet_and_many_styles_degrade_to_minimal_reading(answer_key_path):
+    submission = _rewrite(answer_key_path, {
+        "xl/worksheets/sheet1.xml": lambda d: d.replace(b'<dimension ref="A1:S998"/>',
+                                                        b'<dimension ref="A1:XFD1048576"/>'),
+        "xl/styles.xml": lambda d: d.replace(b'<cellXfs count="20">', b'<cellXfs count="90000">'),
+    })
+    reasons = inspect_submission(submission).reasons
+    assert len(reasons) == 3
+    assert "1048576 filas" in reasons[0]
+    assert "16384 columnas" in reasons[1]
+    assert "90000 estilos" in reasons[2]
@@ -0,0 +1,58 @@
+import shutil
+
+import pytest
+
+import evaluate_submissions
+from result_cache import ResultCache
+
+RECORDS = [{"No.": 1, "Tema": "Cálculo", "Pregunta": "¿Cuántos?", "Estado": "Correcto", "Observaciones": ""}]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_results_are_reused_only_with_the_same_hash_and_rubric(cache):
+    cache.put("ana.xlsx", "hash1", "v1", RECORDS)
+    assert cache.get("ana.xlsx", "hash1", "v1") == RECORDS
+    assert cache.get("ana.xlsx", "hash2", "v1") is None
+    assert cache.get("ana.xlsx", "hash1", "v2") is None
+    assert cache.get("luis.xlsx", "hash1", "v1") is None
+
+
+def test_put_replaces_the_previous_entry(cache):
+    cache.put("ana.xlsx", "hash1", "v1", RECORDS)
+    cache.put("ana.xlsx", "hash2", "v1", [])
+    assert cache.get("ana.xlsx", "hash1", "v1") is None
+    assert cache.get("ana.xlsx", "hash2", "v1") == []
+
+
+def test_entries_persist_after_closing(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path)
+    cache.put("ana.xlsx", "hash1", "v1", RECORDS)
+    cache.put_facts("ana.xlsx", "hash1", "h1", b"\x00hechos")
+    cache.close()
+
+    cache = ResultCache(path)
+    assert cache.get("ana.xlsx", "hash1", "v1") == RECORDS
+    assert cache.get_facts("ana.xlsx", "hash1", "h1") == b"\x00hechos"
+    assert cache.get_facts("ana.xlsx", "hash1", "h2") is None
+    cache.close()
+
+
+def test_unchanged_submissions_are_not_evaluated_again(tmp_path, answer_key_path):
+    submission = str(tmp_path / "clave_evaluacion.xlsx")
+    shutil.copyfile(answer_key_path, submission)
+    cache_file = str(tmp_path / "cache.sqlite")
+
+    (path, records, entries), = evaluate_submissions.evaluate_with_cache([submission], cache_file=cache_file)
+    assert path == submission and entries
+    assert any(record["Estado"] == "Correcto" for record in records)
+
+    (_, cached, entries), = evaluate_submissions.evaluate_with_cache([submission], cache_file=cache_file)
+    assert cached == records
+    assert entries == []  # Sin mediciones: no se evaluó
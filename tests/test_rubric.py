@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from conftest import make_submission
+from exam_config import EXAMS_DIR, ExamDefinition
+from rubric import Rule, RubricContext, RuleError, format_rows, required_ranges, run_rules
+
+
+def _exam(**changes):
+    with open(os.path.join(EXAMS_DIR, 'base.json'), encoding='utf-8') as f:
+        config = json.load(f)
+    config.update(changes)
+    return ExamDefinition(config)
+
+
+def _context(cells=None, minimal=None, exam=None):
+    return RubricContext(make_submission(cells or {}), {"answers": {}}, minimal=minimal, exam=exam)
+
+
+def _ok(ctx):
+    return "Correcto", ""
+
+
+def test_required_ranges_drops_ranges_contained_in_others():
+    rules = [Rule(1, "", "", _ok, cells=["C6"]), Rule(2, "", "", _ok, ranges=["C5:K36"]),
+             Rule(3, "", "", _ok, cells=["M6"], ranges=["D6:D20"])]
+    assert required_ranges(rules, extra=["C5:K5"]) == ["C5:K36", "M6"]
+
+
+def test_required_ranges_follow_the_exam_positions():
+    moved = Rule(1, "", "", _ok, cells=lambda exam: [exam.answer_cells["total_ids"]])
+    assert required_ranges([moved], exams=[_exam(celdas_respuesta={"total_ids": "P3"})]) == ["P3"]
+
+
+def test_run_rules_reports_in_number_order_and_skips_questions_outside_the_exam():
+    rules = [Rule(number, "Tema", f"Pregunta {number}", _ok) for number in (3, 1, 2)]
+    reported = []
+    run_rules(rules, _context(exam=_exam(preguntas=[1, 3])), lambda *row: reported.append(row))
+    assert reported == [(1, "Tema", "Pregunta 1", "Correcto", ""), (3, "Tema", "Pregunta 3", "Correcto", "")]
+
+
+def test_question_text_uses_the_exam_parameters():
+    exam = _exam()
+    parametrized = Rule(1, "", "¿Cuál es el ID {id_buscado}?", _ok)
+    assert parametrized.text(exam) == f"¿Cuál es el ID {exam.parameters['id_buscado']}?"
+
+
+def test_rule_errors_are_reported_as_error_rows():
+    def expected_failure(ctx):
+        raise RuleError("La celda M6 está vacía")
+
+    def unexpected_failure(ctx):
+        return 1 / 0
+
+    ctx = _context()
+    assert Rule(1, "", "", expected_failure).evaluate(ctx) == ("Error", "La celda M6 está vacía")
+    assert Rule(2, "", "", unexpected_failure).evaluate(ctx) == (
+        "Error", "Error al evaluar respuesta: division by zero")
+
+
+def test_style_and_chart_rules_are_not_evaluated_in_minimal_reading():
+    ctx = _context(minimal="la hoja declara 200000 filas")
+    assert Rule(1, "", "", _ok, styles=True).evaluate(ctx) == (
+        "Error", "No evaluada (lectura mínima): la hoja declara 200000 filas")
+    assert Rule(2, "", "", _ok).evaluate(ctx) == ("Correcto", "")
+
+
+def test_context_extracts_each_range_once():
+    ctx = _context({"C6": 1, "C7": 2, "C8": "x", "C9": "=C6+C7"})
+    assert ctx.range("C6:C9") is ctx.range("C6:C9")
+    arrays = ctx.column_arrays("C6:C9")
+    assert list(arrays.values) == [1, 2, "x", "=C6+C7"]
+    assert list(arrays.rows) == [6, 7, 8, 9]
+    assert ctx.computed("C9") == 3
+    with pytest.raises(RuleError):
+        ctx.evaluate("=SUMA(Z1:Z500)")
+
+
+def test_format_rows_compacts_consecutive_rows():
+    assert format_rows([6, 7, 8, 9, 12, 15, 16]) == "6-9, 12, 15-16"
+    assert format_rows([]) == ""
@@ -0,0 +1,78 @@
+import argparse
+import os
+
+import pytest
+from openpyxl import load_workbook
+
+from merge_results import MergeError, load_partials, merge
+from sharding import PartialResultsWriter, parse_shard, partial_path, select_shard, shard_of
+
+NAMES = [f"Estudiante {idx:03d}_evaluacion.xlsx" for idx in range(60)]
+
+
+def _records(name, status="Correcto"):
+    return [{"No.": "", "Tema": "", "Pregunta": f"--- Evaluando: {name} ---", "Estado": "", "Observaciones": ""},
+            {"No.": 1, "Tema": "Cálculo", "Pregunta": "¿Cuantos ID?", "Estado": status, "Observaciones": ""}]
+
+
+def _write_partials(results_file, count, version="v1", names=NAMES):
+    for index in range(1, count + 1):
+        writer = PartialResultsWriter(partial_path(results_file, index, count), index, count, version)
+        for name in select_shard(names, index, count):
+            writer.write(name, _records(name), [])
+        writer.close()
+
+
+def test_parse_shard():
+    assert parse_shard(" 2 / 4 ") == (2, 4)
+    for text in ("0/4", "5/4", "2-4", "a/b"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_shard(text)
+
+
+def test_each_submission_belongs_to_exactly_one_shard():
+    shards = [select_shard(NAMES, index, 4) for index in range(1, 5)]
+    assert sorted(name for shard in shards for name in shard) == NAMES
+    assert all(shards)  # Con 60 nombres ningún fragmento queda vacío
+    # El reparto depende solo del nombre de archivo, no de la carpeta ni del orden
+    assert all(shard_of(os.path.join("otra", "carpeta", name), 4) == shard_of(name, 4) for name in NAMES)
+    assert select_shard(NAMES[::-1], 2, 4) == shards[1][::-1]
+
+
+def test_merge_writes_submissions_in_filename_order(tmp_path):
+    results_file = str(tmp_path / "evaluation_results.xlsx")
+    _write_partials(results_file, 3)
+    assert merge(results_file) == len(NAMES)
+
+    rows = list(load_workbook(results_file).active.iter_rows(min_row=2, values_only=True))
+    started = [row[2] for row in rows if str(row[2]).startswith("--- Evaluando")]
+    assert started == [f"--- Evaluando: {name} ---" for name in NAMES]
+
+
+def test_incomplete_or_inconsistent_partials_are_not_merged(tmp_path):
+    results_file = str(tmp_path / "evaluation_results.xlsx")
+    _write_partials(results_file, 3)
+    os.remove(partial_path(results_file, 2, 3))
+    with pytest.raises(MergeError, match="Faltan los fragmentos 2/3"):
+        load_partials(results_file)
+
+    writer = PartialResultsWriter(partial_path(results_file, 2, 3), 2, 3, "v2")
+    writer.close()
+    with pytest.raises(MergeError, match="otra versión de la rúbrica"):
+        load_partials(results_file)
+
+    _write_partials(results_file, 3)
+    duplicate = next(name for name in NAMES if shard_of(name, 3) != 2)
+    writer = PartialResultsWriter(partial_path(results_file, 2, 3), 2, 3, "v1")
+    writer.write(duplicate, _records(duplicate), [])
+    writer.close()
+    with pytest.raises(MergeError, match="más de un fragmento"):
+        load_partials(results_file)
+
+
+def test_discarded_partial_leaves_no_file(tmp_path):
+    path = partial_path(str(tmp_path / "evaluation_results.xlsx"), 1, 2)
+    writer = PartialResultsWriter(path, 1, 2, "v1")
+    writer.write(NAMES[0], _records(NAMES[0]), [])
+    writer.discard()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from conftest import make_submission
+from similarity import SimilarityIndex, submission_features
+
+
+def _student(rng, name):
+    """Envío con el encabezado de la plantilla y respuestas propias en C6:K35."""
+    cells = {f"{col}5": header for col, header in zip("CDEFGHIJK", "ABCDEFGHI")}
+    for row in range(6, 36):
+        for col in "CDEFGHIJK":
+            cells[f"{col}{row}"] = rng.randint(0, 10**6)
+    data = make_submission(cells)
+    data.properties = {"creator": name}
+    return data
+
+
+@pytest.fixture
+def cohort():
+    rng = random.Random(1)
+    return {f"estudiante_{idx:02d}.xlsx": _student(rng, f"Estudiante {idx}") for idx in range(30)}
+
+
+def _index(submissions):
+    index = SimilarityIndex()
+    for name, data in submissions.items():
+        index.add(name, submission_features(data))
+    return index
+
+
+def test_unrelated_submissions_are_not_grouped(cohort):
+    assert _index(cohort).clusters() == []
+
+
+def test_near_copy_is_grouped_with_its_source(cohort):
+    copy = make_submission({coordinate: cell.value for coordinate, cell in cohort["estudiante_07.xlsx"].cells.items()})
+    copy.properties = {"creator": "Otra persona"}
+    for coordinate in ("C6", "D7", "E8", "F9", "G10"):  # Unas pocas celdas retocadas
+        copy.cells[coordinate].value = -1
+    cohort["copia.xlsx"] = copy
+
+    clusters = _index(cohort).clusters()
+    assert len(clusters) == 1
+    (first, similarity, closest, _), (second, _, _, _) = clusters[0]
+    assert {first, second} == {"copia.xlsx", "estudiante_07.xlsx"}
+    assert closest == second
+    assert 0.9 < similarity < 1
+
+
+def test_report_rows_give_similarity_as_a_number(cohort):
+    cohort["copia.xlsx"] = cohort["estudiante_03.xlsx"]
+    rows = _index(cohort).report_rows()
+    assert [row["Envío"] for row in rows] == ["copia.xlsx", "estudiante_03.xlsx"]
+    assert all(row["Similitud máxima"] == 1.0 and row["Envíos en el grupo"] == 2 for row in rows)
+
+
+def test_report_rows_without_groups_explain_the_search(cohort):
+    rows = _index(cohort).report_rows()
+    assert len(rows) == 1
+    assert "30" in rows[0]["Envío"]
@@ -0,0 +1,58 @@
+import datetime
+import json
+import shutil
+import zlib
+
+import pytest
+
+import evaluate_submissions
+from conftest import make_submission
+from submission_facts import dump_facts, load_facts
+from xlsx_reader import read_submission
+
+
+def _cell(cell):
+    return cell.value, cell.data_type, cell.style_id, cell.cached
+
+
+def test_facts_rebuild_what_was_read(answer_key_path):
+    data = read_submission(answer_key_path, ["C5:K36", "M6:M17"])
+    facts = load_facts(dump_facts(data, minimal="motivo"))
+    assert facts.minimal == "motivo"
+    rebuilt = facts.user_data
+    for name in ("sheetnames", "active_sheet", "read_bounds", "column_widths", "tables", "auto_filter_ref",
+                 "charts", "properties"):
+        assert getattr(rebuilt, name) == getattr(data, name), name
+    assert {coordinate: _cell(cell) for coordinate, cell in rebuilt.cells.items()} == \
+        {coordinate: _cell(cell) for coordinate, cell in data.cells.items()}
+    assert all(rebuilt.style(cell) == data.style(cell) for cell in data.cells.values())
+
+
+def test_dates_and_durations_keep_their_type():
+    values = {"C6": datetime.datetime(2024, 5, 1, 8, 30), "C7": datetime.date(2024, 5, 1),
+              "C8": datetime.time(8, 30), "C9": datetime.timedelta(minutes=90)}
+    rebuilt = load_facts(dump_facts(make_submission(values))).user_data
+    assert {coordinate: rebuilt.cell(coordinate).value for coordinate in values} == values
+
+
+@pytest.mark.parametrize("blob", [
+    b"no son hechos",
+    zlib.compress(json.dumps({"version": -1}).encode()),
+    zlib.compress(b"{\"version\": 2}"),
+])
+def test_unreadable_or_outdated_facts_raise_value_error(blob):
+    with pytest.raises(ValueError):
+        load_facts(blob)
+
+
+def test_rubric_change_regrades_from_facts(tmp_path, answer_key_path, monkeypatch):
+    submission = str(tmp_path / "clave_evaluacion.xlsx")
+    shutil.copyfile(answer_key_path, submission)
+    cache_file = str(tmp_path / "cache.sqlite")
+    (_, records, _), = evaluate_submissions.evaluate_with_cache([submission], cache_file=cache_file)
+
+    monkeypatch.setattr(evaluate_submissions, "rubric_version", lambda: "otra rúbrica")
+    (_, regraded, entries), = evaluate_submissions.evaluate_with_cache([submission], cache_file=cache_file)
+    assert regraded == records
+    phases = {entry["nombre"] for entry in entries if entry["tipo"] == "fase"}
+    assert "hechos" in phases and "lectura" not in phases
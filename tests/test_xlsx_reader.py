@@ -0,0 +1,73 @@
+import pytest
+from openpyxl import load_workbook
+from openpyxl.cell import MergedCell
+from openpyxl.utils import get_column_letter
+
+from xlsx_reader import read_submission
+
+
+@pytest.fixture(scope="module")
+def sheet(answer_key_path):
+    return load_workbook(answer_key_path).active
+
+
+@pytest.fixture(scope="module")
+def cached_sheet(answer_key_path):
+    return load_workbook(answer_key_path, data_only=True).active
+
+
+@pytest.fixture(scope="module")
+def data(answer_key_path, sheet):
+    return read_submission(answer_key_path, [sheet.dimensions])
+
+
+def _cells(sheet):
+    # Las celdas combinadas (salvo la primera) no tienen estilo propio en openpyxl
+    return [cell for row in sheet.iter_rows() for cell in row if not isinstance(cell, MergedCell)]
+
+
+def test_workbook_structure_matches_openpyxl(sheet, data):
+    assert data.sheetnames == sheet.parent.sheetnames
+    assert data.active_sheet == sheet.title
+    assert data.auto_filter_ref == sheet.auto_filter.ref
+    assert data.tables == {name: table.ref for name, table in sheet.tables.items()}
+
+
+def test_values_and_types_match_openpyxl(sheet, data):
+    for cell in _cells(sheet):
+        info = data.cell(cell.coordinate)
+        assert (info.value, info.data_type) == (cell.value, cell.data_type), cell.coordinate
+
+
+def test_cached_formula_values_match_openpyxl_data_only(sheet, cached_sheet, data):
+    formulas = [cell.coordinate for cell in _cells(sheet) if cell.data_type == 'f']
+    assert formulas
+    for coordinate in formulas:
+        assert data.cell(coordinate).cached == cached_sheet[coordinate].value, coordinate
+
+
+def test_styles_match_openpyxl(sheet, data):
+    for cell in _cells(sheet):
+        style = data.style(data.cell(cell.coordinate))
+        color = cell.font.color.rgb if cell.font.color is not None and cell.font.color.type == 'rgb' else None
+        assert style == (cell.number_format, cell.alignment.horizontal, cell.alignment.vertical, color), \
+            cell.coordinate
+
+
+def test_column_widths_match_openpyxl(sheet, data):
+    # openpyxl agrupa las columnas de un mismo <col> (min..max) bajo la primera letra
+    expected = {}
+    for dimension in sheet.column_dimensions.values():
+        if dimension.customWidth:
+            expected.update(dict.fromkeys(range(dimension.min, dimension.max + 1), dimension.width))
+    assert expected
+    for idx in range(1, sheet.max_column + 1):
+        assert data.column_width(get_column_letter(idx)) == expected.get(idx), get_column_letter(idx)
+
+
+def test_only_requested_ranges_are_read(answer_key_path, sheet):
+    data = read_submission(answer_key_path, ["C5:K6", "M10"])
+    assert set(data.cells) <= {f"{col}{row}" for col in "CDEFGHIJK" for row in (5, 6)} | {"M10"}
+    assert data.cell("C6").value == sheet["C6"].value
+    assert data.cell("K36").value is None
+    assert not data.covers(3, 5, 11, 36)
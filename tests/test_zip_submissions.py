@@ -0,0 +1,56 @@
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import ROOT_DIR
+from evaluation_api import grade, grade_zip
+from zip_submissions import ZipSubmissions
+
+TEMPLATE_PATH = os.path.join(ROOT_DIR, 'data', 'base_datos_original.xlsx')
+
+
+@pytest.fixture
+def export(answer_key_path):
+    with open(answer_key_path, 'rb') as f:
+        answer_key = f.read()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr("Ana Ruiz_123_/examen.xlsx", answer_key)
+        zf.writestr("Ana Ruiz_123__examen.xlsx", answer_key)  # Se aplana igual que el anterior
+        zf.writestr("Luis Gómez_456_/examen.xlsx", b"no es un xlsx")
+        zf.writestr("Luis Gómez_456_/~$examen.xlsx", b"bloqueo")
+        zf.writestr("__MACOSX/Ana Ruiz_123_/._examen.xlsx", b"metadatos")
+        zf.writestr("Ana Ruiz_123_/notas.txt", b"texto")
+        zf.writestr("Ana Ruiz_123_/", b"")
+    buffer.seek(0)
+    return buffer
+
+
+def test_names_flatten_folders_and_skip_non_submissions(export):
+    with ZipSubmissions(export) as submissions:
+        assert submissions.names == ["Ana Ruiz_123__examen (2).xlsx", "Ana Ruiz_123__examen.xlsx",
+                                     "Luis Gómez_456__examen.xlsx"]
+        assert submissions.read("Luis Gómez_456__examen.xlsx") == b"no es un xlsx"
+
+
+def test_grade_zip_grades_each_member_like_a_single_file(export, answer_key_path):
+    results = {result.filename: result for result in grade_zip(export)}
+    assert len(results) == 3
+
+    expected = grade(answer_key_path, "Ana Ruiz_123__examen.xlsx")
+    assert results["Ana Ruiz_123__examen.xlsx"].records == expected.records
+    assert expected.questions and not expected.errors
+
+    rejected = results["Luis Gómez_456__examen.xlsx"]
+    assert rejected.questions == []
+    assert rejected.errors and "no es un archivo XLSX" in rejected.errors[0]
+
+
+def test_grade_can_run_from_several_threads(answer_key_path):
+    sources = [answer_key_path, TEMPLATE_PATH] * 4
+    sequential = [grade(path).records for path in sources]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert [result.records for result in pool.map(grade, sources)] == sequential